@@ -0,0 +1,88 @@
+import sys
+import time
+import socket
+import argparse
+import resource
+import subprocess
+
+from backends import BACKENDS, SelectBackend
+from bench import wait_for_server, stop_server, process_stats, echo_load
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit does (10k idle connections need more than the usual 1024)."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def serve(backend: str, port: int):
+    """Run the echo Server in this (child) process."""
+    raise_file_limit()
+    from server import Server
+    Server(port=port, backend=backend, backlog=4096).start()
+
+
+def run(backend: str, idle: int, port: int, args) -> dict:
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", backend, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    idle_sockets = []
+    try:
+        wait_for_server(port)
+        for _ in range(idle):
+            idle_sockets.append(socket.create_connection(("127.0.0.1", port)))
+        time.sleep(0.5) # Let the server accept them all
+        rss_mib, _ = process_stats(process.pid)
+        latencies = sorted(echo_load(port, args.active, args.message_size, args.duration))
+    finally:
+        for sock in idle_sockets:
+            sock.close()
+        stop_server(process, port)
+
+    return {
+        "rss_mib": rss_mib,
+        "echoes": len(latencies) / args.duration,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Echo latency of the non-blocking Server's backends with many idle connections")
+    parser.add_argument("-b", "--backends", nargs="+", choices=list(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("-i", "--idle", type=int, nargs="+", default=[100, 1000, 10000], help="Idle connection counts. Defaults to 100 1000 10000.")
+    parser.add_argument("-a", "--active", type=int, default=4, help="Active echo clients. Defaults to 4.")
+    parser.add_argument("-s", "--message-size", type=int, default=64, help="Bytes per echo. Defaults to 64.")
+    parser.add_argument("-t", "--duration", type=float, default=3.0, help="Seconds per run. Defaults to 3.")
+    parser.add_argument("-p", "--port", type=int, default=65100, help="Base port; each run gets its own. Defaults to 65100.")
+    # Internal: run a server in this process (used for the child processes).
+    parser.add_argument("--serve", choices=list(BACKENDS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    limit = raise_file_limit()
+    print(f"[*] {args.active} active clients echoing {args.message_size} bytes among idle connections, "
+          f"{args.duration:.0f}s per run (open file limit {limit})\n")
+    print(f"{'backend':<8} {'idle':>6} {'echoes/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'RSS (MiB)':>10}")
+    port = args.port
+    for idle in args.idle:
+        for backend in args.backends:
+            port += 1
+            if backend == "select" and idle + args.active + 8 > SelectBackend.FD_SETSIZE:
+                print(f"{backend:<8} {idle:>6}  n/a: select() can't watch descriptors past FD_SETSIZE ({SelectBackend.FD_SETSIZE})")
+                continue
+            if idle + args.active + 64 > limit:
+                print(f"{backend:<8} {idle:>6}  n/a: the open file limit ({limit}) is too low")
+                continue
+            result = run(backend, idle, port, args)
+            print(f"{backend:<8} {idle:>6} {result['echoes']:>10.0f} {result['p50'] * 1000:>9.3f} {result['p99'] * 1000:>9.3f} {result['rss_mib']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
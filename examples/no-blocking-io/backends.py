@@ -0,0 +1,127 @@
+import select
+
+# The events a backend reports, like selectors.EVENT_READ / EVENT_WRITE.
+READ = 1
+WRITE = 2
+
+
+class SelectBackend():
+    """
+    `select.select()`: available everywhere, but every call hands the kernel the whole set of
+    descriptors to scan (O(n) per call, however few are ready), and descriptors numbered
+    FD_SETSIZE (1024 on Linux) or higher can't be watched at all.
+    """
+    edge_triggered = False
+    FD_SETSIZE = 1024
+
+    def __init__(self) -> None:
+        # Descriptors we want read/write events for. Sets, so (un)registering is O(1).
+        self.readers = set()
+        self.writers = set()
+
+    def register(self, fd: int, events: int):
+        if fd >= self.FD_SETSIZE:
+            raise ValueError(f"select() can't watch descriptor {fd} (FD_SETSIZE is {self.FD_SETSIZE})")
+        self.modify(fd, events)
+
+    def modify(self, fd: int, events: int):
+        (self.readers.add if events & READ else self.readers.discard)(fd)
+        (self.writers.add if events & WRITE else self.writers.discard)(fd)
+
+    def unregister(self, fd: int):
+        self.readers.discard(fd)
+        self.writers.discard(fd)
+
+    def poll(self, timeout: float = None) -> list[tuple[int, int]]:
+        """
+        Waits up to `timeout` seconds (None: forever) and returns (fd, events) for every ready descriptor.
+        """
+        readable, writable, _ = select.select(self.readers, self.writers, [], timeout)
+        ready = dict.fromkeys(readable, READ)
+        for fd in writable:
+            ready[fd] = ready.get(fd, 0) | WRITE
+        return list(ready.items())
+
+    def close(self):
+        pass
+
+
+class PollBackend():
+    """
+    `select.poll()`: the kernel keeps no limit on descriptor numbers, and registration is
+    incremental, but it still scans every registered descriptor on each call (O(n)).
+    """
+    edge_triggered = False
+
+    def __init__(self) -> None:
+        self.poller = select.poll()
+
+    @staticmethod
+    def _mask(events: int) -> int:
+        return (select.POLLIN if events & READ else 0) | (select.POLLOUT if events & WRITE else 0)
+
+    def register(self, fd: int, events: int):
+        self.poller.register(fd, self._mask(events))
+
+    def modify(self, fd: int, events: int):
+        self.poller.modify(fd, self._mask(events))
+
+    def unregister(self, fd: int):
+        self.poller.unregister(fd)
+
+    def poll(self, timeout: float = None) -> list[tuple[int, int]]:
+        # Errors and hang-ups are reported as readable: the next recv() says what happened.
+        ready = self.poller.poll(None if timeout is None else timeout * 1000)
+        return [
+            (fd, (READ if mask & (select.POLLIN | select.POLLHUP | select.POLLERR) else 0) |
+                 (WRITE if mask & select.POLLOUT else 0))
+            for fd, mask in ready
+        ]
+
+    def close(self):
+        pass
+
+
+class EpollBackend():
+    """
+    Edge-triggered `select.epoll()` (Linux): the kernel remembers the interest list and only
+    returns the descriptors that are ready, so a call costs O(ready), not O(registered).
+
+    Edge-triggered means an event is reported once, when a descriptor *becomes* ready. Every
+    descriptor is registered once for both reading and writing and never modified; in return
+    the server must read (and write) until EAGAIN, or remember to come back to it later.
+    """
+    edge_triggered = True
+
+    def __init__(self) -> None:
+        self.epoll = select.epoll()
+
+    def register(self, fd: int, events: int):
+        self.epoll.register(fd, select.EPOLLIN | select.EPOLLOUT | select.EPOLLET)
+
+    def modify(self, fd: int, events: int):
+        pass # Registered for both, once
+
+    def unregister(self, fd: int):
+        self.epoll.unregister(fd)
+
+    def poll(self, timeout: float = None) -> list[tuple[int, int]]:
+        ready = self.epoll.poll(-1 if timeout is None else timeout)
+        return [
+            (fd, (READ if mask & (select.EPOLLIN | select.EPOLLHUP | select.EPOLLERR) else 0) |
+                 (WRITE if mask & select.EPOLLOUT else 0))
+            for fd, mask in ready
+        ]
+
+    def close(self):
+        self.epoll.close()
+
+
+BACKENDS = {
+    "select": SelectBackend,
+    "poll": PollBackend,
+    "epoll": EpollBackend,
+}
+
+# The most scalable backend this platform has.
+DEFAULT_BACKEND = "epoll" if hasattr(select, "epoll") else "poll" if hasattr(select, "poll") else "select"
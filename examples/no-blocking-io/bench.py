@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import socket
+import selectors
+
+# Starting, stopping and measuring a server process works exactly as in the TCP chat's
+# benchmarks (examples/tcp/benchmark.py), and so does driving chat traffic through one,
+# so those helpers are shared rather than copied.
+# Appended, so this folder's own modules (e.g. server.py) still come first.
+TCP_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tcp")
+if TCP_DIRECTORY not in sys.path:
+    sys.path.append(TCP_DIRECTORY)
+
+from benchmark import wait_for_server, stop_server, process_stats, exchange
+
+
+def echo_load(port: int, clients: int, message_size: int, duration: float) -> list[float]:
+    """
+    Closed-loop echo: each client sends a message, waits for all of it to come back,
+    and repeats until the time is up. Returns every round trip's latency.
+    """
+    message = b"x" * message_size
+    selector = selectors.DefaultSelector()
+    for _ in range(clients):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ, data=[0, time.perf_counter()]) # [bytes echoed, sent at]
+        sock.send(message)
+
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        for key, _ in selector.select(timeout=1):
+            sock, state = key.fileobj, key.data
+            try:
+                data = sock.recv(65536)
+            except BlockingIOError:
+                continue
+            if not data:
+                raise RuntimeError("Server closed a connection")
+            state[0] += len(data)
+            if state[0] >= message_size:
+                now = time.perf_counter()
+                latencies.append(now - state[1])
+                state[0], state[1] = 0, now
+                sock.send(message)
+    for key in list(selector.get_map().values()):
+        key.fileobj.close()
+    selector.close()
+    return latencies
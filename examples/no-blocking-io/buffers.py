@@ -0,0 +1,36 @@
+from collections import deque
+
+class BufferPool():
+    """
+    A pool of reusable, preallocated receive buffers.
+
+    `recv(n)` allocates a new bytes object for every read. With `recv_into()` the kernel
+    copies straight into a buffer we already own, so a server can fill the same few
+    bytearrays over and over instead. Take one with `acquire()`, read into it (through
+    a memoryview, to slice it without copying) and give it back with `release()`.
+
+    A pool belongs to one event loop: acquire() and release() don't take a lock.
+    """
+    def __init__(self, buffer_size: int = 64 * 1024, max_free: int = 16) -> None:
+        """
+        :param buffer_size: Size of each buffer, i.e. the most one recv_into() can read.
+        :param max_free: How many released buffers to keep around for reuse.
+        """
+        self.buffer_size = buffer_size
+        self.max_free = max_free
+        self._free = deque()
+
+    def acquire(self) -> bytearray:
+        """
+        Returns a free buffer, allocating a new one if the pool is empty.
+        """
+        if self._free:
+            return self._free.pop()
+        return bytearray(self.buffer_size)
+
+    def release(self, buffer: bytearray):
+        """
+        Gives a buffer back. Nothing may still hold a memoryview of it.
+        """
+        if len(self._free) < self.max_free:
+            self._free.append(buffer)
@@ -0,0 +1,136 @@
+import os
+import sys
+import argparse
+import threading
+
+from selectors_server import Server, Protocol, Connection
+
+# The TCP chat's wire format is used from examples/tcp/framing.py itself, so the two chat
+# servers can't drift apart and the chat client can talk to this one unchanged. Appended,
+# so this folder's own modules (e.g. server.py) still come first.
+TCP_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tcp")
+if TCP_DIRECTORY not in sys.path:
+    sys.path.append(TCP_DIRECTORY)
+
+import framing
+from framing import frame, FORMAT
+
+HEADER = framing.LEGACY_HEADER
+DISCONNECT_MESSAGE = "!DISCONNECT"
+NEGOTIATE_MESSAGE = framing.NEGOTIATE_MESSAGE
+PING_MESSAGE = "!PING"
+PONG_MESSAGE = "!PONG"
+
+# The largest message accepted; a header announcing more (or a negative length) is a protocol error.
+MAX_MESSAGE_SIZE = framing.MAX_FRAME_SIZE
+
+
+class ChatRoom():
+    """
+    Everyone connected to one chat server: a message from one member goes to all the others.
+
+    Members are kept in an immutable set that is replaced (under a lock) when someone joins
+    or leaves, so a broadcast iterates it without locking even with several reactor threads.
+    """
+    def __init__(self) -> None:
+        self.members = frozenset()
+        self._lock = threading.Lock()
+
+    def join(self, member: "ChatProtocol"):
+        with self._lock:
+            self.members = self.members | {member}
+
+    def leave(self, member: "ChatProtocol"):
+        with self._lock:
+            self.members = self.members - {member}
+
+    def broadcast(self, sender: "ChatProtocol", message: str):
+        """Sends a message to every member but its sender, framed once for all of them."""
+        data = frame(message.encode(FORMAT))
+        for member in self.members:
+            if member is not sender:
+                member.transport.write(data)
+
+
+class ChatProtocol(Protocol):
+    """
+    The TCP chat server's protocol, on the selectors event loop: plain messages are broadcast
+    to everyone else in the room, "!DISCONNECT" hangs up and "!PING" is answered with "!PONG".
+
+    Only the legacy framing is spoken: a "!FRAMING" request is answered with "!FRAMING legacy".
+    Rooms (!SUBSCRIBE and friends) are only implemented by the threaded examples/tcp server.
+    """
+    def __init__(self, room: ChatRoom) -> None:
+        self.room = room
+        self.transport = None
+        # Received bytes that don't make up a whole message yet
+        self.buffer = bytearray()
+        self.first_message = True
+
+    def connection_made(self, transport: Connection):
+        self.transport = transport
+        self.room.join(self)
+        print(f"[S][NEW CONNECTION] {transport.addr} connected")
+        print(f"[S][ACTIVE CONNECTIONS] {len(self.room.members)}")
+
+    def data_received(self, data: memoryview):
+        self.buffer += data # A copy: the data is only ours during this call
+
+        # Handle every whole message, however TCP split or merged them
+        offset = 0
+        try:
+            while len(self.buffer) - offset >= HEADER and not self.transport.closing:
+                message_length = framing.parse_header(self.buffer[offset:offset + HEADER], framing.LEGACY, MAX_MESSAGE_SIZE)
+                end = offset + HEADER + message_length
+                if len(self.buffer) < end:
+                    break
+                self.message_received(self.buffer[offset + HEADER:end].decode(FORMAT))
+                offset = end
+        except ValueError as ve: # The header isn't a number, or the length is out of range
+            print(f"[S][PROTOCOL ERROR {self.transport.addr}] Invalid message length header: {ve}")
+            self.transport.close()
+        del self.buffer[:offset]
+
+    def message_received(self, message: str):
+        # A framing negotiation is only valid as the very first message.
+        first_message, self.first_message = self.first_message, False
+        if first_message and framing.parse_negotiation(message) is not None:
+            self.transport.write(frame(framing.negotiation_request(framing.LEGACY).encode(FORMAT)))
+            return
+
+        if message == PONG_MESSAGE:
+            return
+        if message == PING_MESSAGE:
+            self.transport.write(frame(PONG_MESSAGE.encode(FORMAT)))
+            return
+
+        print(f"[S][{self.transport.addr}] {message}")
+
+        if message == DISCONNECT_MESSAGE:
+            self.transport.close()
+            return
+
+        self.room.broadcast(self, message)
+
+    def connection_lost(self, exc: Exception | None):
+        self.room.leave(self)
+        if exc is not None:
+            print(f"[S][ERROR HANDLING {self.transport.addr}] {exc}")
+        print(f"[S][DISCONNECTED] {self.transport.addr} disconnected")
+        print(f"[S][ACTIVE CONNECTIONS] {len(self.room.members)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the TCP chat on the selectors event loop")
+    parser.add_argument("--host", default="0.0.0.0", help="Address to listen on. Defaults to 0.0.0.0.")
+    parser.add_argument("-p", "--port", type=int, default=9999, help="Port to listen on. Defaults to 9999, like the TCP chat.")
+    parser.add_argument("-r", "--reactors", type=int, default=1, help="Event loop threads. Defaults to 1.")
+    args = parser.parse_args()
+
+    room = ChatRoom()
+    Server(args.host, args.port, reactors=args.reactors, backlog=128,
+           protocol_factory=lambda: ChatProtocol(room)).start()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+
+from bench import TCP_DIRECTORY, wait_for_server, stop_server, exchange
+from chat_protocol import frame, FORMAT
+
+# Each server runs in its own process, with the same chat logic: legacy framing, and every
+# message broadcast to all the other clients.
+SERVERS = {
+    "threads": ("import sys; sys.path.insert(0, {tcp!r}); from server import Server; "
+                "Server(host='127.0.0.1', port={port}, slow_client_policy='block').start()"),
+    "reactor": ("from chat_protocol import ChatRoom, ChatProtocol; from selectors_server import Server; "
+                "room = ChatRoom(); "
+                "Server(port={port}, reactors={reactors}, backlog=1024, protocol_factory=lambda: ChatProtocol(room)).start()"),
+}
+
+
+def chat(port: int, clients: int, messages: int) -> tuple[float, int]:
+    """
+    Connect the clients, then have every one send its messages (pipelined) while reading
+    everyone else's. Returns the seconds until all messages were delivered, and how many
+    clients didn't receive everything.
+    """
+    traffic = [
+        b"".join(frame(f"[client{client}] message {i}".encode(FORMAT)) for i in range(messages))
+        for client in range(clients)
+    ]
+    total = sum(len(data) for data in traffic)
+
+    sockets = [socket.create_connection(("127.0.0.1", port)) for _ in range(clients)]
+    time.sleep(1) # Let the server register everyone before anyone talks
+
+    outgoing = dict(zip(sockets, traffic))
+    expected = {sock: total - len(data) for sock, data in outgoing.items()} # Everything but its own messages
+
+    started = time.perf_counter()
+    stalled = exchange(outgoing, expected, timeout=30)
+    elapsed = time.perf_counter() - started
+
+    for sock in sockets:
+        sock.close()
+    return elapsed, stalled
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chat throughput: thread-per-client TCP server vs. ChatProtocol on the selectors event loop")
+    parser.add_argument("-c", "--clients", type=int, nargs="+", default=[8, 32, 128], help="Client counts to try. Defaults to 8 32 128.")
+    parser.add_argument("-m", "--messages", type=int, default=100, help="Messages each client sends. Defaults to 100.")
+    parser.add_argument("-r", "--reactors", type=int, default=1, help="Event loop threads for the reactor server. Defaults to 1.")
+    parser.add_argument("-p", "--port", type=int, default=65200, help="Base port; each run gets its own. Defaults to 65200.")
+    args = parser.parse_args()
+
+    print(f"[*] Every client sends {args.messages} messages to all the others\n")
+    print(f"{'server':<8} {'clients':>7} {'time (s)':>9} {'msgs/s':>9} {'deliveries/s':>13}")
+    port = args.port
+    for clients in args.clients:
+        for name, command in SERVERS.items():
+            process = subprocess.Popen(
+                [sys.executable, "-c", command.format(tcp=TCP_DIRECTORY, port=port, reactors=args.reactors)],
+                cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_for_server(port)
+                elapsed, stalled = chat(port, clients, args.messages)
+            finally:
+                stop_server(process, port)
+            port += 1
+
+            if stalled:
+                print(f"{name:<8} {clients:>7} stalled: {stalled} clients did not receive everything")
+                continue
+            sent = clients * args.messages
+            print(f"{name:<8} {clients:>7} {elapsed:>9.2f} {sent / elapsed:>9.0f} {sent * (clients - 1) / elapsed:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
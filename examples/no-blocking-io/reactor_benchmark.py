@@ -0,0 +1,82 @@
+import os
+import sys
+import argparse
+import subprocess
+import multiprocessing
+
+from bench import wait_for_server, stop_server, echo_load
+
+
+def serve(mode: str, count: int, port: int):
+    """Run the selectors Server in this (child) process."""
+    from selectors_server import Server, serve_processes
+    if mode == "processes":
+        serve_processes(count, port=port, backlog=1024)
+    else:
+        Server(port=port, reactors=count, backlog=1024).start()
+
+
+def drive(port: int, clients: int, message_size: int, duration: float, results):
+    """Load generator process: runs the closed-loop echo and reports every round trip's latency."""
+    results.put(echo_load(port, clients, message_size, duration))
+
+
+def run(mode: str, count: int, port: int, args) -> dict:
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", mode, "--count", str(count), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(port)
+        results = multiprocessing.Queue()
+        drivers = [
+            multiprocessing.Process(target=drive, args=(port, args.clients // args.drivers, args.message_size, args.duration, results))
+            for _ in range(args.drivers)
+        ]
+        for driver in drivers:
+            driver.start()
+        latencies = sorted(latency for _ in drivers for latency in results.get(timeout=args.duration + 60))
+        for driver in drivers:
+            driver.join()
+    finally:
+        stop_server(process, port)
+
+    return {
+        "requests": len(latencies) / args.duration,
+        "mib": len(latencies) * args.message_size / args.duration / 2**20,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Echo throughput and latency of the selectors Server as reactors are added")
+    parser.add_argument("-r", "--reactors", type=int, nargs="+", default=[1, 2, 4], help="Reactor counts to try. Defaults to 1 2 4.")
+    parser.add_argument("-m", "--modes", nargs="+", choices=["threads", "processes"], default=["threads", "processes"])
+    parser.add_argument("-c", "--clients", type=int, default=64, help="Concurrent clients. Defaults to 64.")
+    parser.add_argument("-s", "--message-size", type=int, default=512, help="Bytes per echo. Defaults to 512.")
+    parser.add_argument("-t", "--duration", type=float, default=5.0, help="Seconds per run. Defaults to 5.")
+    parser.add_argument("-d", "--drivers", type=int, default=max(1, os.cpu_count() // 2), help="Load generating processes.")
+    parser.add_argument("-p", "--port", type=int, default=65400, help="Base port; each run gets its own. Defaults to 65400.")
+    # Internal: run a server in this process (used for the child processes).
+    parser.add_argument("--serve", choices=["threads", "processes"], help=argparse.SUPPRESS)
+    parser.add_argument("--count", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.count, args.port)
+        return
+
+    print(f"[*] {os.cpu_count()} CPUs, {args.clients} clients echoing {args.message_size} bytes, {args.duration:.0f}s per run\n")
+    print(f"{'mode':<10} {'reactors':>8} {'echoes/s':>10} {'MiB/s':>7} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    port = args.port
+    for mode in args.modes:
+        for count in args.reactors:
+            result = run(mode, count, port, args)
+            port += 1
+            print(f"{mode:<10} {count:>8} {result['requests']:>10.0f} {result['mib']:>7.1f} "
+                  f"{result['p50'] * 1000:>9.2f} {result['p99'] * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
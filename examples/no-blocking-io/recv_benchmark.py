@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import selectors
+import subprocess
+
+from bench import wait_for_server, stop_server
+
+
+def legacy_select_read(self, fd: int):
+    """The select Server's old read path: one recv(1024), a new bytes object, per event."""
+    try:
+        data = self.sockets[fd].recv(1024)
+        if data:
+            print(f"Received {len(data)} bytes from {self.addresses[fd]}")
+            self.echo(fd, data)
+        else:
+            self.close(fd)
+    except BlockingIOError:
+        pass
+    except Exception as e:
+        print(f"Error handling client data: {e}")
+        self.close(fd)
+
+
+def legacy_reactor_read(self, state):
+    """The selectors Server's old read path: one recv(1024), a new bytes object, per event."""
+    try:
+        data = state.socket.recv(1024)
+        if data:
+            print(f"Received {len(data)} bytes from {state.addr}")
+            state.protocol.data_received(data)
+            self.update_events(state)
+        else:
+            self.close(state.socket)
+    except BlockingIOError:
+        pass
+    except Exception as e:
+        print(f"Error handling client data: {e}")
+        self.close(state.socket, e)
+
+
+def serve(server_name: str, path: str, read_size: int, port: int):
+    """Run one of the servers in this (child) process, with the old or the new read path."""
+    if server_name == "select":
+        from server import Server
+        if path == "legacy":
+            Server.read = legacy_select_read
+        Server(port=port, read_size=read_size, backend="select").start()
+    else:
+        from selectors_server import Server, Reactor
+        if path == "legacy":
+            Reactor.read = legacy_reactor_read
+        Server(port=port, read_size=read_size).start()
+
+
+def transfer(port: int, clients: int, total_bytes: int, write_size: int) -> float:
+    """
+    Every client writes `total_bytes` in `write_size` chunks while reading the echo back.
+    Returns the seconds until all of it has come back.
+    """
+    chunk = memoryview(b"x" * write_size)
+    selector = selectors.DefaultSelector()
+    state = {}
+    for _ in range(clients):
+        sock = socket.create_connection(("127.0.0.1", port))
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        state[sock] = {"to_send": total_bytes, "to_receive": total_bytes, "pending": chunk[:0]}
+
+    buffer = bytearray(1024 * 1024)
+    started = time.perf_counter()
+    remaining = clients
+    while remaining:
+        events = selector.select(timeout=30)
+        if not events:
+            raise RuntimeError("Transfer stalled")
+        for key, mask in events:
+            sock, client = key.fileobj, state[key.fileobj]
+            if mask & selectors.EVENT_WRITE:
+                if not client["pending"]:
+                    client["pending"] = chunk[:min(write_size, client["to_send"])]
+                    client["to_send"] -= len(client["pending"])
+                try:
+                    sent = sock.send(client["pending"])
+                    client["pending"] = client["pending"][sent:]
+                except BlockingIOError:
+                    pass
+                if not client["pending"] and not client["to_send"]:
+                    selector.modify(sock, selectors.EVENT_READ)
+            if mask & selectors.EVENT_READ:
+                try:
+                    size = sock.recv_into(buffer)
+                except BlockingIOError:
+                    continue
+                if not size:
+                    raise RuntimeError("Server closed a connection")
+                client["to_receive"] -= size
+                if not client["to_receive"]:
+                    selector.unregister(sock)
+                    remaining -= 1
+    elapsed = time.perf_counter() - started
+    for sock in state:
+        sock.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk echo throughput of the old recv(1024) and the new pooled recv_into read paths")
+    parser.add_argument("-c", "--clients", type=int, default=4, help="Concurrent clients. Defaults to 4.")
+    parser.add_argument("-b", "--megabytes", type=int, default=64, help="MiB each client sends. Defaults to 64.")
+    parser.add_argument("-w", "--write-size", type=int, default=1024 * 1024, help="Bytes per client write. Defaults to 1 MiB.")
+    parser.add_argument("-r", "--read-sizes", type=int, nargs="+", default=[4096, 65536, 262144],
+                        help="Pooled buffer sizes to try. Defaults to 4096 65536 262144.")
+    parser.add_argument("-p", "--port", type=int, default=65300, help="Base port; each run gets its own. Defaults to 65300.")
+    # Internal: run a server in this process (used for the child processes).
+    parser.add_argument("--serve", choices=["select", "selectors"], help=argparse.SUPPRESS)
+    parser.add_argument("--path", choices=["legacy", "pooled"], default="pooled", help=argparse.SUPPRESS)
+    parser.add_argument("--read-size", type=int, default=65536, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.path, args.read_size, args.port)
+        return
+
+    runs = [(server_name, "legacy", 1024) for server_name in ("select", "selectors")]
+    runs += [(server_name, "pooled", size) for server_name in ("select", "selectors") for size in args.read_sizes]
+    runs.sort(key=lambda run: run[0])
+
+    total_bytes = args.megabytes * 2**20
+    print(f"[*] {args.clients} clients each echoing {args.megabytes} MiB in {args.write_size}-byte writes\n")
+    print(f"{'server':<10} {'read path':<22} {'time (s)':>9} {'MiB/s':>8}")
+    for index, (server_name, path, read_size) in enumerate(runs):
+        port = args.port + index
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--serve", server_name, "--path", path,
+             "--read-size", str(read_size), "--port", str(port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_server(port)
+            elapsed = transfer(port, args.clients, total_bytes, args.write_size)
+        finally:
+            stop_server(process, port)
+        description = "recv(1024)" if path == "legacy" else f"recv_into({read_size}) pool"
+        print(f"{server_name:<10} {description:<22} {elapsed:>9.2f} {args.clients * total_bytes / 2**20 / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,203 @@
 import sys
+import signal
 import socket
+import itertools
 import selectors
+import threading
+import multiprocessing
+from collections import deque
 
-class Server():
+from buffers import BufferPool
+
+class Protocol():
     """
-    A non-blocking TCP server that handles multiple clients concurrently
-    using the modern `selectors` module for efficient I/O multiplexing.
+    What the server does with a connection. Subclass it and override the callbacks you need;
+    the server creates one protocol object per client and calls them from its event loop:
+
+      * `connection_made(transport)`: the client connected. Keep the transport to reply with.
+      * `data_received(data)`: bytes arrived, as a memoryview of the server's receive buffer.
+        It is only valid during the call, so copy whatever you need to keep (e.g. `bytes(data)`).
+      * `eof_received()`: the client closed its side. The connection is closed once
+        everything written to it has been sent.
+      * `connection_lost(exc)`: the connection is closed; `exc` is the error, or None.
+
+    Callbacks must not block: they run on the event loop that serves every other client too.
     """
-    DEFAULT_HOST = '127.0.0.1'
-    DEFAULT_PORT = 65432
+    def connection_made(self, transport: "Connection"):
+        pass
+
+    def data_received(self, data: memoryview):
+        pass
+
+    def eof_received(self):
+        pass
+
+    def connection_lost(self, exc: Exception | None):
+        pass
+
+
+class EchoProtocol(Protocol):
+    """
+    Sends everything back to the client that sent it.
+    """
+    def connection_made(self, transport: "Connection"):
+        self.transport = transport
+
+    def data_received(self, data: memoryview):
+        self.transport.write(data)
+
 
-    def __init__(self, host: str = None, port: int = None) -> None:
+class Connection():
+    """
+    Per-client state, stored as the `data` of the client's selector key. It is also the
+    protocol's transport: protocols reply with `write()` and hang up with `close()`.
+    """
+    def __init__(self, reactor: "Reactor", sock: socket.socket, addr, protocol: Protocol) -> None:
+        self.reactor = reactor
+        self.socket = sock
+        self.addr = addr
+        self.protocol = protocol
+
+        # Bytes waiting to be sent. A non-blocking send() only takes what fits in the
+        # kernel's send buffer; the rest waits here until the socket is writable again.
+        self.outbound = bytearray()
+
+        # True while we've stopped reading because `outbound` grew past the high watermark.
+        self.reading_paused = False
+
+        # Set by close() while `outbound` still has to be sent, and once the socket is closed.
+        self.closing = False
+        self.closed = False
+
+    def write(self, data):
         """
-        Initializes the server with a host, port, and a selector object.
+        Sends data to the client without blocking: whatever the socket doesn't take right now
+        is buffered and sent when it becomes writable. Safe to call from any thread.
         """
-        self.socket = None
+        if not self.reactor.in_loop():
+            # Another reactor's protocol (e.g. a chat message from a client on another thread)
+            self.reactor.call_soon(self.write, bytes(data))
+            return
+        if self.closing:
+            return
+        self.reactor.send(self, data)
+
+    def close(self):
+        """
+        Closes the connection once everything written so far has been sent. Safe to call from any thread.
+        """
+        if not self.reactor.in_loop():
+            self.reactor.call_soon(self.close)
+            return
+        if self.closing:
+            return
+        self.closing = True
+        if self.outbound:
+            self.reactor.update_events(self) # Stop reading; write() closes it when drained
+        else:
+            self.reactor.close(self.socket)
+
+
+class Reactor():
+    """
+    One event loop: a selector and the client sockets registered with it.
+
+    A Server runs a single reactor by default. In multi-reactor mode, each reactor runs in
+    its own thread and the acceptor hands it new connections through `hand_over()`.
+    """
+    def __init__(self, protocol_factory=EchoProtocol,
+                 high_watermark: int = 64 * 1024, low_watermark: int = 16 * 1024,
+                 read_size: int = 64 * 1024, reads_per_event: int = 16) -> None:
+        """
+        A client that sends faster than it reads would make its outbound buffer grow without
+        limit, so once the buffer holds `high_watermark` bytes we stop reading from that client,
+        and start again when it has drained below `low_watermark`.
 
+        Reads go into pooled `read_size` buffers. On each read event we keep reading until the
+        socket has nothing more (EAGAIN), but at most `reads_per_event` times, so one busy
+        client can't keep the loop from serving the others.
+        """
         # Object for monitoring all sockets
         self.selector = selectors.DefaultSelector()
 
-        self.host = host if host else self.DEFAULT_HOST
-        self.port = port if port else self.DEFAULT_PORT
+        # Called with no arguments to create each new connection's Protocol
+        self.protocol_factory = protocol_factory
 
-    def start(self):
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+
+        self.pool = BufferPool(read_size)
+        self.reads_per_event = reads_per_event
+
+        # The listening socket, when this reactor accepts connections itself.
+        self.listener = None
+
+        # The thread running the loop, once it runs.
+        self.thread_id = None
+
+        # Work handed over by other threads, and a socket pair to wake up select() when
+        # some arrives (selectors can only wait on file descriptors).
+        self.callbacks = deque()
+        self.wakeup_receiver, self.wakeup_sender = socket.socketpair()
+        self.wakeup_receiver.setblocking(False)
+        self.wakeup_sender.setblocking(False)
+        self.selector.register(self.wakeup_receiver, selectors.EVENT_READ)
+
+    def listen_on(self, sock: socket.socket):
         """
-        Sets up and starts the non-blocking server.
+        Accept new connections from this listening socket in this reactor's loop.
         """
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.socket.setblocking(False)
+        self.listener = sock
+        # Register the main server socket with the selector for read events.
+        # This tells the selector to notify when a new connection is ready to be accepted.
+        self.selector.register(sock, selectors.EVENT_READ)
 
-        self.addr = (self.host, self.port)
+    def in_loop(self) -> bool:
+        """
+        True when called from this reactor's own thread (or before it runs).
+        """
+        return self.thread_id is None or self.thread_id == threading.get_ident()
 
+    def call_soon(self, callback, *args):
+        """
+        Runs `callback(*args)` in this reactor's loop. Safe to call from any thread.
+        """
+        self.callbacks.append((callback, args))
         try:
-            self.socket.bind(self.addr)
-        except socket.error as error:
-            print(f"Bind failed. \nError Code: {str(error[0])} \nMessage: {str(error[1])}")
-            sys.exit()
+            self.wakeup_sender.send(b'\0')
+        except BlockingIOError:
+            pass # The wakeup pipe is full, so a wakeup is already pending
 
-        self.socket.listen(5)
-        # Register the main server socket with the selector for read events.
-        # This tells the selector to notify when a new connection is ready to be accepted.
-        self.selector.register(self.socket, selectors.EVENT_READ)
-        
-        print(f"Server listening on {self.host}:{self.port}")
+    def hand_over(self, conn: socket.socket, addr):
+        """
+        Give this reactor a newly accepted connection. Safe to call from any thread.
+        """
+        self.call_soon(self.register, conn, addr)
 
-        # The main event loop
+    def run(self):
+        """
+        The event loop: runs forever in the calling thread.
+        """
+        self.thread_id = threading.get_ident()
         while True:
             # selector.select() blocks until one or more registered sockets have a pending event.
             events = self.selector.select(timeout=None)
             for key, mask in events:
                 sock = key.fileobj
                 # If the ready socket is our main server socket, it means a new client is connecting.
-                if sock is self.socket:
+                if sock is self.listener:
                     self.accept(sock)
-                # Otherwise, it's an existing client socket with data to be read.
-                else:
-                    self.read(sock)
+                    continue
+                # Another thread handed us some work.
+                if sock is self.wakeup_receiver:
+                    self.run_callbacks()
+                    continue
+
+                # Otherwise, it's an existing client socket that is ready to be written to and/or read from.
+                if mask & selectors.EVENT_WRITE:
+                    self.write(key.data)
+                if mask & selectors.EVENT_READ and not key.data.closed: # write() may have closed it
+                    self.read(key.data)
 
     def accept(self, sock: socket.socket):
         """
@@ -65,43 +207,264 @@ class Server():
             # accept() returns a new socket object for the client and its address.
             conn, addr = sock.accept()
             print(f"Accepted connection from {addr}")
-            
-            # The new client socket must be set to non-blocking
-            conn.setblocking(False)
-            
-            # Register the *new* client socket for read events.
-            self.selector.register(conn, selectors.EVENT_READ)
+            self.register(conn, addr)
         except Exception as e:
             print(f"Error accepting connection: {e}")
 
-    def read(self, conn: socket.socket):
+    def run_callbacks(self):
         """
-        Reads data from a client socket and echoes it back. Handles client disconnections.
+        Runs the work handed over since the last wakeup.
         """
         try:
-            # Attempt to receive data from the client
-            data = conn.recv(1024)
-            if data:
-                message = data.decode()
-                print(f"Received message: {message}")
+            while self.wakeup_receiver.recv(4096):
+                pass
+        except BlockingIOError:
+            pass # Drained
+        while self.callbacks:
+            callback, args = self.callbacks.popleft()
+            callback(*args)
+
+    def register(self, conn: socket.socket, addr):
+        # The new client socket must be set to non-blocking
+        conn.setblocking(False)
 
-                # Echo the message back to the client
-                conn.sendall(data)
-            else:
-                # An empty recv result means the client has closed the connection gracefully.
-                print(f"Closing connection from {conn.getpeername()}")
+        # Register the *new* client socket for read events, with its own state and protocol.
+        state = Connection(self, conn, addr, self.protocol_factory())
+        self.selector.register(conn, selectors.EVENT_READ, data=state)
+        state.protocol.connection_made(state)
 
-                # Unregister the socket from the selector
-                self.selector.unregister(conn)
+    def read(self, state: Connection):
+        """
+        Reads data from a client socket and hands it to the protocol. Handles client disconnections.
+        """
+        conn = state.socket
+        buffer = self.pool.acquire()
+        received = 0
+        try:
+            with memoryview(buffer) as view:
+                for _ in range(self.reads_per_event):
+                    # Attempt to receive data from the client, straight into our buffer
+                    try:
+                        size = conn.recv_into(view)
+                    except BlockingIOError:
+                        # Nothing more to read for now. Expected and safe in non-blocking code.
+                        break
+                    if not size:
+                        # An empty recv result means the client has closed the connection gracefully.
+                        print(f"Closing connection from {state.addr}")
+                        state.protocol.eof_received()
+                        state.close()
+                        return
 
-                conn.close()
+                    received += size
+                    # The protocol gets a view of the buffer, so nothing is copied unless it keeps the data.
+                    state.protocol.data_received(view[:size])
+                    if state.closing or len(state.outbound) >= self.high_watermark:
+                        break # Closing, or the client isn't keeping up: stop reading until it drains
 
-        except BlockingIOError:
-            # This is an expected and safe error to ignore in non-blocking code.
-            pass
         except Exception as e:
             # Handle any other errors and clean up the socket.
             print(f"Error handling client data: {e}")
+            self.close(conn, e)
+            return
+        finally:
+            self.pool.release(buffer)
+
+        if received:
+            print(f"Received {received} bytes from {state.addr}")
+        self.update_events(state)
+
+    def send(self, state: Connection, data):
+        """
+        Sends `data` to the client: as much as the socket takes right now, straight from the
+        caller's buffer, and the rest into the outbound buffer.
+        Never sendall() here, it would block the whole event loop on one slow reader.
+        """
+        if state.closed:
+            return
+        if not state.outbound: # Otherwise the new data has to wait its turn
+            try:
+                sent = state.socket.send(data)
+                data = data[sent:]
+            except BlockingIOError:
+                pass
+            except Exception as e:
+                print(f"Error sending to client {state.addr}: {e}")
+                self.close(state.socket, e)
+                return
+        if data:
+            state.outbound += data
+            self.update_events(state)
+
+    def write(self, state: Connection):
+        """
+        Sends as much of the client's outbound buffer as the socket accepts.
+        """
+        try:
+            if state.outbound:
+                sent = state.socket.send(state.outbound)
+                del state.outbound[:sent]
+        except BlockingIOError:
+            pass # The send buffer is full after all; wait for EVENT_WRITE
+        except Exception as e:
+            print(f"Error sending to client {state.addr}: {e}")
+            self.close(state.socket, e)
+            return
+        if state.closing and not state.outbound:
+            self.close(state.socket)
+            return
+        self.update_events(state)
+
+    def update_events(self, state: Connection):
+        """
+        Updates which events we wait for: EVENT_WRITE only while something is left to send,
+        and EVENT_READ only while the outbound buffer is below the watermarks.
+        """
+        if state.closed:
+            return
+        pending = len(state.outbound)
+        if not state.reading_paused and pending >= self.high_watermark:
+            state.reading_paused = True
+        elif state.reading_paused and pending <= self.low_watermark:
+            state.reading_paused = False
+
+        reading = not (state.reading_paused or state.closing)
+        events = (selectors.EVENT_READ if reading else 0) | (selectors.EVENT_WRITE if pending else 0)
+        if events != self.selector.get_key(state.socket).events:
+            self.selector.modify(state.socket, events, data=state)
+
+    def close(self, conn: socket.socket, exc: Exception = None):
+        """
+        Unregisters a client socket from the selector, closes it and tells its protocol.
+        """
+        try:
+            state = self.selector.unregister(conn).data
+        except (KeyError, ValueError):
+            return # Already unregistered
+        conn.close()
+        state.closing = state.closed = True
+        state.protocol.connection_lost(exc)
+
+
+class Server():
+    """
+    A non-blocking TCP server that handles multiple clients concurrently
+    using the modern `selectors` module for efficient I/O multiplexing.
+
+    What it does with each client is up to its protocol (see Protocol); by default it
+    echoes everything back.
+
+    With `reactors` > 1 it runs one Reactor (selector loop) per thread, and the main
+    thread only accepts connections and hands them to the reactors in turn. Threads
+    share the GIL, so this spreads the waiting rather than the Python work; to use
+    several cores, run several processes on one port with `serve_processes()`.
+    """
+    DEFAULT_HOST = '127.0.0.1'
+    DEFAULT_PORT = 65432
+
+    def __init__(self, host: str = None, port: int = None,
+                 high_watermark: int = 64 * 1024, low_watermark: int = 16 * 1024,
+                 reactors: int = 1, reuse_port: bool = False, backlog: int = 5,
+                 read_size: int = 64 * 1024, reads_per_event: int = 16,
+                 protocol_factory=EchoProtocol) -> None:
+        """
+        Initializes the server with a host, port, and its reactors.
+
+        :param reactors: Number of event loops (threads); 1 runs everything in the calling thread.
+        :param reuse_port: Set SO_REUSEPORT, so several processes can listen on the same port.
+        :param backlog: How many connections may wait to be accepted.
+        :param read_size: Size of the pooled receive buffers, i.e. the most read in one go.
+        :param reads_per_event: How many reads to do per read event before moving on.
+        :param protocol_factory: A Protocol subclass, or any callable returning a new protocol object.
+        """
+        self.socket = None
+
+        self.host = host if host else self.DEFAULT_HOST
+        self.port = port if port else self.DEFAULT_PORT
+
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+
+        self.reactors = [
+            Reactor(protocol_factory, high_watermark, low_watermark, read_size, reads_per_event)
+            for _ in range(reactors)
+        ]
+        # Object for monitoring all sockets (of the first reactor, the only one by default)
+        self.selector = self.reactors[0].selector
+
+    def start(self):
+        """
+        Sets up and starts the non-blocking server.
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if self.reuse_port:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        self.addr = (self.host, self.port)
+
+        try:
+            self.socket.bind(self.addr)
+        except socket.error as error:
+            print(f"Bind failed. \nError: {error}")
+            sys.exit()
+
+        self.socket.listen(self.backlog)
+        print(f"Server listening on {self.host}:{self.port} ({len(self.reactors)} reactor(s))")
+
+        if len(self.reactors) == 1:
+            # One event loop does everything, in this thread.
+            self.socket.setblocking(False)
+            self.reactors[0].listen_on(self.socket)
+            self.reactors[0].run()
+            return
+
+        for index, reactor in enumerate(self.reactors):
+            threading.Thread(target=reactor.run, name=f"reactor-{index}", daemon=True).start()
+
+        # The acceptor: a blocking accept() loop handing connections to the reactors round-robin.
+        for reactor in itertools.cycle(self.reactors):
+            try:
+                conn, addr = self.socket.accept()
+            except OSError as e:
+                print(f"Error accepting connection: {e}")
+                break
+            print(f"Accepted connection from {addr}")
+            reactor.hand_over(conn, addr)
+
+
+def serve_processes(workers: int, host: str = None, port: int = None, **options):
+    """
+    Runs `workers` server processes, each with its own listening socket on the same port
+    (SO_REUSEPORT) and its own reactor(s); the kernel spreads new connections between them.
+    Blocks until interrupted (Ctrl-C or SIGTERM), then stops the processes.
+    """
+    processes = [
+        multiprocessing.Process(target=_serve_process, args=(host, port, options), daemon=True)
+        for _ in range(workers)
+    ]
+    # SIGTERM leaves through the same cleanup as Ctrl-C, so the processes don't outlive us.
+    previous_handler = signal.signal(signal.SIGTERM, _stop)
+    try:
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            if process.pid is not None:
+                process.terminate()
+        for process in processes:
+            if process.pid is not None:
+                process.join()
+        signal.signal(signal.SIGTERM, previous_handler)
+
+
+def _stop(signum, frame):
+    raise SystemExit(0)
+
 
-            self.selector.unregister(conn)
-            conn.close()
\ No newline at end of file
+def _serve_process(host, port, options):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL) # terminate() just stops a server process
+    Server(host, port, reuse_port=True, **options).start()
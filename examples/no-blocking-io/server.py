@@ -1,19 +1,34 @@
 import sys
 import socket
-import select
+
+from buffers import BufferPool
+from backends import BACKENDS, DEFAULT_BACKEND, READ, WRITE
 
 class Server():
     """
     A simple non-blocking TCP server that handles multiple clients
     concurrently using the `select` module for I/O multiplexing.
+
+    The multiplexing call is up to its backend (see backends.py): `select.select()`,
+    `select.poll()` or edge-triggered `select.epoll()`, the default where available.
     """
     DEFAULT_HOST = '127.0.0.1'
     DEFAULT_PORT = 65432
 
-    def __init__(self, host: str = None, port: int = None) -> None:
+    def __init__(self, host: str = None, port: int = None,
+                 read_size: int = 64 * 1024, reads_per_event: int = 16,
+                 backend: str = DEFAULT_BACKEND, backlog: int = 5) -> None:
         """
         Initializes the server with a host and port.
+
+        :param read_size: Size of the pooled receive buffers, i.e. the most read in one go.
+        :param reads_per_event: How many reads to do for a readable socket before moving on.
+        :param backend: "select", "poll" or "epoll" (edge-triggered).
+        :param backlog: How many connections may wait to be accepted.
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+        
         # Main server socket for listening to new connections
         self.socket = None
         
@@ -21,8 +36,27 @@ class Server():
         self.host = host if host else self.DEFAULT_HOST
         self.port = port if port else self.DEFAULT_PORT
         
-        # A list of all sockets we are monitoring for incoming data
-        self.inputs = []
+        self.backlog = backlog
+
+        # Waits for events on the sockets we monitor
+        self.backend = BACKENDS[backend]()
+
+        # All the sockets we are monitoring, and the clients' addresses, by file descriptor
+        # (the backends report descriptors; dicts make adding and removing one O(1)).
+        self.sockets = {}
+        self.addresses = {}
+
+        # Echoed data a client socket couldn't take yet, by file descriptor. While a socket
+        # has some, we wait for it to become writable instead of reading more from it.
+        self.outbound = {}
+
+        # Edge-triggered backends report a socket once when data arrives, not while data is
+        # left. Sockets we stopped reading early are kept here, to read again without an event.
+        self.unread = set()
+
+        # Reusable receive buffers, filled with recv_into() instead of allocating on each recv()
+        self.pool = BufferPool(read_size)
+        self.reads_per_event = reads_per_event
 
     def start(self):
         """
@@ -41,56 +75,167 @@ class Server():
             self.socket.bind(self.addr)
         except socket.error as error:
             # Gracefully handle a bind error (e.g., port already in use)
-            print(f"Bind failed. \nError Code: {str(error[0])} \nMessage: {str(error[1])}")
+            print(f"Bind failed. \nError: {error}")
             sys.exit()
         
-        # Put the socket in a listening state, with a backlog of 5 pending connections
-        self.socket.listen(5)
+        # Put the socket in a listening state, with a backlog of pending connections
+        self.socket.listen(self.backlog)
 
-        # Add the main server socket to the list of inputs to be monitored by `select`
-        self.inputs.append(self.socket)
+        # Add the main server socket to the sockets monitored by the backend
+        self.sockets[self.socket.fileno()] = self.socket
+        self.backend.register(self.socket.fileno(), READ)
 
-        print(f"Server listening on {self.host}:{self.port}")
+        print(f"Server listening on {self.host}:{self.port} ({type(self.backend).__name__})")
         
         # The main event loop
-        while self.inputs:
-            # `select.select()` polls the list of sockets to see which are "ready"
-            # It blocks until one or more sockets are readable, writable, or in an error state.
-            # We are only interested in sockets with incoming data, so we use empty lists for write and error.
-            readable, _, _ = select.select(self.inputs, [], [])
-            
-            # Iterate through the list of sockets that are ready to be read from
-            for s in readable:
-                # If the ready socket is our main server socket, it means a new client is connecting
+        while self.sockets:
+            # The backend blocks until one or more sockets are readable or writable, and
+            # returns just those. We read from the sockets that have nothing waiting to be
+            # sent, and wait for the others to become writable. (If some sockets still have
+            # unread data, it only checks for events and returns straight away.)
+            events = self.backend.poll(0 if self.unread else None)
+
+            for fd, mask in events:
+                s = self.sockets.get(fd)
+                if s is None:
+                    continue # Closed while handling an earlier event
+
+                # If the ready socket is our main server socket, it means new clients are connecting
                 if s is self.socket:
-                    # Accept the new connection
-                    client_socket, client_addr = s.accept()
-                    print(f"Accepted connection from {client_addr}")
-                    
-                    # Set the new client socket to non-blocking and add it to our monitored list
-                    client_socket.setblocking(False)
-                    self.inputs.append(client_socket)
-                
+                    self.accept()
+                    continue
+
+                if mask & WRITE:
+                    self.write(fd)
                 # If the ready socket is a client socket, it means there is data to be read
-                else:
+                if mask & READ and fd in self.sockets:
+                    self.read(fd)
+
+            # Carry on with the sockets we stopped reading early
+            for fd in list(self.unread):
+                if fd in self.unread: # Not closed meanwhile
+                    self.read(fd)
+
+    def accept(self):
+        """
+        Accepts every pending connection and starts monitoring the new client sockets.
+        """
+        while True:
+            try:
+                # Accept the new connection
+                client_socket, client_addr = self.socket.accept()
+            except BlockingIOError:
+                return # No more pending connections
+            except OSError as e:
+                print(f"Error accepting connection: {e}")
+                return
+            print(f"Accepted connection from {client_addr}")
+
+            # Set the new client socket to non-blocking and add it to our monitored sockets
+            client_socket.setblocking(False)
+            fd = client_socket.fileno()
+            try:
+                self.backend.register(fd, READ)
+            except ValueError as e: # select() can't watch this many sockets
+                print(f"Refusing connection from {client_addr}: {e}")
+                client_socket.close()
+                continue
+            self.sockets[fd] = client_socket
+            self.addresses[fd] = client_addr
+
+    def read(self, fd: int):
+        """
+        Reads everything a client has sent (until EAGAIN) and echoes it back.
+        """
+        self.unread.discard(fd)
+        if fd in self.outbound:
+            return # Paused until the client has taken what we owe it; write() resumes it
+
+        s = self.sockets[fd]
+        buffer = self.pool.acquire()
+        received = 0
+        try:
+            with memoryview(buffer) as view:
+                for _ in range(self.reads_per_event):
                     try:
-                        # Read data from the client
-                        data = s.recv(1024)
-                        if data:
-                            # If data is received, print it and echo it back to the client
-                            print(f"Received data: {data.decode('utf-8')}")
-                            s.send(data)
-                        else:
-                            # An empty `recv` result indicates a client has closed the connection
-                            print(f"Closing connection from {s.getpeername()}")
-                            # Clean up the closed connection from our list and close the socket
-                            self.inputs.remove(s)
-                            s.close()
+                        # Read data from the client, straight into our buffer
+                        size = s.recv_into(view)
                     except BlockingIOError:
-                        # This can sometimes occur due to a race condition. It's safe to just pass.
-                        pass
-                    except Exception as e:
-                        # Handle any other unexpected errors on a client socket
-                        print(f"Error handling client data: {e}")
-                        self.inputs.remove(s)
-                        s.close()
\ No newline at end of file
+                        # Nothing more to read for now. It's safe to just stop.
+                        break
+                    if not size:
+                        # An empty `recv` result indicates a client has closed the connection
+                        print(f"Closing connection from {self.addresses[fd]}")
+                        self.close(fd)
+                        return
+
+                    received += size
+                    # Echo it back to the client, sending from the buffer without copying it
+                    self.echo(fd, view[:size])
+                    if fd in self.outbound:
+                        break # The client isn't keeping up; wait until it can take more
+                else:
+                    # Stopped with data possibly left: a level-triggered backend will report
+                    # the socket again, an edge-triggered one won't.
+                    if self.backend.edge_triggered:
+                        self.unread.add(fd)
+        except Exception as e:
+            # Handle any other unexpected errors on a client socket
+            print(f"Error handling client data: {e}")
+            self.close(fd)
+            return
+        finally:
+            self.pool.release(buffer)
+
+        if received:
+            print(f"Received {received} bytes from {self.addresses[fd]}")
+
+    def echo(self, fd: int, data: memoryview):
+        """
+        Sends as much of `data` as the socket takes right now, and keeps the rest for later.
+        """
+        try:
+            sent = self.sockets[fd].send(data)
+        except BlockingIOError:
+            sent = 0
+        if sent < len(data):
+            self.outbound[fd] = bytearray(data[sent:])
+            # Stop reading, and wait for the socket to become writable
+            self.backend.modify(fd, WRITE)
+
+    def write(self, fd: int):
+        """
+        Sends what is waiting for a writable client socket.
+        """
+        pending = self.outbound.get(fd)
+        if not pending:
+            return # Edge-triggered backends report writable sockets we owe nothing
+        try:
+            # Until the socket can't take any more: an edge-triggered backend only reports
+            # the socket again when it *becomes* writable.
+            while pending:
+                sent = self.sockets[fd].send(pending)
+                del pending[:sent]
+        except BlockingIOError:
+            return
+        except Exception as e:
+            print(f"Error sending to client: {e}")
+            self.close(fd)
+            return
+        # All sent: read from the client again
+        del self.outbound[fd]
+        self.backend.modify(fd, READ)
+        if self.backend.edge_triggered:
+            self.unread.add(fd) # Whatever arrived meanwhile raised no new event
+
+    def close(self, fd: int):
+        """
+        Stops monitoring a client socket and closes it.
+        """
+        # Clean up the closed connection from our dicts and close the socket
+        self.backend.unregister(fd)
+        s = self.sockets.pop(fd)
+        self.addresses.pop(fd, None)
+        self.outbound.pop(fd, None)
+        self.unread.discard(fd)
+        s.close()
@@ -0,0 +1,135 @@
+import ssl
+from functools import lru_cache
+
+
+class BannerProbe:
+    """
+    A request sent to a "client speaks first" service right after connecting,
+    so it answers immediately instead of the scanner waiting out the banner timeout.
+    """
+
+    def __init__(self, name: str, ports: set[int], build, describe):
+        """
+        :param name: Short probe name (e.g. "http").
+        :param ports: Ports this probe is sent to straight away (the port hints).
+        :param build: Callable taking the target IP and returning the request bytes.
+        :param describe: Callable taking the response bytes and returning a short
+                         banner if it recognises the protocol, else None.
+        """
+        self.name = name
+        self.ports = ports
+        self.build = build
+        self.describe = describe
+
+
+# --- HTTP --------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def build_http_head(target_ip: str) -> bytes:
+    """A minimal HEAD request. HTTP/1.0 makes the server close the connection afterwards."""
+    return f"HEAD / HTTP/1.0\r\nHost: {target_ip}\r\nUser-Agent: port-scanner\r\n\r\n".encode()
+
+
+def describe_http(response: bytes) -> str | None:
+    """Summarise an HTTP response as its status line plus the Server header, if any."""
+    if not response.startswith(b"HTTP/"):
+        return None
+    lines = response.decode("utf-8", errors="ignore").split("\r\n")
+    banner = lines[0].strip()
+    for line in lines[1:]:
+        if line.lower().startswith("server:"):
+            banner += f" | {line.strip()}"
+            break
+    return banner
+
+
+# --- TLS ---------------------------------------------------------------------
+
+@lru_cache(maxsize=None)
+def build_tls_client_hello(target_ip: str = None) -> bytes:
+    """
+    A real TLS ClientHello, produced by the ssl module without a socket: the handshake
+    runs against in-memory buffers and stops as soon as it needs the server's reply,
+    leaving the ClientHello in the outgoing buffer. It is built once and reused.
+    The target IP is ignored (SNI can't carry an IP address), so every host shares it.
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+
+    incoming, outgoing = ssl.MemoryBIO(), ssl.MemoryBIO()
+    tls = context.wrap_bio(incoming, outgoing)
+    try:
+        tls.do_handshake()
+    except ssl.SSLWantReadError:
+        pass  # Expected: the handshake is waiting for the ServerHello.
+    return outgoing.read()
+
+
+# TLS versions as they appear in a record header.
+TLS_VERSIONS = {0x0300: "SSL 3.0", 0x0301: "TLS 1.0", 0x0302: "TLS 1.1", 0x0303: "TLS 1.2"}
+
+
+def build_tls_probe(target_ip: str) -> bytes:
+    """The cached ClientHello (shared by every host)."""
+    return build_tls_client_hello()
+
+
+def describe_tls(response: bytes) -> str | None:
+    """Recognise a TLS handshake (0x16) or alert (0x15) record."""
+    if len(response) < 5 or response[0] not in (0x15, 0x16) or response[1] != 0x03:
+        return None
+    version = TLS_VERSIONS.get(int.from_bytes(response[1:3], "big"), "TLS")
+    if response[0] == 0x15:
+        return f"TLS service ({version} alert)"
+    return f"TLS service ({version} handshake)"
+
+
+# --- Redis -------------------------------------------------------------------
+
+def build_redis_ping(target_ip: str) -> bytes:
+    return b"PING\r\n"
+
+
+def describe_redis(response: bytes) -> str | None:
+    # '+PONG' normally, '-NOAUTH ...' when a password is required.
+    if response.startswith((b"+PONG", b"-NOAUTH", b"-DENIED")):
+        return f"Redis ({response.decode('utf-8', errors='ignore').strip()})"
+    return None
+
+
+# --- Registry ----------------------------------------------------------------
+
+PROBES: dict[str, BannerProbe] = {
+    "http": BannerProbe("http", {80, 3000, 5000, 8000, 8008, 8080, 8081, 8888}, build_http_head, describe_http),
+    "tls": BannerProbe("tls", {443, 465, 636, 853, 993, 995, 8443}, build_tls_probe, describe_tls),
+    "redis": BannerProbe("redis", {6379}, build_redis_ping, describe_redis),
+}
+
+# Services that always greet the client first (FTP, SSH, Telnet, SMTP, POP3, IMAP, ...).
+# These are read passively with the full banner timeout and never probed.
+SERVER_FIRST_PORTS = {21, 22, 23, 25, 110, 143, 587, 3306}
+
+# Probe sent to unknown ports that stayed silent during the short passive read.
+FALLBACK_PROBE = "http"
+
+
+def plan_for_port(port: int) -> tuple[bool, BannerProbe | None, bool]:
+    """
+    Decide how to grab the banner of an open port.
+
+    :param port: The open port.
+    :return: (read_first, probe, short_read):
+             - read_first: read passively before sending anything.
+             - probe: the probe to send (right away, or after a silent passive read), or None.
+             - short_read: the passive read only gets a short window, because a probe follows.
+    """
+    for probe in PROBES.values():
+        if port in probe.ports:
+            # Known client-speaks-first service: send its request immediately.
+            return False, probe, False
+    if port in SERVER_FIRST_PORTS:
+        # Known server-speaks-first service: just listen, like the plain scanner does.
+        return True, None, False
+    # Unknown: give the service a brief chance to talk first, then fall back to a probe.
+    return True, PROBES[FALLBACK_PROBE], True
@@ -0,0 +1,115 @@
+import io
+import sys
+import json
+import time
+import argparse
+import resource
+import threading
+import subprocess
+import contextlib
+
+# Import the PortScanner class from the scanner module
+from scanner import PortScanner
+
+
+def run_child(engine: str, start_port: int, end_port: int, max_connections: int):
+    """
+    Runs a single scan with the given engine and prints its measurements as JSON.
+    This is executed in a fresh subprocess for every engine, so that the peak RSS
+    reported by the OS belongs to that engine alone.
+    """
+    # Count every thread that gets started during the scan by wrapping Thread.start.
+    threads_created = 0
+    original_start = threading.Thread.start
+
+    def counting_start(thread_self):
+        nonlocal threads_created
+        threads_created += 1
+        original_start(thread_self)
+
+    threading.Thread.start = counting_start
+
+    # Sample how many threads are alive at the same time from a small monitor thread.
+    # It is started before the patch is counted, so it doesn't skew the numbers.
+    peak_alive = threading.active_count()
+    done = threading.Event()
+
+    def monitor():
+        nonlocal peak_alive
+        while not done.is_set():
+            peak_alive = max(peak_alive, threading.active_count())
+            done.wait(0.01)
+
+    monitor_thread = threading.Thread(target=monitor, daemon=True)
+    original_start(monitor_thread)
+
+    scanner = PortScanner("127.0.0.1")
+    scanner.start_port = start_port
+    scanner.end_port = end_port
+    scanner.max_connections = max_connections
+    scanner.engine = engine
+
+    # Silence the scanner's own output; only the JSON line below should be printed.
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scanner.scan_range()
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    monitor_thread.join()
+
+    print(json.dumps({
+        "engine": engine,
+        "threads_created": threads_created,
+        # Minus the main thread and the monitor thread.
+        "peak_threads": peak_alive - 2,
+        # ru_maxrss is reported in kilobytes on Linux.
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "wall_time": elapsed,
+        "open_ports": len(scanner.open_ports),
+    }))
+
+
+def main():
+    """
+    Compares the scan engines on a localhost port range.
+    Each engine runs in its own subprocess; the results are printed as a table.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the PortScanner engines on localhost")
+    parser.add_argument("-sp", "--start-port", type=int, default=1, help="Starting port. Defaults to 1.")
+    parser.add_argument("-ep", "--end-port", type=int, default=10000, help="Ending port (inclusive). Defaults to 10000.")
+    parser.add_argument("-mc", "--max-connections", type=int, default=100, help="Concurrency limit. Defaults to 100.")
+    parser.add_argument(
+        "-e", "--engines", type=str, nargs="+", choices=PortScanner.ENGINES, default=list(PortScanner.ENGINES),
+        help="Engines to benchmark. Defaults to all of them."
+    )
+    # Internal flag used by the parent process to run a single measurement.
+    parser.add_argument("--child", type=str, choices=PortScanner.ENGINES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.start_port, args.end_port, args.max_connections)
+        return
+
+    print(f"[*] Scanning 127.0.0.1 ports {args.start_port}-{args.end_port} with max {args.max_connections} connections\n")
+    print(f"{'engine':<8} {'threads created':>16} {'peak threads':>13} {'peak RSS (MiB)':>15} {'wall time (s)':>14} {'open':>5}")
+
+    for engine in args.engines:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--child", engine,
+             "-sp", str(args.start_port), "-ep", str(args.end_port), "-mc", str(args.max_connections)],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(f"{engine:<8} failed: {completed.stderr.strip()}")
+            continue
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"{result['engine']:<8} {result['threads_created']:>16} {result['peak_threads']:>13} "
+            f"{result['peak_rss_kb'] / 1024:>15.1f} {result['wall_time']:>14.2f} {result['open_ports']:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
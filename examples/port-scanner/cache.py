@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import threading
+
+
+class ResultCache:
+    """
+    An on-disk cache of port scan results, keyed by (resolved IP, port).
+
+    Each entry stores the port's status, its banner and when it was scanned.
+    Entries younger than 'ttl' seconds are fresh and can be reused instead of
+    scanning the port again; older ones are stale and get rescanned. The whole
+    cache is a single JSON file, written atomically (temporary file + rename).
+    """
+
+    # Bumped whenever the on-disk format changes.
+    VERSION = 1
+
+    def __init__(self, file_path: str, ttl: float = 300.0):
+        """
+        :param file_path: Where the cache is stored.
+        :param ttl: How long, in seconds, a cached result stays fresh.
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+
+        # "ip:port" -> {"status": ..., "banner": ..., "timestamp": ...}
+        self.entries: dict[str, dict] = {}
+
+        # Results are stored from many scan threads at once.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, file_path: str, ttl: float = 300.0) -> "ResultCache":
+        """
+        Loads the cache file, or starts an empty cache if it doesn't exist yet.
+
+        :raises ValueError: If the file is not a cache this version understands.
+        :raises OSError: If an existing file cannot be read.
+        """
+        cache = cls(file_path, ttl)
+        if not os.path.exists(file_path):
+            return cache
+
+        with open(file_path) as f:
+            data = json.load(f)
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported cache version: {data.get('version')}")
+        cache.entries = data["entries"]
+        return cache
+
+    @staticmethod
+    def key(target_ip: str, port: int) -> str:
+        return f"{target_ip}:{port}"
+
+    def get(self, target_ip: str, port: int) -> dict | None:
+        """:return: The cached entry for the port (fresh or not), or None."""
+        return self.entries.get(self.key(target_ip, port))
+
+    def is_fresh(self, entry: dict) -> bool:
+        """:return: True if the entry is younger than the TTL."""
+        return time.time() - entry["timestamp"] < self.ttl
+
+    def update(self, result: dict) -> dict | None:
+        """
+        Stores a new scan result.
+
+        :param result: A result dictionary with 'host', 'port', 'status' and 'banner'.
+        :return: The entry it replaced, or None if the port wasn't cached before.
+        """
+        key = self.key(result["host"], result["port"])
+        entry = {"status": result["status"], "banner": result["banner"], "timestamp": time.time()}
+        with self._lock:
+            previous = self.entries.get(key)
+            self.entries[key] = entry
+        return previous
+
+    def save(self) -> bool:
+        """
+        Writes the cache to disk atomically.
+
+        :return: True if the cache was written, False otherwise.
+        """
+        with self._lock:
+            data = {"version": self.VERSION, "entries": dict(self.entries)}
+
+        temporary_path = f"{self.file_path}.tmp"
+        try:
+            with open(temporary_path, "w") as f:
+                json.dump(data, f)
+            os.replace(temporary_path, self.file_path)
+            return True
+        except OSError as e:
+            print(f"[!] Error saving result cache to '{self.file_path}': {e}")
+            return False
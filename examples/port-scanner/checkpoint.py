@@ -0,0 +1,151 @@
+import os
+import json
+import zlib
+import base64
+import threading
+
+
+class ScanCheckpoint:
+    """
+    Keeps track of which (host, port) pairs a scan has already finished, so an
+    interrupted scan can be resumed instead of started over.
+
+    Progress is stored as one compact bitmap per host (one bit per port in the
+    scanned range) plus the list of open ports found so far. The checkpoint is
+    saved to disk every 'save_interval' seconds by a background thread, and once
+    more when it is closed. Saving writes a temporary file and renames it over
+    the old one, so a crash mid-save never leaves a corrupt checkpoint behind.
+    """
+
+    # Bumped whenever the on-disk format changes.
+    VERSION = 1
+
+    def __init__(self, file_path: str, start_port: int, end_port: int, save_interval: float = 5.0):
+        """
+        :param file_path: Where the checkpoint is saved.
+        :param start_port: The first port of the scanned range.
+        :param end_port: The last port of the scanned range (inclusive).
+        :param save_interval: Seconds between automatic saves.
+        """
+        self.file_path = file_path
+        self.start_port = start_port
+        self.end_port = end_port
+        self.save_interval = save_interval
+
+        # ip -> bitmap of finished ports. Bit N stands for port 'start_port + N'.
+        # Bitmaps are created lazily, so hosts that were never touched cost nothing.
+        self.completed: dict[str, bytearray] = {}
+
+        # Open port results found so far (the same dictionaries as PortScanner.open_ports).
+        self.open_ports: list[dict] = []
+
+        # Results are marked from many scan threads at once.
+        self._lock = threading.Lock()
+
+        # Set by close(); also used by the background saver to wait between saves.
+        self._closed = threading.Event()
+        self._saver: threading.Thread | None = None
+
+    @classmethod
+    def load(cls, file_path: str, save_interval: float = 5.0) -> "ScanCheckpoint":
+        """
+        Loads a checkpoint previously written by save().
+
+        :param file_path: The checkpoint file.
+        :param save_interval: Seconds between automatic saves once the scan resumes.
+        :return: The restored checkpoint, which keeps saving to the same file.
+        :raises ValueError: If the file is not a checkpoint this version understands.
+        :raises OSError: If the file cannot be read.
+        """
+        with open(file_path) as f:
+            data = json.load(f)
+
+        if data.get("version") != cls.VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {data.get('version')}")
+
+        checkpoint = cls(file_path, data["start_port"], data["end_port"], save_interval)
+        checkpoint.completed = {
+            ip: bytearray(zlib.decompress(base64.b64decode(bitmap)))
+            for ip, bitmap in data["completed"].items()
+        }
+        checkpoint.open_ports = data["open_ports"]
+        return checkpoint
+
+    def start(self):
+        """Starts saving the checkpoint periodically in the background."""
+        self._saver = threading.Thread(target=self._save_periodically, daemon=True)
+        self._saver.start()
+
+    def _save_periodically(self):
+        """Saves the checkpoint every 'save_interval' seconds until it is closed."""
+        while not self._closed.wait(self.save_interval):
+            self.save()
+
+    def close(self):
+        """Stops the background saver and writes the checkpoint one final time."""
+        self._closed.set()
+        if self._saver:
+            self._saver.join()
+        self.save()
+
+    def is_done(self, target_ip: str, port: int) -> bool:
+        """
+        :return: True if the port was already scanned on that host.
+        """
+        bitmap = self.completed.get(target_ip)
+        if bitmap is None:
+            return False
+        index = port - self.start_port
+        return bool(bitmap[index >> 3] & (1 << (index & 7)))
+
+    def completed_count(self) -> int:
+        """:return: The number of (host, port) pairs finished so far."""
+        with self._lock:
+            return sum(bin(byte).count("1") for bitmap in self.completed.values() for byte in bitmap)
+
+    def mark_done(self, result: dict):
+        """
+        Records a finished port result.
+
+        :param result: A result dictionary with 'host', 'port', 'status' and 'banner'.
+        """
+        index = result["port"] - self.start_port
+        with self._lock:
+            bitmap = self.completed.get(result["host"])
+            if bitmap is None:
+                # One bit per port in the range, rounded up to whole bytes.
+                bitmap = self.completed[result["host"]] = bytearray((self.end_port - self.start_port + 8) // 8)
+            bitmap[index >> 3] |= 1 << (index & 7)
+
+            if result["status"] == "open":
+                self.open_ports.append({"host": result["host"], "port": result["port"], "banner": result["banner"]})
+
+    def save(self) -> bool:
+        """
+        Writes the checkpoint to disk atomically.
+
+        :return: True if the checkpoint was written, False otherwise.
+        """
+        with self._lock:
+            data = {
+                "version": self.VERSION,
+                "start_port": self.start_port,
+                "end_port": self.end_port,
+                # Bitmaps compress extremely well (long runs of 0xFF or 0x00).
+                "completed": {
+                    ip: base64.b64encode(zlib.compress(bytes(bitmap))).decode("ascii")
+                    for ip, bitmap in self.completed.items()
+                },
+                "open_ports": list(self.open_ports),
+            }
+
+        temporary_path = f"{self.file_path}.tmp"
+        try:
+            with open(temporary_path, "w") as f:
+                json.dump(data, f)
+            # os.replace is atomic, so readers only ever see a complete checkpoint.
+            os.replace(temporary_path, self.file_path)
+            return True
+        except OSError as e:
+            print(f"[!] Error saving checkpoint to '{self.file_path}': {e}")
+            return False
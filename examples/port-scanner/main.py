@@ -1,8 +1,9 @@
 import argparse
-import threading
 
 # Import the PortScanner class from the scanner module
 from scanner import PortScanner
+# The available output sinks, used for the '--format' choices
+from sinks import SINKS
 
 
 def main():
@@ -22,13 +23,22 @@ def main():
 
     # Add arguments that the script will accept from the command line.
 
-    # --target / -t: Specifies the host (IP address or hostname) to scan.
+    # --target / -t: Specifies the host(s) to scan.
     # 'type=str' ensures the input is treated as a string.
     # 'default="localhost"' sets a default value if the argument is not provided.
     # 'help' provides a description for the argument in the help message.
+    # Besides a single host, this accepts comma separated lists, CIDR blocks and ranges.
     parser.add_argument(
         "-t", "--target", type=str, default="localhost",
-        help="Target host to scan (e.g., 'example.com' or '192.168.1.1'). Defaults to 'localhost'."
+        help="Target(s) to scan: a host ('example.com', '192.168.1.1'), a comma separated list, "
+             "a CIDR block ('192.168.1.0/24') or a range ('192.168.1.10-20'). Defaults to 'localhost'."
+    )
+
+    # --target-file / -iL: Reads additional targets from a file, one entry per line.
+    # Every line accepts the same forms as --target. Lines starting with '#' are ignored.
+    parser.add_argument(
+        "-iL", "--target-file", type=str, default=None,
+        help="Read targets from a file (one host, list, CIDR block or range per line). Replaces --target."
     )
 
     # --start-port / -sp: Defines the starting port for the scan range.
@@ -53,6 +63,66 @@ def main():
         help="The maximum number of concurrent connections (threads) to use during scanning. Defaults to 100."
     )
 
+    # --engine / -e: Chooses how the scan is executed.
+    # 'choices' restricts the value to the engines PortScanner knows about.
+    #   - 'thread' starts one thread per port (the original behaviour).
+    #   - 'pool' uses a fixed pool of --max-connections worker threads fed from a queue.
+    #   - 'async' runs non-blocking connects on a single asyncio event loop, which
+    #     avoids creating thousands of OS threads on large ranges.
+    parser.add_argument(
+        "-e", "--engine", type=str, choices=PortScanner.ENGINES, default="thread",
+        help="Scan engine to use: 'thread' (one thread per port), 'pool' (fixed pool of worker threads) or 'async' (asyncio). 'pool' and 'async' are bounded by --max-connections. Defaults to 'thread'."
+    )
+
+    # --timeout: The connection timeout in seconds.
+    # 'type=float' allows fractions of a second.
+    # With --adaptive-timeout this becomes the ceiling of the adaptive timeout.
+    parser.add_argument(
+        "--timeout", type=float, default=1.0,
+        help="Connection timeout in seconds (the ceiling when --adaptive-timeout is used). Defaults to 1.0."
+    )
+
+    # --banner-timeout: How long to wait for a banner after connecting.
+    # With --adaptive-timeout this becomes the ceiling of the adaptive banner timeout.
+    parser.add_argument(
+        "--banner-timeout", type=float, default=0.5,
+        help="Banner read timeout in seconds (the ceiling when --adaptive-timeout is used). Defaults to 0.5."
+    )
+
+    # --adaptive-timeout / -at: Derive timeouts from each host's measured round-trip time,
+    # the same way TCP computes its retransmission timeout (SRTT + 4 * RTTVAR).
+    # On hosts where most ports are filtered this avoids waiting the full --timeout every time.
+    parser.add_argument(
+        "-at", "--adaptive-timeout", action='store_true',
+        help="Adapt connect and banner timeouts to each host's measured round-trip time, between --min-timeout and the fixed timeouts."
+    )
+
+    # --min-timeout: The floor for adaptive timeouts.
+    parser.add_argument(
+        "--min-timeout", type=float, default=0.05,
+        help="Smallest timeout in seconds that --adaptive-timeout may use. Defaults to 0.05."
+    )
+
+    # --probe / -p: Send service-appropriate requests (HTTP HEAD, TLS ClientHello, ...)
+    # right after connecting, so services that wait for the client answer immediately
+    # instead of costing a full banner timeout each.
+    parser.add_argument(
+        "-p", "--probe", action='store_true',
+        help="Actively probe open ports for banners (HTTP HEAD, TLS ClientHello, ...) chosen by port, with an HTTP fallback for silent unknown ports."
+    )
+
+    # --banner-bytes: The most bytes read from a service when grabbing its banner.
+    parser.add_argument(
+        "--banner-bytes", type=int, default=1024,
+        help="Maximum number of banner bytes to read from each open port. Defaults to 1024."
+    )
+
+    # --probe-wait: With --probe, how long an unknown port may stay silent before the fallback probe is sent.
+    parser.add_argument(
+        "--probe-wait", type=float, default=0.1,
+        help="With --probe, seconds to wait for an unknown service to speak first before probing it. Defaults to 0.1."
+    )
+
     # --verbose / -v: Enables verbose output, showing status for all ports.
     # 'action='store_true'' means this argument is a boolean flag. If it's present
     # on the command line, args.verbose will be True; otherwise, False.
@@ -74,20 +144,97 @@ def main():
         help="Specify an output file to save results (e.g., results.txt). If just '-o' is used without a filename, a timestamped file will be created automatically in a 'port-scanner_results' directory."
     )
 
+    # --format / -f: The file format used with --output.
+    # Results are streamed to the file as they are found, so an interrupted scan
+    # still keeps everything found so far.
+    parser.add_argument(
+        "-f", "--format", type=str, choices=list(SINKS), default="log",
+        help="Output file format: 'log' (plain text), 'jsonl' (JSON Lines) or 'csv'. Defaults to 'log'."
+    )
+
+    # --flush-interval: How often buffered results are flushed to the output file.
+    # 'type=float' allows fractions of a second.
+    parser.add_argument(
+        "--flush-interval", type=float, default=1.0,
+        help="Seconds between flushes of the output file while scanning. Defaults to 1.0."
+    )
+
+    # --checkpoint / -cp: Periodically save scan progress to a file.
+    # If the scan is interrupted (crash, Ctrl-C), it can be continued with --resume.
+    parser.add_argument(
+        "-cp", "--checkpoint", type=str, default=None,
+        help="Save scan progress to this file periodically, so an interrupted scan can be resumed with --resume."
+    )
+
+    # --resume / -r: Continue an interrupted scan from its checkpoint file.
+    # Ports already recorded in the checkpoint are skipped. Progress keeps being saved
+    # to the same file unless --checkpoint names a different one.
+    parser.add_argument(
+        "-r", "--resume", type=str, default=None,
+        help="Resume an interrupted scan from a checkpoint file, skipping ports that were already scanned. Use the same targets and port range."
+    )
+
+    # --checkpoint-interval: How often (in seconds) the checkpoint is written.
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=5.0,
+        help="Seconds between checkpoint saves. Defaults to 5.0."
+    )
+
+    # --cache: Keep results in a cache file between runs.
+    # Ports scanned less than --cache-ttl seconds ago are not scanned again.
+    parser.add_argument(
+        "--cache", type=str, default=None,
+        help="Result cache file. Results younger than --cache-ttl are reused instead of rescanned, and every run updates the cache."
+    )
+
+    # --cache-ttl: How long a cached result stays valid.
+    parser.add_argument(
+        "--cache-ttl", type=float, default=300.0,
+        help="Seconds a cached result stays fresh. Defaults to 300."
+    )
+
+    # --changed-only: Incremental monitoring mode, used together with --cache.
+    # Ports cached as open are rescanned first, and only differences are reported.
+    parser.add_argument(
+        "--changed-only", action='store_true',
+        help="With --cache, rescan cached-open ports first and report only ports that opened, closed or changed banner."
+    )
+
     # Parse the arguments provided by you from the command line.
     args = parser.parse_args()
 
+    if args.max_connections < 1:
+        parser.error(f"--max-connections must be at least 1 (got {args.max_connections}).")
+
+    if args.changed_only and not args.cache:
+        parser.error("--changed-only needs a result cache to compare against (--cache FILE).")
+
+    # The adaptive timeouts stay between --min-timeout and --timeout, so those must make a valid range.
+    if args.adaptive_timeout and not 0 < args.min_timeout <= args.timeout:
+        parser.error(f"--adaptive-timeout needs 0 < --min-timeout ({args.min_timeout}) <= --timeout ({args.timeout}).")
+
     # 2. PortScanner Initialization
     # --------------------------------------------------------------------------
+    # Collect the targets, either from the command line or from the target file.
+    targets = args.target
+    if args.target_file:
+        try:
+            with open(args.target_file) as f:
+                targets = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+        except OSError as e:
+            print(f"[!] Exiting: Could not read target file '{args.target_file}': {e}")
+            return
+
     # Create an instance of the PortScanner class.
-    # Pass the parsed target host, verbose flag, and output file path to its constructor.
-    # The PortScanner will resolve the hostname to an IP address during its initialization.
-    scanner = PortScanner(args.target, args.verbose, args.output)
-
-    # Check if the target host was successfully resolved to an IP address.
-    # The resolve_host method in PortScanner returns an empty string if resolution fails.
-    if not scanner.target_ip:
-        print("[!] Exiting: Target host could not be resolved. Please check the hostname or IP address.")
+    # Pass the targets, verbose flag, and output file path to its constructor.
+    # The PortScanner expands CIDR blocks and ranges, and resolves every hostname
+    # once, during its initialization.
+    scanner = PortScanner(targets, args.verbose, args.output)
+
+    # Check if at least one target was successfully resolved to an IP address.
+    # Hosts that fail to resolve are reported and skipped by the scanner.
+    if not scanner.targets:
+        print("[!] Exiting: No target host could be resolved. Please check the hostname(s) or IP address(es).")
         return # Exit the script if the target is invalid.
 
     # 3. Configure Scanner Parameters
@@ -96,19 +243,35 @@ def main():
     # These properties are set directly on the scanner instance.
     scanner.start_port = args.start_port
     scanner.end_port = args.end_port
+    # Setting max_connections also rebuilds the scanner's semaphore, which is
+    # responsible for limiting concurrent threads.
     scanner.max_connections = args.max_connections
-
-    # Crucial: Re-initialize the semaphore in the scanner.
-    # The semaphore is responsible for limiting concurrent threads.
-    # It must be re-initialized here because 'max_connections' might have been
-    # changed by the command-line argument, overriding its default value set in __init__.
-    scanner.scan_semaphore = threading.Semaphore(scanner.max_connections)
+    scanner.engine = args.engine
+    scanner.output_format = args.format
+    scanner.flush_interval = args.flush_interval
+    scanner.connect_timeout = args.timeout
+    scanner.banner_timeout = args.banner_timeout
+    scanner.adaptive_timeout = args.adaptive_timeout
+    scanner.min_timeout = args.min_timeout
+    scanner.probe_banners = args.probe
+    scanner.banner_bytes = args.banner_bytes
+    scanner.probe_wait = args.probe_wait
+    scanner.cache_path = args.cache
+    scanner.cache_ttl = args.cache_ttl
+    scanner.changed_only = args.changed_only
+    scanner.checkpoint_path = args.checkpoint
+    scanner.resume_path = args.resume
+    scanner.checkpoint_interval = args.checkpoint_interval
 
     # 4. Start the Scan
     # --------------------------------------------------------------------------
     # Call the scan_range method to begin the port scanning process.
     # This method orchestrates the creation of threads and manages the scan.
-    scanner.scan_range()
+    # A Ctrl-C stops the scan; the output file and checkpoint are still saved by scan_range().
+    try:
+        scanner.scan_range()
+    except KeyboardInterrupt:
+        print("\n[!] Scan interrupted. Use --resume with the checkpoint file (if any) to continue.")
 
 
 # 5. Script Entry Point
@@ -0,0 +1,66 @@
+import threading
+
+
+class RttEstimator:
+    """
+    Estimates a host's round-trip time and derives scan timeouts from it.
+
+    This follows the way TCP computes its retransmission timeout (RFC 6298):
+    a smoothed RTT (SRTT) and an RTT variation (RTTVAR) are updated from every
+    measured sample, and the timeout is SRTT + 4 * RTTVAR, clamped between a
+    floor and a ceiling. Until the first sample arrives the ceiling is used,
+    so an estimator never times out sooner than it can justify.
+    """
+
+    # Gains from RFC 6298: alpha = 1/8 for SRTT, beta = 1/4 for RTTVAR, K = 4.
+    ALPHA = 0.125
+    BETA = 0.25
+    K = 4
+
+    def __init__(self, min_timeout: float, max_timeout: float):
+        """
+        :param min_timeout: The smallest timeout ever returned (the floor), in seconds.
+        :param max_timeout: The largest timeout ever returned (the ceiling), in seconds.
+        """
+        if min_timeout <= 0 or max_timeout < min_timeout:
+            raise ValueError("Timeouts must satisfy 0 < min_timeout <= max_timeout.")
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+        # None until the first sample has been observed.
+        self.srtt: float | None = None
+        self.rttvar: float | None = None
+        self.samples = 0
+
+        # Samples arrive from many scan threads at once.
+        self._lock = threading.Lock()
+
+    def observe(self, rtt: float):
+        """
+        Feeds one measured round-trip time into the estimate.
+        Only answers should be measured (a SYN-ACK or a RST), never timeouts.
+
+        :param rtt: The measured round-trip time in seconds.
+        """
+        with self._lock:
+            if self.srtt is None:
+                # First measurement: SRTT = R, RTTVAR = R / 2.
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                # RTTVAR is updated with the old SRTT, as the RFC requires.
+                self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+                self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+            self.samples += 1
+
+    def timeout(self) -> float:
+        """
+        Returns the current timeout: SRTT + K * RTTVAR, clamped to [min_timeout, max_timeout].
+
+        :return: The timeout in seconds.
+        """
+        with self._lock:
+            if self.srtt is None:
+                return self.max_timeout
+            rto = self.srtt + self.K * self.rttvar
+        return max(self.min_timeout, min(rto, self.max_timeout))
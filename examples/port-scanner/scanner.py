@@ -1,34 +1,59 @@
+import time
+import errno
 import socket
+import queue
+import asyncio
 import threading
 import os
 from datetime import datetime
 
+from sinks import SINKS, ResultSink
+from targets import parse_targets
+from rtt import RttEstimator
+from checkpoint import ScanCheckpoint
+from banner_probes import BannerProbe, plan_for_port
+from cache import ResultCache
+
 
 class PortScanner:
     """
     A multi-threaded TCP Port Scanner.
 
-    This class provides functionality to scan a range of TCP ports on a target host,
-    identify open ports, grab banners from open services, and optionally output
-    results to a file. It uses threading and a semaphore to manage concurrent connections.
+    This class provides functionality to scan a range of TCP ports on one or more
+    target hosts (host lists, CIDR blocks and address ranges), identify open ports,
+    grab banners from open services, and optionally output results to a file.
+    It uses threading and a semaphore to manage concurrent connections,
+    or alternatively an asyncio event loop with non-blocking connects (see `engine`).
     """
 
-    def __init__(self, target_host: str = "localhost", verbose: bool = False, output_file_path: str = None):
+    # The scan engines this class knows how to run. 'thread' is the original
+    # thread-per-port approach, 'pool' uses a fixed set of long-lived worker threads,
+    # and 'async' runs every connection on one event loop.
+    ENGINES = ("thread", "pool", "async")
+
+    def __init__(self, target_host: str | list[str] = "localhost", verbose: bool = False, output_file_path: str = None):
         """
-        Initializes the PortScanner with a target host and scan settings.
+        Initializes the PortScanner with one or more target hosts and scan settings.
 
-        :param target_host: The hostname or IP address of the target. Defaults to "localhost".
+        :param target_host: The target(s) to scan. Either a single hostname or IP address, or
+                            a specification understood by targets.parse_targets(): comma separated
+                            hosts, CIDR blocks ('10.0.0.0/24') and ranges ('10.0.0.1-20'), or a list
+                            of those. Defaults to "localhost".
         :param verbose: If True, prints status for every port scanned (open, closed, filtered).
         :param output_file_path: The path to a file where results should be saved.
                                  Can be None (no output file), a specific path, or 'auto_generate'
                                  to trigger automatic filename generation.
         """
-        # Store the provided target host string.
-        self.target_host = target_host
+        # Store the provided target specification as a single string (used in file names and logs).
+        self.target_host = target_host if isinstance(target_host, str) else ",".join(target_host)
+
+        # Expand and resolve every target immediately upon initialization.
+        # This handles DNS resolution upfront, once per host, and stores (host, ip) pairs.
+        self.targets: list[tuple[str, str]] = self.resolve_targets(target_host)
 
-        # Resolve the hostname to an IP address immediately upon initialization.
-        # This handles DNS resolution upfront and stores the IP.
-        self.target_ip = self.resolve_host(self.target_host)
+        # The first resolved IP address, or an empty string if nothing could be resolved.
+        # For a single-host scan this is simply the target's IP.
+        self.target_ip = self.targets[0][1] if self.targets else ""
 
         # Default range of ports to scan. These can be overridden via main.py arguments.
         self.start_port = 1
@@ -40,23 +65,94 @@ class PortScanner:
         # Store the provided output file path. This will be None, a path string, or 'auto_generate'.
         self.output_file_path = output_file_path
 
+        # Format of the output file (a key of sinks.SINKS) and how often, in seconds,
+        # buffered results are flushed to it. Both can be overridden via main.py's arguments.
+        self.output_format = "log"
+        self.flush_interval = 1.0
+
+        # The sink results are streamed to while a scan is running (None when not writing a file).
+        self.sink: ResultSink | None = None
+
         # List to store information about open ports. Each item will be a dictionary
         # containing the port number and any grabbed banner.
         self.open_ports: list[dict] = []
 
         # Maximum number of concurrent connections/threads.
         # This is the initial default, but can be updated by main.py's arguments.
+        # Assigning it also rebuilds 'scan_semaphore' (see the property below).
         self.max_connections = 100
 
-        # A threading.Semaphore limits the number of active threads.
-        # It's initialized here with a default, but critically, it's re-initialized
-        # in main.py after potentially receiving a new max_connections value.
-        self.scan_semaphore = threading.Semaphore(self.max_connections)
-
         # A threading.Lock is used to protect 'self.open_ports' when multiple threads
         # try to add data to it simultaneously, preventing race conditions.
         self.open_ports_lock = threading.Lock()
 
+        # Which scan engine scan_range() should use. Must be one of ENGINES.
+        # This can be overridden via main.py's '--engine' argument.
+        self.engine = "thread"
+
+        # Timeouts (in seconds) for the connection attempt and for the banner read.
+        # Without adaptive timeouts these are used as-is. With adaptive timeouts they
+        # become ceilings, and the actual values follow each host's measured RTT.
+        self.connect_timeout = 1.0
+        self.banner_timeout = 0.5
+
+        # Adaptive timeout settings. 'min_timeout' is the floor no adaptive timeout goes below.
+        self.adaptive_timeout = False
+        self.min_timeout = 0.05
+
+        # One RTT estimator per target IP, created by scan_range() when adaptive timeouts are on.
+        self.rtt_estimators: dict[str, RttEstimator] = {}
+
+        # Banner grabbing. 'banner_bytes' is the most bytes read from a service.
+        # With 'probe_banners' on, client-speaks-first services (HTTP, TLS, ...) are sent a
+        # request right after connecting (see banner_probes.py) instead of being waited on.
+        # 'probe_wait' is how long an unknown port may stay silent before the fallback probe is sent.
+        self.banner_bytes = 1024
+        self.probe_banners = False
+        self.probe_wait = 0.1
+
+        # Checkpointing. 'checkpoint_path' is where progress is saved every 'checkpoint_interval'
+        # seconds; 'resume_path' is a checkpoint from an earlier, interrupted run to continue from.
+        # Both can be set via main.py's '--checkpoint' and '--resume' arguments.
+        self.checkpoint_path: str | None = None
+        self.resume_path: str | None = None
+        self.checkpoint_interval = 5.0
+
+        # The checkpoint in use while a scan is running (None when not checkpointing).
+        self.checkpoint: ScanCheckpoint | None = None
+
+        # Result cache for repeated scans. Results younger than 'cache_ttl' seconds are reused
+        # instead of rescanned. With 'changed_only', ports cached as open are rescanned first and
+        # only the differences from the cache are reported. Set via main.py's '--cache' arguments.
+        self.cache_path: str | None = None
+        self.cache_ttl = 300.0
+        self.changed_only = False
+
+        # The cache in use while a scan is running, and the changes it detected.
+        # Each change is a dictionary with 'host', 'port', 'before' and 'after' descriptions.
+        self.cache: ResultCache | None = None
+        self.changes: list[dict] = []
+
+    @property
+    def max_connections(self) -> int:
+        """The maximum number of concurrent connections/threads."""
+        return self._max_connections
+
+    @max_connections.setter
+    def max_connections(self, value: int):
+        """
+        Updates the concurrency limit and rebuilds the semaphore to match it,
+        so callers never have to re-create 'scan_semaphore' by hand.
+
+        :param value: The new maximum number of concurrent connections (must be >= 1).
+        """
+        if value < 1:
+            raise ValueError("max_connections must be at least 1.")
+        self._max_connections = value
+
+        # A threading.Semaphore limits the number of active threads.
+        self.scan_semaphore = threading.Semaphore(value)
+
     def resolve_host(self, host: str) -> str:
         """
         Resolves a given hostname to its corresponding IP address.
@@ -68,19 +164,280 @@ class PortScanner:
             # socket.gethostbyname() performs the DNS lookup.
             ip_address = socket.gethostbyname(host)
             return ip_address
-        except socket.gaierror:
+        except (socket.gaierror, UnicodeError):
             # socket.gaierror is raised for address-related errors (e.g., unknown host).
+            # UnicodeError is raised for malformed names (e.g., empty labels in 'bad..host').
             print(f"[!] Error: Could not resolve hostname '{host}'.")
             return "" # Return empty string to signal failure.
 
-    def scan_port(self, port: int) -> dict:
+    def resolve_targets(self, target_spec: str | list[str]) -> list[tuple[str, str]]:
+        """
+        Expands a target specification and resolves every host in it exactly once.
+        Hosts that cannot be resolved are reported and skipped, and hosts that resolve
+        to an IP address that is already in the list are only scanned once.
+
+        :param target_spec: A target specification (see targets.parse_targets()).
+        :return: A list of (host, ip) tuples, in the order they were given.
+        """
+        try:
+            hosts = parse_targets(target_spec)
+        except ValueError as e:
+            print(f"[!] Error: Invalid target specification: {e}")
+            return []
+
+        targets: list[tuple[str, str]] = []
+        seen_ips: set[str] = set()
+        for host in hosts:
+            ip_address = self.resolve_host(host)
+            if ip_address and ip_address not in seen_ips:
+                seen_ips.add(ip_address)
+                targets.append((host, ip_address))
+        return targets
+
+    def host_prefix(self, target_ip: str) -> str:
+        """
+        Returns a '[ip] ' prefix for console lines when several hosts are being scanned,
+        so interleaved output can be told apart. Single-host output stays unchanged.
+
+        :param target_ip: The IP address the line is about.
+        :return: The prefix, or an empty string for single-host scans.
+        """
+        return f"[{target_ip}] " if len(self.targets) > 1 else ""
+
+    def connect_timeout_for(self, target_ip: str) -> float:
+        """
+        Returns the connection timeout to use for a host.
+
+        :param target_ip: The IP address about to be scanned.
+        :return: The host's adaptive timeout, or 'connect_timeout' if adaptive timeouts are off.
+        """
+        estimator = self.rtt_estimators.get(target_ip)
+        return estimator.timeout() if estimator else self.connect_timeout
+
+    def banner_timeout_for(self, target_ip: str) -> float:
+        """
+        Returns the banner read timeout to use for a host.
+        A service that talks first normally sends its banner right after the handshake,
+        so twice the host's adaptive timeout is allowed, capped at 'banner_timeout'.
+
+        :param target_ip: The IP address whose banner is being read.
+        :return: The banner timeout, or 'banner_timeout' if adaptive timeouts are off.
+        """
+        estimator = self.rtt_estimators.get(target_ip)
+        if not estimator:
+            return self.banner_timeout
+        return max(self.min_timeout, min(2 * estimator.timeout(), self.banner_timeout))
+
+    def probe_read_timeout(self, timeout: float, waited: float) -> float:
+        """
+        Returns how long to wait for the answer to a probe: what is left of the banner
+        timeout after 'waited' seconds of listening, but at least 'min_timeout', so a
+        silent service costs one banner timeout whether or not it was probed.
+        """
+        return max(self.min_timeout, timeout - waited)
+
+    def observe_rtt(self, target_ip: str, rtt: float):
+        """
+        Feeds a measured connect time into the host's RTT estimator (if adaptive timeouts are on).
+        Only answered connection attempts (accepted or refused) should be observed.
+
+        :param target_ip: The IP address that answered.
+        :param rtt: How long the connection attempt took, in seconds.
+        """
+        estimator = self.rtt_estimators.get(target_ip)
+        if estimator:
+            estimator.observe(rtt)
+
+    def decode_banner(self, port_data_bytes: bytes) -> str:
+        """
+        Converts the raw bytes read from an open port into a printable banner.
+        Shared by every scan engine so that they all report identical banners.
+
+        :param port_data_bytes: The bytes received from the service (may be empty).
+        :return: The decoded banner, or a default message if nothing was received.
+        """
+        # Decode the received bytes into a UTF-8 string.
+        # 'errors="ignore"' handles any decoding errors gracefully, preventing crashes.
+        banner = port_data_bytes.decode("utf-8", errors="ignore").strip()
+
+        # If no banner data was actually received (e.g., an empty string),
+        # assign a default message.
+        if not banner:
+            banner = "No banner received"
+        return banner
+
+    def record_open_port(self, port: int, banner: str, target_ip: str = None):
+        """
+        Adds an open port to 'self.open_ports' and prints it.
+        Safe to call from any scan engine (threads or the asyncio event loop).
+
+        :param port: The open port number.
+        :param banner: The banner grabbed from the port.
+        :param target_ip: The IP address the port belongs to. Defaults to 'self.target_ip'.
+        """
+        target_ip = target_ip or self.target_ip
+
+        # --- Thread-Safe Update of Open Ports List ---
+        # Acquire the lock before modifying the shared 'open_ports' list.
+        # This ensures that only one thread modifies the list at a time, preventing data corruption.
+        with self.open_ports_lock:
+            # Add the open port information (host, port number and banner) to the list.
+            self.open_ports.append({"host": target_ip, "port": port, "banner": banner})
+
+        # Print status for open ports (always printed, regardless of verbose mode,
+        # except in changed-only mode, which reports just the differences).
+        if not self.changed_only:
+            print(f"{self.host_prefix(target_ip)}Port {port} is OPEN. Banner: {banner}")
+
+    def emit_result(self, result: dict):
+        """
+        Streams a finished port result to the output sink, if one is open.
+        Open ports are always written; closed/filtered ports only in verbose mode.
+        Every result is also marked as done in the checkpoint, and compared against and
+        stored in the result cache, if those are in use.
+
+        :param result: The result dictionary produced by scan_port() or scan_port_async().
+        """
+        if self.checkpoint:
+            self.checkpoint.mark_done(result)
+        if self.cache:
+            self.record_change(self.cache.update(result), result)
+        if self.sink and (result["status"] == "open" or self.verbose):
+            self.sink.write(result)
+
+    def record_change(self, previous: dict | None, result: dict):
+        """
+        Compares a fresh result with what the cache held for the port, and records
+        a change if the port opened, closed or started reporting a different banner.
+        Ports that were never cached and are closed don't count as changes.
+
+        :param previous: The cache entry the result replaced (or None).
+        :param result: The new result.
+        """
+        def describe(status: str, banner: str | None) -> str:
+            return f"open ({banner})" if status == "open" else status
+
+        if previous is None:
+            if result["status"] != "open":
+                return
+        elif previous["status"] == result["status"] and previous["banner"] == result["banner"]:
+            return
+        elif previous["status"] != "open" and result["status"] != "open":
+            # closed <-> filtered/error flips aren't interesting for monitoring.
+            return
+
+        change = {
+            "host": result["host"],
+            "port": result["port"],
+            "before": describe(previous["status"], previous["banner"]) if previous else "not cached",
+            "after": describe(result["status"], result["banner"]),
+        }
+        with self.open_ports_lock:
+            self.changes.append(change)
+
+        if self.changed_only:
+            print(f"{self.host_prefix(result['host'])}Port {result['port']} changed: {change['before']} -> {change['after']}")
+
+    def describe_probe_response(self, probe: BannerProbe, port_data_bytes: bytes) -> str:
+        """
+        Turns the answer to a banner probe into a banner.
+
+        :param probe: The probe that was sent.
+        :param port_data_bytes: The bytes received in reply.
+        :return: The probe's own summary if it recognises the protocol, else the decoded bytes.
+        """
+        return probe.describe(port_data_bytes) or self.decode_banner(port_data_bytes)
+
+    def grab_banner(self, s: socket.socket, port: int, target_ip: str) -> str:
+        """
+        Reads the banner from a connected socket.
+
+        Without 'probe_banners' this is a single passive read, bounded by the banner timeout.
+        With it, the port decides the strategy (see banner_probes.plan_for_port()):
+        known client-speaks-first services are sent their request straight away,
+        known server-speaks-first services are just read, and unknown ports are read
+        for 'probe_wait' seconds before the fallback probe is sent.
+
+        :param s: The connected socket.
+        :param port: The open port.
+        :param target_ip: The IP address of the host.
+        :return: The banner.
+        :raises socket.timeout: If the service never answered in time.
+        :raises socket.error: On other socket errors (e.g., connection reset).
+        """
+        # Set a shorter timeout specifically for receiving data (banner).
+        # This prevents hanging if a service connects but sends no data.
+        # 0.5 seconds by default, or derived from the host's RTT with adaptive timeouts.
+        timeout = self.banner_timeout_for(target_ip)
+
+        if not self.probe_banners:
+            s.settimeout(timeout)
+            # Attempt to receive data (banner) from the open port, at most 'banner_bytes' bytes.
+            # Then turn the raw bytes into a printable banner string.
+            return self.decode_banner(s.recv(self.banner_bytes))
+
+        read_first, probe, short_read = plan_for_port(port)
+
+        waited = 0.0
+        if read_first:
+            waited = min(self.probe_wait, timeout) if short_read else timeout
+            s.settimeout(waited)
+            try:
+                return self.decode_banner(s.recv(self.banner_bytes))
+            except socket.timeout:
+                # Silent so far. Without a probe to try, that's the final answer.
+                if probe is None:
+                    raise
+
+        # Ask the service to talk, then read its answer within what's left of the timeout.
+        s.settimeout(self.probe_read_timeout(timeout, waited))
+        s.sendall(probe.build(target_ip))
+        return self.describe_probe_response(probe, s.recv(self.banner_bytes))
+
+    async def grab_banner_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                port: int, target_ip: str) -> str:
+        """
+        The asyncio counterpart of grab_banner(), using the same strategy and limits.
+
+        :raises asyncio.TimeoutError: If the service never answered in time.
+        :raises OSError: On other socket errors (e.g., connection reset).
+        """
+        timeout = self.banner_timeout_for(target_ip)
+
+        if not self.probe_banners:
+            port_data_bytes = await asyncio.wait_for(reader.read(self.banner_bytes), timeout=timeout)
+            return self.decode_banner(port_data_bytes)
+
+        read_first, probe, short_read = plan_for_port(port)
+
+        waited = 0.0
+        if read_first:
+            waited = min(self.probe_wait, timeout) if short_read else timeout
+            try:
+                port_data_bytes = await asyncio.wait_for(reader.read(self.banner_bytes), timeout=waited)
+                return self.decode_banner(port_data_bytes)
+            except asyncio.TimeoutError:
+                if probe is None:
+                    raise
+
+        writer.write(probe.build(target_ip))
+        await writer.drain()
+        port_data_bytes = await asyncio.wait_for(
+            reader.read(self.banner_bytes), timeout=self.probe_read_timeout(timeout, waited)
+        )
+        return self.describe_probe_response(probe, port_data_bytes)
+
+    def scan_port(self, port: int, target_ip: str = None) -> dict:
         """
         Scans a single TCP port on the target IP address.
         Attempts to establish a connection and grab a banner if the port is open.
 
         :param port: The port number to scan.
-        :return: A dictionary containing 'port', 'status', and 'data' (banner if open).
+        :param target_ip: The IP address to scan. Defaults to 'self.target_ip'.
+        :return: A dictionary containing 'host', 'port', 'status', and 'banner' (if open).
         """
+        target_ip = target_ip or self.target_ip
+
         # Acquire a semaphore. This decrements the semaphore counter.
         # If the counter is zero (meaning max_connections threads are already running),
         # this call will block until a semaphore is released by another thread.
@@ -92,17 +449,24 @@ class PortScanner:
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
         # Initialize output dictionary with default values.
-        output = {"port": port, "status": "closed", "banner": None}
+        output = {"host": target_ip, "port": port, "status": "closed", "banner": None}
 
         try:
             # Set a timeout for the connection attempt.
             # This prevents the scanner from hanging indefinitely on filtered or non-responsive ports.
-            s.settimeout(1) # 1 second timeout for connection.
+            # It is 1 second by default, or derived from the host's RTT with adaptive timeouts.
+            s.settimeout(self.connect_timeout_for(target_ip))
 
             # Attempt to connect to the target IP and port.
             # connect_ex returns 0 if the connection is successful (port is open).
             # It returns an error code (non-zero) if the connection fails (port is closed/filtered).
-            result = s.connect_ex((self.target_ip, port))
+            started = time.perf_counter()
+            result = s.connect_ex((target_ip, port))
+
+            # Both a SYN-ACK (open) and a RST (refused) are answers from the host,
+            # so their timing is a valid RTT sample. Timeouts are not.
+            if result in (0, errno.ECONNREFUSED):
+                self.observe_rtt(target_ip, time.perf_counter() - started)
 
             if result == 0:
                 # Port is open.
@@ -110,23 +474,7 @@ class PortScanner:
                 
                 # --- Banner Grabbing Attempt ---
                 try:
-                    # Set a shorter timeout specifically for receiving data (banner).
-                    # This prevents hanging if a service connects but sends no data.
-                    s.settimeout(0.5) # 0.5 seconds timeout for receiving.
-
-                    # Attempt to receive data (banner) from the open port.
-                    # 1024 is the buffer size (max bytes to receive).
-                    port_data_bytes = s.recv(1024)
-
-                    # Decode the received bytes into a UTF-8 string.
-                    # 'errors="ignore"' handles any decoding errors gracefully, preventing crashes.
-                    banner = port_data_bytes.decode("utf-8", errors="ignore").strip()
-
-                    # If no banner data was actually received (e.g., an empty string),
-                    # assign a default message.
-                    if not banner:
-                        banner = "No banner received"
-                    output["banner"] = banner
+                    output["banner"] = self.grab_banner(s, port, target_ip)
 
                 except socket.timeout:
                     # Catch timeout specifically if the service connects but sends no data within the timeout.
@@ -135,36 +483,24 @@ class PortScanner:
                     # Catch other socket errors during banner grabbing (e.g., connection reset).
                     output["banner"] = f"No banner (error: {e})"
                 
-                # --- Thread-Safe Update of Open Ports List ---
-                # Acquire the lock before modifying the shared 'open_ports' list.
-                # This ensures that only one thread modifies the list at a time, preventing data corruption.
-                self.open_ports_lock.acquire()
-                try:
-                    # Add the open port information (port number and banner) to the list.
-                    self.open_ports.append({"port": port, "banner": output["banner"]})
-                finally:
-                    # Release the lock after the list modification is complete.
-                    # 'finally' ensures the lock is always released, even if an error occurs.
-                    self.open_ports_lock.release()
-
-                # Print status for open ports (always printed, regardless of verbose mode).
-                print(f"Port {port} is OPEN. Banner: {output['banner']}")
+                # Store and announce the open port.
+                self.record_open_port(port, output["banner"], target_ip)
 
             else:
                 # Port is closed or filtered.
                 # Only print this status if verbose mode is enabled.
                 if self.verbose:
-                    print(f"Port {port} is CLOSED (Error Code: {result})")
+                    print(f"{self.host_prefix(target_ip)}Port {port} is CLOSED (Error Code: {result})")
 
         except socket.gaierror:
             # This error is typically caught by resolve_host, but included here for robustness.
             # It means the hostname could not be resolved at this stage.
             if self.verbose:
-                print(f"[!] Hostname resolution error during scan for port {port}.")
+                print(f"[!] Hostname resolution error during scan for port {port} on {target_ip}.")
         except socket.error as e:
             # Catches other general socket-related errors (e.g., network unreachable, connection refused).
             if self.verbose:
-                print(f"[!] Socket error for port {port}: {e}")
+                print(f"[!] Socket error for port {port} on {target_ip}: {e}")
         finally:
             # Always close the socket.
             # This releases the system resources used by the socket.
@@ -172,81 +508,379 @@ class PortScanner:
             # Release the semaphore. This increments the semaphore counter, allowing
             # another waiting thread to acquire it and start its scan.
             self.scan_semaphore.release()
+            # Hand the result to the output sink as soon as it is known.
+            self.emit_result(output)
             return output # Return the output dictionary for potential future use.
 
-    def scan_range(self):
+    async def scan_port_async(self, port: int, target_ip: str = None) -> dict:
         """
-        Orchestrates the scanning of a range of ports using multiple threads.
-        It starts threads for each port, waits for them to complete,
-        then prints and optionally saves the results.
+        The asyncio counterpart of scan_port().
+        Uses a non-blocking connect on the event loop instead of a blocking socket
+        in its own thread. Timeouts, banners and printed output match scan_port().
+
+        :param port: The port number to scan.
+        :param target_ip: The IP address to scan. Defaults to 'self.target_ip'.
+        :return: A dictionary containing 'host', 'port', 'status', and 'banner' (if open).
         """
-        # Create an iterable range of port numbers.
-        # The 'range' function's end is exclusive, so I add 1 to include 'self.end_port'.
-        port_range = range(self.start_port, self.end_port + 1)
+        target_ip = target_ip or self.target_ip
 
-        print(f"\n[*] Starting scan on {self.target_ip} from port {self.start_port} to {self.end_port}...")
+        # Initialize output dictionary with default values.
+        output = {"host": target_ip, "port": port, "status": "closed", "banner": None}
 
-        # List to keep track of all the thread objects created.
-        all_threads: list[threading.Thread] = []
+        started = time.perf_counter()
+        try:
+            # Start a non-blocking connection and give it the same time budget
+            # the threaded engine uses. asyncio.wait_for cancels the attempt on timeout.
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(target_ip, port), timeout=self.connect_timeout_for(target_ip)
+            )
+            # The connection was accepted: a valid RTT sample.
+            self.observe_rtt(target_ip, time.perf_counter() - started)
+        except asyncio.TimeoutError:
+            # No answer within the timeout: the port is filtered (or very slow).
+            if self.verbose:
+                print(f"{self.host_prefix(target_ip)}Port {port} is CLOSED (Error Code: timed out)")
+            self.emit_result(output)
+            return output
+        except OSError as e:
+            # Connection refused, host unreachable, etc. e.errno carries the same
+            # code that connect_ex() would have returned in the threaded engine.
+            if e.errno == errno.ECONNREFUSED:
+                # A RST is an answer too, so it is a valid RTT sample.
+                self.observe_rtt(target_ip, time.perf_counter() - started)
+            if self.verbose:
+                print(f"{self.host_prefix(target_ip)}Port {port} is CLOSED (Error Code: {e.errno})")
+            self.emit_result(output)
+            return output
+
+        # Port is open.
+        output["status"] = "open"
 
         try:
-            # Iterate through each port in the defined range.
+            # --- Banner Grabbing Attempt ---
+            # Same reads, probes and time budget as the threaded engine.
+            output["banner"] = await self.grab_banner_async(reader, writer, port, target_ip)
+        except asyncio.TimeoutError:
+            # The service accepted the connection but sent nothing in time.
+            output["banner"] = "No banner (timeout)"
+        except OSError as e:
+            # Other socket errors during banner grabbing (e.g., connection reset).
+            output["banner"] = f"No banner (error: {e})"
+        finally:
+            # Always close the connection to release the file descriptor.
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass # The peer may already have reset the connection.
+
+        self.record_open_port(port, output["banner"], target_ip)
+        self.emit_result(output)
+        return output
+
+    def work_items(self, port_range: range):
+        """
+        Yields every (ip, port) pair to scan.
+
+        The pairs are interleaved port-major: port 1 on every host, then port 2 on every
+        host, and so on. This spreads each host's connections over the whole sweep, so one
+        slow or heavily filtered host can't hold up all the concurrency slots at once.
+
+        With a result cache, pairs with a fresh cached result are skipped (their cached
+        result is reused). In changed-only mode, every pair cached as open is yielded
+        first, whatever its age, so ports that went away are noticed as early as possible.
+
+        :param port_range: The ports to scan on each target.
+        """
+        if self.cache and self.changed_only:
             for port in port_range:
-                # Create a new thread for each port scan.
-                # 'target' is the function the thread will execute (self.scan_port).
-                # 'args' is a tuple of arguments passed to the target function (the current 'port').
-                scan_thread = threading.Thread(target=self.scan_port, args=(port,))
-                
-                # Start the thread, which will begin executing self.scan_port concurrently.
-                scan_thread.start()
+                for _, target_ip in self.targets:
+                    entry = self.cache.get(target_ip, port)
+                    if entry and entry["status"] == "open" and not self._already_done(target_ip, port):
+                        yield target_ip, port
+
+        for port in port_range:
+            for _, target_ip in self.targets:
+                # Skip pairs a resumed checkpoint says were already scanned.
+                if self._already_done(target_ip, port):
+                    continue
+                if self.cache:
+                    entry = self.cache.get(target_ip, port)
+                    # Cached-open pairs were already handed out above in changed-only mode.
+                    if entry and self.changed_only and entry["status"] == "open":
+                        continue
+                    # Fresh cached results are reused, not rescanned.
+                    if entry and self.cache.is_fresh(entry):
+                        continue
+                yield target_ip, port
+
+    def _already_done(self, target_ip: str, port: int) -> bool:
+        """:return: True if the checkpoint in use says the pair was already scanned."""
+        return bool(self.checkpoint) and self.checkpoint.is_done(target_ip, port)
+
+    async def _scan_range_async(self, items, item_count: int):
+        """
+        Runs the (ip, port) work items on a single asyncio event loop.
 
-                # Add the newly started thread to our list for tracking.
-                all_threads.append(scan_thread)
+        Instead of creating one task per item (which would still build 65k task
+        objects for a full sweep), a fixed number of worker coroutines pull items
+        from one shared iterator. This keeps at most 'max_connections' connections
+        in flight and keeps memory flat no matter how big the range is.
+
+        :param items: An iterator of (ip, port) pairs, see work_items().
+        :param item_count: How many items there are, used to size the worker set.
+        """
+        # A plain iterator is safe to share here: all workers run on the same
+        # thread, and 'next()' never yields control to the event loop.
+        items = iter(items)
 
-            # Wait for all threads to complete their execution.
-            # .join() on a thread blocks the main thread until that specific thread finishes.
-            # By joining all threads, I ensure that the main thread doesn't proceed to
-            # print results until all scanning is truly done.
-            for thread in all_threads:
+        async def worker():
+            for target_ip, port in items:
+                await self.scan_port_async(port, target_ip)
+
+        # Never start more workers than there are items to scan.
+        worker_count = max(1, min(self.max_connections, item_count))
+        await asyncio.gather(*(worker() for _ in range(worker_count)))
+
+    def _scan_range_pool(self, items, item_count: int):
+        """
+        Runs the (ip, port) work items on a fixed pool of 'max_connections' worker threads.
+
+        The workers are started once and pull items from a bounded queue until they
+        receive a 'None' sentinel. The queue is also fed lazily, so both the number
+        of threads and the memory used stay capped no matter how large the range is.
+
+        :param items: An iterator of (ip, port) pairs, see work_items().
+        :param item_count: How many items there are, used to size the pool.
+        """
+        # Never start more workers than there are items to scan.
+        worker_count = max(1, min(self.max_connections, item_count))
+
+        # A bounded queue: put() blocks once it is full, so the producer below
+        # never gets more than a couple of items ahead of the workers.
+        work_queue: queue.Queue = queue.Queue(maxsize=worker_count * 2)
+
+        def worker():
+            while True:
+                item = work_queue.get()
+                # 'None' is the sentinel that tells this worker to exit.
+                if item is None:
+                    break
+                target_ip, port = item
+                self.scan_port(port, target_ip)
+
+        workers = [threading.Thread(target=worker, daemon=True) for _ in range(worker_count)]
+        for thread in workers:
+            thread.start()
+
+        try:
+            # Feed every item to the pool.
+            for item in items:
+                work_queue.put(item)
+        finally:
+            # One sentinel per worker, so each of them shuts down cleanly.
+            for _ in workers:
+                work_queue.put(None)
+            for thread in workers:
                 thread.join()
 
+    def _scan_range_threaded(self, items, item_count: int):
+        """
+        Runs the (ip, port) work items with one thread per item, throttled by 'scan_semaphore'.
+
+        :param items: An iterator of (ip, port) pairs, see work_items().
+        :param item_count: How many items there are (unused, every item gets its own thread).
+        """
+        # List to keep track of all the thread objects created.
+        all_threads: list[threading.Thread] = []
+
+        # Iterate through each (ip, port) pair.
+        for target_ip, port in items:
+            # Create a new thread for each port scan.
+            # 'target' is the function the thread will execute (self.scan_port).
+            # 'args' is a tuple of arguments passed to the target function (the port and its host).
+            scan_thread = threading.Thread(target=self.scan_port, args=(port, target_ip))
+
+            # Start the thread, which will begin executing self.scan_port concurrently.
+            scan_thread.start()
+
+            # Add the newly started thread to our list for tracking.
+            all_threads.append(scan_thread)
+
+        # Wait for all threads to complete their execution.
+        # .join() on a thread blocks the main thread until that specific thread finishes.
+        # By joining all threads, I ensure that the main thread doesn't proceed to
+        # print results until all scanning is truly done.
+        for thread in all_threads:
+            thread.join()
+
+    def scan_range(self):
+        """
+        Orchestrates the scanning of a range of ports on every target using the selected engine.
+        All (host, port) pairs share one concurrency budget ('max_connections').
+        It runs the scan, waits for it to complete,
+        then prints the results grouped by host and optionally saves them.
+        """
+        # Create an iterable range of port numbers.
+        # The 'range' function's end is exclusive, so I add 1 to include 'self.end_port'.
+        port_range = range(self.start_port, self.end_port + 1)
+
+        # One work item per (host, port) pair.
+        items = self.work_items(port_range)
+        item_count = len(port_range) * len(self.targets)
+
+        targets_description = ", ".join(ip for _, ip in self.targets) if len(self.targets) <= 4 else f"{len(self.targets)} hosts"
+        print(f"\n[*] Starting {self.engine} scan on {targets_description} from port {self.start_port} to {self.end_port}...")
+
+        # With adaptive timeouts, every host gets its own RTT estimator. They start at
+        # the configured ceilings and tighten as soon as the host answers.
+        if self.adaptive_timeout:
+            self.rtt_estimators = {
+                target_ip: RttEstimator(self.min_timeout, self.connect_timeout) for _, target_ip in self.targets
+            }
+
+        # Set up checkpointing (and restore progress when resuming) before any work starts.
+        if self.checkpoint_path or self.resume_path:
+            self.checkpoint = self.open_checkpoint()
+            if self.checkpoint is None:
+                return
+            if self.resume_path:
+                # Bring back the open ports the earlier run already found, and don't
+                # count the finished pairs when sizing the worker pool.
+                self.open_ports = list(self.checkpoint.open_ports)
+                done = self.checkpoint.completed_count()
+                item_count = max(0, item_count - done)
+                print(f"[*] Resuming from '{self.resume_path}': {done} ports already scanned, {len(self.open_ports)} open.")
+
+        # Load the result cache. Fresh cached open ports count as found without being
+        # rescanned (in changed-only mode all cached-open ports are rescanned instead).
+        if self.cache_path:
+            try:
+                self.cache = ResultCache.load(self.cache_path, self.cache_ttl)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[!] Error loading result cache '{self.cache_path}': {e}. Starting with an empty cache.")
+                self.cache = ResultCache(self.cache_path, self.cache_ttl)
+            self.changes = []
+
+            if not self.changed_only:
+                reused = 0
+                for port in port_range:
+                    for _, target_ip in self.targets:
+                        entry = self.cache.get(target_ip, port)
+                        if entry and self.cache.is_fresh(entry) and not self._already_done(target_ip, port):
+                            reused += 1
+                            if entry["status"] == "open":
+                                self.open_ports.append({"host": target_ip, "port": port, "banner": entry["banner"]})
+                item_count = max(0, item_count - reused)
+                print(f"[*] Reusing {reused} cached results younger than {self.cache_ttl:g}s from '{self.cache_path}'.")
+
+        # Open the output sink before scanning, so results are written as they arrive
+        # instead of only after the whole range has finished.
+        if self.output_file_path:
+            self.sink = self.open_output_sink()
+            # Results restored from a checkpoint belong in the output file too.
+            if self.sink:
+                for open_port in self.open_ports:
+                    self.sink.write({**open_port, "status": "open"})
+
+        try:
+            if self.engine not in self.ENGINES:
+                raise ValueError(f"Unknown scan engine '{self.engine}'. Choose from: {', '.join(self.ENGINES)}")
+
+            if self.engine == "async":
+                # asyncio.run() creates the event loop, runs the scan and closes the loop.
+                asyncio.run(self._scan_range_async(items, item_count))
+            elif self.engine == "pool":
+                self._scan_range_pool(items, item_count)
+            else:
+                self._scan_range_threaded(items, item_count)
+
         except Exception as e:
             # Catch any unexpected errors that might occur during the thread creation or iteration.
             print(f"[!] Something went wrong during the port range scan: {e}")
-
-        # Sort the list of open ports by their port number for better readability in the output.
-        # The 'key=lambda x: x['port']' sorts based on the 'port' key within each dictionary.
-        self.open_ports.sort(key=lambda x: x['port'])
+        finally:
+            # Close the sink even if the scan was interrupted (e.g. Ctrl-C),
+            # so every result produced so far ends up on disk.
+            if self.sink:
+                self.sink.close()
+                print(f"[*] Scan results successfully saved to: {self.sink.file_path}")
+                self.sink = None
+            # Likewise, save the checkpoint one last time so an interrupted scan can be resumed.
+            if self.checkpoint:
+                self.checkpoint.close()
+                print(f"[*] Checkpoint saved to: {self.checkpoint.file_path}")
+                self.checkpoint = None
+            # Store the new results for the next run.
+            if self.cache:
+                self.cache.save()
+                self.cache = None
+
+        if self.cache_path and self.changed_only:
+            # Changed-only mode reports the differences from the cache instead of every open port.
+            print(f"[*] Scan complete on {targets_description}. {len(self.changes)} changes since the last scan.")
+            return
+
+        # Sort the list of open ports by host (in target order) and then by port number,
+        # so the results are grouped by host for better readability in the output.
+        target_order = {ip: index for index, (_, ip) in enumerate(self.targets)}
+        self.open_ports.sort(key=lambda x: (target_order.get(x['host'], len(target_order)), x['port']))
 
         # After all threads have completed, print the final summary of results.
-        output_lines = []
-        output_lines.append(f"[*] Scan complete on {self.target_ip}. Found {len(self.open_ports)} open ports:")
+        print(f"[*] Scan complete on {targets_description}. Found {len(self.open_ports)} open ports:")
 
-        if self.open_ports:
-            # If open ports were found, format and add each one to output_lines.
+        if not self.open_ports:
+            # If no open ports were found in the specified range.
+            print(f"No open ports found from {self.start_port} to {self.end_port}.")
+        elif len(self.targets) == 1:
+            # If open ports were found on a single host, print each one.
             for open_port in self.open_ports:
-                line = f"Port {open_port['port']} is open. Banner: {open_port['banner']}"
-                print(line) # Print to console regardless of output file option
-                output_lines.append(line)
+                print(f"Port {open_port['port']} is open. Banner: {open_port['banner']}")
         else:
-            # If no open ports were found in the specified range.
-            line = f"No open ports found from {self.start_port} to {self.end_port}."
-            print(line) # Print to console
-            output_lines.append(line)
+            # With several hosts, print a small heading per host that has open ports.
+            for host, target_ip in self.targets:
+                host_ports = [open_port for open_port in self.open_ports if open_port['host'] == target_ip]
+                if not host_ports:
+                    continue
+                name = target_ip if host == target_ip else f"{host} ({target_ip})"
+                print(f"\n[*] {name}: {len(host_ports)} open ports")
+                for open_port in host_ports:
+                    print(f"Port {open_port['port']} is open. Banner: {open_port['banner']}")
+
+    def open_checkpoint(self) -> ScanCheckpoint | None:
+        """
+        Creates a new checkpoint, or loads the one given by 'resume_path', and starts
+        saving it periodically. When resuming without a separate 'checkpoint_path',
+        progress keeps being saved to the resumed file.
 
-        # Write to file if an output path was provided.
-        # This check determines if the user requested file output.
-        if self.output_file_path:
-            # Call the helper method to write the collected output lines to a file.
-            self.output_file({"host": self.target_host, "content": output_lines})
+        :return: The checkpoint, or None if the resume file is unusable.
+        """
+        if self.resume_path:
+            try:
+                checkpoint = ScanCheckpoint.load(self.resume_path, self.checkpoint_interval)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[!] Error loading checkpoint '{self.resume_path}': {e}")
+                return None
+
+            # The bitmaps are indexed relative to the original port range, so it must match.
+            if (checkpoint.start_port, checkpoint.end_port) != (self.start_port, self.end_port):
+                print(f"[!] Checkpoint '{self.resume_path}' is for ports {checkpoint.start_port}-{checkpoint.end_port}, "
+                      f"not {self.start_port}-{self.end_port}. Use the same port range to resume.")
+                return None
+
+            if self.checkpoint_path:
+                checkpoint.file_path = self.checkpoint_path
+        else:
+            checkpoint = ScanCheckpoint(self.checkpoint_path, self.start_port, self.end_port, self.checkpoint_interval)
 
-    def output_file(self, data: dict) -> bool:
+        checkpoint.start()
+        return checkpoint
+
+    def open_output_sink(self) -> ResultSink | None:
         """
-        Handles writing the scan results to a file.
+        Opens the streaming sink that scan results are written to.
         It can use a user-specified path or generate a timestamped one.
 
-        :param data: A dictionary containing 'host' (target hostname) and 'content' (list of output strings).
-        :return: True if the file was successfully written, False otherwise.
+        :return: The opened sink, or None if the file could not be created.
         """
         def generate_filename(target_host: str) -> str:
             """
@@ -255,8 +889,16 @@ class PortScanner:
             now = datetime.now()
             # Format the date and time including seconds for more uniqueness.
             timestamp_part = now.strftime("%Y-%m-%d_%H-%M-%S")
+            # CIDR blocks and host lists contain characters that don't belong in file names.
+            safe_host = "".join(c if c.isalnum() or c in ".-" else "_" for c in target_host)
             # Combine with the target host to create a descriptive filename.
-            return f"{timestamp_part}_scan_results_for_{target_host}"
+            return f"{timestamp_part}_scan_results_for_{safe_host}"
+
+        # Look up the sink class for the requested format (log, jsonl or csv).
+        sink_class = SINKS.get(self.output_format)
+        if sink_class is None:
+            print(f"[!] Unknown output format '{self.output_format}'. Choose from: {', '.join(SINKS)}")
+            return None
 
         # Determine the final file path for writing.
         file_path = self.output_file_path
@@ -266,7 +908,6 @@ class PortScanner:
         if file_path == 'auto_generate' or file_path is None:
             # Define the base directory where auto-generated files will be stored.
             base_dir = "port-scanner_results"
-            file_extension = ".log" # Standard log file extension.
 
             # Ensure the base directory exists. If it doesn't, create it.
             # 'exist_ok=True' prevents an error if the directory already exists.
@@ -275,22 +916,16 @@ class PortScanner:
                     os.makedirs(base_dir, exist_ok=True)
                 except Exception as e:
                     print(f"[!] Error creating output directory '{base_dir}': {e}")
-                    return False # Indicate failure to create directory.
-            # Construct the full file path for the auto-generated file.
-            file_path = os.path.join(base_dir, f"{generate_filename(data['host'])}{file_extension}")
+                    return None # Indicate failure to create directory.
+            # Construct the full file path, using the extension that matches the format.
+            file_path = os.path.join(base_dir, f"{generate_filename(self.target_host)}{sink_class.EXTENSION}")
 
-        # Attempt to write the content to the determined file_path.
+        # Attempt to open the file. Results are streamed into it during the scan.
         try:
-            # Open the file in write mode ('w'). This will create the file if it doesn't exist,
-            # or overwrite it if it does.
-            with open(file_path, "w") as f:
-                # Write each line of content, ensuring a newline character is added
-                # to separate lines correctly in the file.
-                for line in data["content"]:
-                    f.write(line + "\n")
-            print(f"[*] Scan results successfully saved to: {file_path}")
-            return True # Indicate success.
+            sink = sink_class(file_path, self.target_host, self.flush_interval)
+            print(f"[*] Streaming scan results to: {file_path}")
+            return sink
         except Exception as e:
-            # Catch any errors during file writing (e.g., permission denied, invalid path).
-            print(f"[!] Error writing results to file '{file_path}': {e}")
-            return False # Indicate failure.
\ No newline at end of file
+            # Catch any errors opening the file (e.g., permission denied, invalid path).
+            print(f"[!] Error opening output file '{file_path}': {e}")
+            return None
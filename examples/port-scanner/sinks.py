@@ -0,0 +1,153 @@
+import io
+import csv
+import json
+import threading
+
+
+class ResultSink:
+    """
+    Base class for streaming scan results to a file as they are produced.
+
+    Every result is written through a buffered file as soon as the scanner hands it
+    over, and a small background thread flushes the buffer every 'flush_interval'
+    seconds. An interrupted scan therefore keeps everything up to the last flush,
+    and other tools can 'tail -f' the file while the scan is running.
+    Subclasses only decide how a result is turned into text (see format_result).
+    """
+
+    # File extension used when the output file name is generated automatically.
+    EXTENSION = ".log"
+
+    # Size of the write buffer in bytes. Results are collected here between flushes.
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, file_path: str, target: str, flush_interval: float = 1.0):
+        """
+        Opens the output file and starts the periodic flusher.
+
+        :param file_path: The path of the file to write to (it is overwritten).
+        :param target: The scanned target, used for header/footer lines.
+        :param flush_interval: Seconds between automatic flushes to disk.
+        """
+        self.file_path = file_path
+        self.target = target
+        self.flush_interval = flush_interval
+
+        # Number of results written so far, and how many of them were open ports.
+        self.results_written = 0
+        self.open_written = 0
+
+        # newline='' lets the csv module control line endings itself.
+        self.file = open(file_path, "w", buffering=self.BUFFER_SIZE, newline="")
+
+        # Results can arrive from many scan threads at once, so writes are serialized.
+        self._lock = threading.Lock()
+
+        self.write_header()
+
+        # The flusher waits on this event, which doubles as the stop signal.
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        """Flushes the buffer every 'flush_interval' seconds until the sink is closed."""
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Pushes everything buffered so far to the file."""
+        with self._lock:
+            if not self.file.closed:
+                self.file.flush()
+
+    def write(self, result: dict):
+        """
+        Writes one scan result.
+
+        :param result: A result dictionary as produced by PortScanner.scan_port().
+        """
+        text = self.format_result(result)
+        with self._lock:
+            self.file.write(text)
+            self.results_written += 1
+            if result.get("status") == "open":
+                self.open_written += 1
+
+    def close(self):
+        """Writes the footer, stops the flusher and closes the file."""
+        self._closed.set()
+        self._flusher.join()
+        with self._lock:
+            self.write_footer()
+            self.file.close()
+
+    def write_header(self):
+        """Hook for text written once before the first result. Does nothing by default."""
+
+    def write_footer(self):
+        """Hook for text written once after the last result. Does nothing by default."""
+
+    def format_result(self, result: dict) -> str:
+        """
+        Turns a result into the text written to the file.
+
+        :param result: The result dictionary.
+        :return: The formatted text, including its trailing newline.
+        """
+        raise NotImplementedError
+
+
+class LogSink(ResultSink):
+    """Human readable log lines, in the same format the scanner prints to the console."""
+
+    EXTENSION = ".log"
+
+    def write_header(self):
+        self.file.write(f"[*] Scan started on {self.target}.\n")
+
+    def write_footer(self):
+        self.file.write(f"[*] Scan complete on {self.target}. Found {self.open_written} open ports.\n")
+
+    def format_result(self, result: dict) -> str:
+        if result["status"] == "open":
+            return f"[{result['host']}] Port {result['port']} is open. Banner: {result['banner']}\n"
+        return f"[{result['host']}] Port {result['port']} is {result['status']}.\n"
+
+
+class JsonLinesSink(ResultSink):
+    """One JSON object per line (JSON Lines), convenient for 'jq' and other tools."""
+
+    EXTENSION = ".jsonl"
+
+    def format_result(self, result: dict) -> str:
+        return json.dumps(result) + "\n"
+
+
+class CsvSink(ResultSink):
+    """Comma separated values with a header row."""
+
+    EXTENSION = ".csv"
+
+    # The columns written for each result, in order.
+    FIELDS = ("host", "port", "status", "banner")
+
+    def write_header(self):
+        self.file.write(self._row(dict(zip(self.FIELDS, self.FIELDS))))
+
+    def format_result(self, result: dict) -> str:
+        return self._row(result)
+
+    def _row(self, values: dict) -> str:
+        """Formats a single CSV row, quoting banners that contain commas or newlines."""
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=self.FIELDS, extrasaction="ignore").writerow(values)
+        return buffer.getvalue()
+
+
+# Maps the '--format' values accepted by main.py to their sink classes.
+SINKS = {
+    "log": LogSink,
+    "jsonl": JsonLinesSink,
+    "csv": CsvSink,
+}
@@ -0,0 +1,67 @@
+import ipaddress
+
+
+def parse_targets(spec) -> list[str]:
+    """
+    Expands a target specification into a flat list of hosts.
+
+    The specification can be a single string or a list of strings. Each string may
+    hold several entries separated by commas or whitespace, and every entry can be:
+      - a hostname or IP address:   'example.com', '192.168.1.10'
+      - a CIDR block:               '192.168.1.0/24'
+      - a full address range:       '192.168.1.10-192.168.1.20'
+      - a last-octet range:         '192.168.1.10-20'
+
+    Duplicates are removed while the original order is kept.
+
+    :param spec: The target specification (a string or a list of strings).
+    :return: The expanded list of host strings (hostnames are not resolved here).
+    :raises ValueError: If an entry is a malformed CIDR block or range.
+    """
+    if isinstance(spec, str):
+        spec = [spec]
+
+    hosts: list[str] = []
+    for item in spec:
+        # Accept both "a,b,c" and "a b c".
+        for entry in item.replace(",", " ").split():
+            hosts.extend(_expand_entry(entry))
+
+    # dict.fromkeys keeps the first occurrence of each host, in order.
+    return list(dict.fromkeys(hosts))
+
+
+def _expand_entry(entry: str) -> list[str]:
+    """
+    Expands a single target entry (see parse_targets for the accepted forms).
+
+    :param entry: One target entry.
+    :return: The list of hosts the entry stands for.
+    """
+    # CIDR block, e.g. 10.0.0.0/24. strict=False accepts host bits being set (10.0.0.5/24).
+    if "/" in entry:
+        network = ipaddress.IPv4Network(entry, strict=False)
+        # hosts() skips the network and broadcast addresses (a /31 or /32 keeps its addresses).
+        return [str(ip) for ip in network.hosts()]
+
+    # Address range, e.g. 10.0.0.1-10.0.0.20 or 10.0.0.1-20.
+    # Only treat the entry as a range if the part before '-' is an IP address,
+    # because hostnames may legitimately contain dashes.
+    if "-" in entry:
+        first, _, last = entry.partition("-")
+        try:
+            start = ipaddress.IPv4Address(first)
+        except ValueError:
+            return [entry]
+
+        if "." not in last:
+            # Short form: only the last octet is given.
+            last = first.rsplit(".", 1)[0] + "." + last
+        end = ipaddress.IPv4Address(last)
+
+        if end < start:
+            raise ValueError(f"Invalid address range '{entry}': the end comes before the start.")
+        return [str(ipaddress.IPv4Address(value)) for value in range(int(start), int(end) + 1)]
+
+    # A plain hostname or IP address.
+    return [entry]
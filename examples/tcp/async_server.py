@@ -0,0 +1,184 @@
+import asyncio
+
+# Imported as part of the examples.tcp package or run directly from this folder.
+try:
+    from . import framing
+except ImportError:
+    import framing
+
+
+class AsyncServer:
+    """
+    The chat Server rewritten on asyncio streams.
+
+    It speaks exactly the same protocol as server.Server (a 64-byte, space-padded
+    length header followed by the UTF-8 message, and '!DISCONNECT' to leave), so the
+    existing Client works with it unchanged (including the negotiated framings of
+    framing.py; rooms are only implemented by server.Server). Instead of one thread per connection,
+    every client is a coroutine on a single event loop: an idle client costs a few
+    kilobytes of buffers rather than a thread stack, so tens of thousands of idle
+    clients fit on one core.
+    """
+    HEADER = 64
+    PORT = 9999
+    SERVER = "0.0.0.0"
+    FORMAT = 'utf-8'
+    DISCONNECT_MESSAGE = "!DISCONNECT"
+
+    # Heartbeats, as in server.Server: a "!PING" is answered with "!PONG" to its sender only.
+    # Neither is printed or broadcast (clients answer every ping they get, so a broadcast
+    # ping would make every other client pong, and every pong go to everyone).
+    PING_MESSAGE = "!PING"
+    PONG_MESSAGE = "!PONG"
+
+    # What happens to a client whose unsent data passes max_write_buffer bytes:
+    #  - "drop":       it misses broadcasts until it has caught up (the default).
+    #  - "disconnect": it is disconnected, discarding what it hadn't received.
+    SLOW_CLIENT_POLICIES = ("drop", "disconnect")
+
+    def __init__(self, host: str = None, port: int = None, backlog: int = 1024,
+                 framings: tuple[str, ...] = framing.FRAMINGS,
+                 max_write_buffer: int = 1024 * 1024, slow_client_policy: str = "drop"):
+        self.SERVER = host if host else AsyncServer.SERVER
+        self.PORT = port if port else AsyncServer.PORT
+        self.ADDR = (self.SERVER, self.PORT)
+        self.backlog = backlog
+
+        # write() never blocks, it appends to the transport's buffer; without a limit a client
+        # that never reads would make the server's memory grow without bound.
+        if slow_client_policy not in self.SLOW_CLIENT_POLICIES:
+            raise ValueError(f"Unknown slow-client policy '{slow_client_policy}'. Choose from: {', '.join(self.SLOW_CLIENT_POLICIES)}")
+        self.max_write_buffer = max_write_buffer
+        self.slow_client_policy = slow_client_policy
+
+        # Keep track of active connections: writer -> client address.
+        # Only touched from the event loop thread, so no lock is needed.
+        self._active_connections: dict[asyncio.StreamWriter, tuple] = {}
+
+        # Framings clients may negotiate, and each client's outgoing framing (legacy unless negotiated).
+        self.framings = framings
+        self._outgoing_framings: dict[asyncio.StreamWriter, str] = {}
+
+    def start(self):
+        """Run the server until interrupted (blocks, like Server.start)."""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("[S][SERVER STOPPED]")
+
+    async def serve(self):
+        """Listen and serve clients forever on the running event loop."""
+        server = await asyncio.start_server(self.handle_client, self.SERVER, self.PORT, backlog=self.backlog)
+        print(f"[S][SERVER LISTENING] Listening on {self.SERVER}:{self.PORT} (asyncio)")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        address = writer.get_extra_info("peername")
+        self._active_connections[writer] = address
+        print(f"[S][NEW CONNECTION] {address} connected")
+        print(f"[S][ACTIVE CONNECTIONS] {len(self._active_connections)}")
+
+        incoming_framing = framing.LEGACY
+        first_message = True
+        try:
+            while True:
+                # readexactly() waits for the whole header/message, however TCP splits it.
+                message_length_header = await reader.readexactly(framing.header_size(incoming_framing))
+                message_length = framing.parse_header(message_length_header, incoming_framing)
+                received_message = (await reader.readexactly(message_length)).decode(self.FORMAT)
+
+                # A framing negotiation is only valid as the very first message.
+                requested_framing = framing.parse_negotiation(received_message) if first_message else None
+                first_message = False
+                if requested_framing is not None:
+                    incoming_framing = self.negotiate_framing(writer, address, requested_framing)
+                    continue
+
+                if received_message == self.PONG_MESSAGE:
+                    continue
+                if received_message == self.PING_MESSAGE:
+                    writer.write(self.frame_message(self.PONG_MESSAGE, self._outgoing_framings.get(writer, framing.LEGACY)))
+                    continue
+
+                print(f"[S][{address}] {received_message}")
+
+                if received_message == self.DISCONNECT_MESSAGE:
+                    break
+
+                # BROADCAST THE MESSAGE (disconnect messages are never broadcast)
+                self.broadcast_message(writer, received_message)
+
+        except asyncio.IncompleteReadError:
+            pass # Client disconnected gracefully (EOF between or inside frames)
+        except ConnectionResetError:
+            print(f"[S][FORCED DISCONNECT] {address} forcefully disconnected.")
+        except ValueError as ve: # Catch errors if message_length is not a valid int
+            print(f"[S][PROTOCOL ERROR {address}] Invalid message length header: {ve}")
+        except Exception as e:
+            print(f"[S][ERROR HANDLING {address}] {e}")
+
+        # Client disconnected, clean up
+        print(f"[S][DISCONNECTED] {address} disconnected")
+        self._active_connections.pop(writer, None)
+        self._outgoing_framings.pop(writer, None)
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError as e:
+            print(f"[S][CLOSE ERROR] Error closing socket for {address}: {e}")
+
+        print(f"[S][ACTIVE CONNECTIONS] {len(self._active_connections)}")
+
+    def negotiate_framing(self, writer: asyncio.StreamWriter, address, requested_framing: str) -> str:
+        """
+        Answer a client's framing request (in the legacy framing) and switch its outgoing framing.
+
+        :return: The framing the client's messages use from now on.
+        """
+        accepted = requested_framing if requested_framing in self.framings else framing.LEGACY
+        print(f"[S][FRAMING] {address} requested '{requested_framing}', using '{accepted}'")
+        # write() is synchronous, so no broadcast can slip in between the answer and the switch.
+        writer.write(self.frame_message(framing.negotiation_request(accepted)))
+        self._outgoing_framings[writer] = accepted
+        return accepted
+
+    def frame_message(self, message: str, framing_name: str = framing.LEGACY) -> bytes:
+        """Encode a message with its length header, as one buffer."""
+        return framing.frame(message.encode(self.FORMAT), framing_name)
+
+    def broadcast_message(self, sender: asyncio.StreamWriter, message: str):
+        """
+        Broadcasts a message to all clients except the sender.
+
+        A client with more than max_write_buffer bytes still unsent misses the message, or is
+        disconnected, depending on the slow-client policy.
+        """
+        # Encode once and frame once per framing in use; write() only appends to each
+        # transport's buffer and never blocks, so a slow client can't hold up the others.
+        encoded_message = message.encode(self.FORMAT)
+        frames: dict[str, bytes] = {}
+        for writer in list(self._active_connections):
+            if writer is sender or writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_write_buffer:
+                if self.slow_client_policy == "drop":
+                    continue
+                print(f"[S][SLOW CLIENT] {self._active_connections.get(writer)} can't keep up, disconnecting.")
+                self._active_connections.pop(writer, None)
+                writer.transport.abort() # Unlike close(), doesn't wait to send the backlog first
+                continue
+            client_framing = self._outgoing_framings.get(writer, framing.LEGACY)
+            if client_framing not in frames:
+                frames[client_framing] = framing.frame(encoded_message, client_framing)
+            try:
+                writer.write(frames[client_framing])
+            except Exception as e:
+                address_for_log = self._active_connections.get(writer, "UNKNOWN_ADDR")
+                print(f"[S][BROADCAST ERROR] Failed to send to client {address_for_log}: {e}")
+                self._active_connections.pop(writer, None)
+                writer.close()
+
+
+if __name__ == "__main__":
+    AsyncServer().start()
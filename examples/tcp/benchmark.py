@@ -0,0 +1,199 @@
+import sys
+import time
+import socket
+import argparse
+import resource
+import selectors
+import subprocess
+
+import framing
+
+FORMAT = 'utf-8'
+
+
+def serve(kind: str, port: int):
+    """Run one of the servers in this (child) process."""
+    if kind == "async":
+        from async_server import AsyncServer
+        AsyncServer(host="127.0.0.1", port=port).start()
+    else:
+        from server import Server
+        Server(host="127.0.0.1", port=port).start()
+
+
+def process_stats(pid: int) -> tuple[float, int]:
+    """Read a process's resident memory (MiB) and thread count from /proc (Linux only)."""
+    rss_kb, threads = 0, 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+            elif line.startswith("Threads:"):
+                threads = int(line.split()[1])
+    return rss_kb / 1024, threads
+
+
+def wait_for_server(port: int, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+
+def stop_server(process: subprocess.Popen, port: int, timeout: float = 10.0):
+    """
+    Stop a server process with SIGTERM, wait for it to exit, and make sure it left
+    nothing (e.g. worker processes) listening on its port.
+    """
+    process.terminate()
+    process.wait(timeout)
+    try:
+        socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+    except ConnectionRefusedError:
+        return
+    raise RuntimeError(f"Port {port} is still in use after the server exited")
+
+
+def exchange(outgoing: dict[socket.socket, bytes], expected: dict[socket.socket, int], timeout: float = 60) -> int:
+    """
+    Pipelined chat traffic: every socket sends its bytes while reading what the server
+    relays to it, until each has received its expected number of bytes.
+
+    :return: How many sockets didn't receive everything (nothing arrived for `timeout` seconds,
+             or the server closed them).
+    """
+    selector = selectors.DefaultSelector()
+    outgoing = {sock: memoryview(data) for sock, data in outgoing.items()}
+    expected = dict(expected)
+    for sock in expected:
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+
+    buffer = bytearray(256 * 1024)
+    remaining = len(expected)
+    while remaining:
+        events = selector.select(timeout=timeout)
+        if not events:
+            break # Stalled; report it
+        for key, mask in events:
+            sock = key.fileobj
+            if mask & selectors.EVENT_WRITE and sock in outgoing:
+                try:
+                    sent = sock.send(outgoing[sock])
+                except BlockingIOError:
+                    sent = 0
+                outgoing[sock] = outgoing[sock][sent:]
+                if not outgoing[sock]:
+                    del outgoing[sock]
+                    selector.modify(sock, selectors.EVENT_READ)
+            if mask & selectors.EVENT_READ:
+                try:
+                    size = sock.recv_into(buffer)
+                except BlockingIOError:
+                    continue
+                expected[sock] -= size
+                if not size or (expected[sock] <= 0 and sock not in outgoing):
+                    selector.unregister(sock)
+                    remaining -= 1
+    selector.close()
+    return sum(1 for left in expected.values() if left > 0)
+
+
+def run(kind: str, port: int, client_count: int, rounds: int) -> dict:
+    """Start a server, connect idle clients, then time broadcasts reaching all of them."""
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", kind, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    clients: list[socket.socket] = []
+    try:
+        wait_for_server(port)
+
+        # Connect the idle clients.
+        started = time.perf_counter()
+        for _ in range(client_count):
+            clients.append(socket.create_connection(("127.0.0.1", port)))
+        connect_time = time.perf_counter() - started
+
+        # Give the server a moment to accept everyone before measuring it.
+        time.sleep(1)
+        rss_mib, threads = process_stats(process.pid)
+
+        # One extra client broadcasts; every idle client must receive the message.
+        sender = socket.create_connection(("127.0.0.1", port))
+        time.sleep(0.2)
+        selector = selectors.DefaultSelector()
+        for client in clients:
+            client.setblocking(False)
+            selector.register(client, selectors.EVENT_READ)
+
+        message = framing.frame("[bench] hello everyone".encode(FORMAT))
+        fanout_times = []
+        for _ in range(rounds):
+            remaining = {client: len(message) for client in clients}
+            started = time.perf_counter()
+            sender.sendall(message)
+            while remaining:
+                events = selector.select(timeout=30)
+                if not events:
+                    raise RuntimeError(f"Broadcast stalled with {len(remaining)} clients still waiting")
+                for key, _ in events:
+                    data = key.fileobj.recv(65536)
+                    if not data:
+                        raise RuntimeError("Server closed a client connection")
+                    if key.fileobj in remaining:
+                        remaining[key.fileobj] -= len(data)
+                        if remaining[key.fileobj] <= 0:
+                            del remaining[key.fileobj]
+            fanout_times.append(time.perf_counter() - started)
+
+        selector.close()
+        sender.close()
+        return {
+            "connect_time": connect_time,
+            "rss_mib": rss_mib,
+            "threads": threads,
+            "fanout": sum(fanout_times) / len(fanout_times),
+        }
+    finally:
+        for client in clients:
+            client.close()
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the threaded Server and the AsyncServer with many idle clients")
+    parser.add_argument("-c", "--clients", type=int, default=10000, help="Number of idle clients. Defaults to 10000.")
+    parser.add_argument("-r", "--rounds", type=int, default=5, help="Broadcasts to time per server. Defaults to 5.")
+    parser.add_argument("-p", "--port", type=int, default=9990, help="Base port; each server gets its own. Defaults to 9990.")
+    parser.add_argument("--servers", nargs="+", choices=["threaded", "async"], default=["threaded", "async"])
+    # Internal: run a server in this process (used for the child processes).
+    parser.add_argument("--serve", choices=["threaded", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    # Every client needs a file descriptor on this side.
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.clients + 64 > hard:
+        print(f"[!] The file descriptor limit ({hard}) is too low for {args.clients} clients.")
+        return
+
+    print(f"[*] {args.clients} idle clients, {args.rounds} broadcasts each\n")
+    print(f"{'server':<10} {'connect (s)':>12} {'RSS (MiB)':>10} {'threads':>8} {'fan-out (ms)':>13}")
+    for index, kind in enumerate(args.servers):
+        result = run(kind, args.port + index, args.clients, args.rounds)
+        print(f"{kind:<10} {result['connect_time']:>12.2f} {result['rss_mib']:>10.1f} "
+              f"{result['threads']:>8} {result['fanout'] * 1000:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
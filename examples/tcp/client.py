@@ -1,4 +1,10 @@
-import socket, random, threading, os
+import socket, random, threading, os, time
+
+# Imported as part of the examples.tcp package (main.py) or run directly from this folder.
+try:
+    from . import framing
+except ImportError:
+    import framing
 
 
 class Client:
@@ -12,7 +18,17 @@ class Client:
     FORMAT = 'utf-8'
     DISCONNECT_MESSAGE = "!DISCONNECT"
 
-    def __init__(self, server_ip=None, port=None, name=None):
+    # Room commands (see Server): sent as they are, without the name prefix.
+    SUBSCRIBE_COMMAND = "!SUBSCRIBE"
+    UNSUBSCRIBE_COMMAND = "!UNSUBSCRIBE"
+    PUBLISH_COMMAND = "!PUBLISH"
+
+    # Heartbeats (see Server): a "!PING" from the server is answered with "!PONG"; neither is printed.
+    PING_MESSAGE = "!PING"
+    PONG_MESSAGE = "!PONG"
+
+    def __init__(self, server_ip=None, port=None, name=None, framing_mode=framing.LEGACY, negotiation_timeout=5.0,
+                 batch_interval_us=0, batch_max_bytes=64 * 1024, nodelay=False):
         # Initialize client attributes
         self.HEADER = Client.HEADER
         self.SERVER = server_ip if server_ip else Client.SERVER
@@ -21,43 +37,98 @@ class Client:
         self.FORMAT = Client.FORMAT
         self.name = name if name else f"Client_{random.randint(10000, 99999)}"
 
+        # Wire framing (see framing.py). Anything but legacy is negotiated right after connecting.
+        if framing_mode not in framing.FRAMINGS:
+            raise ValueError(f"Unknown framing '{framing_mode}'. Choose from: {', '.join(framing.FRAMINGS)}")
+        self.framing = framing.LEGACY
+        self._reader = None # Set up once connected
+
+        # Batching: when batch_interval_us is set, send() only queues the framed message; the
+        # queue is flushed with a single sendmsg() once the oldest message has waited that many
+        # microseconds, or straight away once batch_max_bytes are queued. 0 sends every message at once.
+        self.batch_interval_us = batch_interval_us
+        self.batch_max_bytes = batch_max_bytes
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
+        self._batch_deadline = 0.0
+        self._batch_condition = threading.Condition() # Protects the pending batch
+        self._send_lock = threading.Lock() # Keeps concurrent flushes from interleaving on the socket
+
         # Create a TCP/IP socket for the client
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.connected = False # Flag to track client connection status
 
+        # TCP_NODELAY turns off Nagle's algorithm: every write goes out immediately (lowest latency)
+        # instead of small writes being held back and merged while data is unacknowledged (fewer packets).
+        self.nodelay = nodelay
+        if nodelay:
+            self.client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
         try:
             # Connect the client to the server
             self.client.connect((self.SERVER, self.PORT))
             self.connected = True
             print(f"[C][CLIENT CONNECTED] Connected to the server {self.SERVER}:{self.PORT}")
 
+            # Reassembles whole frames however TCP splits them (shared by the negotiation and the receive thread)
+            self._reader = framing.FrameReader(self.client)
+
+            if framing_mode != framing.LEGACY:
+                self._negotiate_framing(framing_mode, negotiation_timeout)
+
             # --- Start a separate thread to receive messages ---
             # This thread will continuously listen for data from the server
             self.receive_thread = threading.Thread(target=self._receive_messages, daemon=True)
             self.receive_thread.start()
 
+            if self.batch_interval_us:
+                # Flushes each batch when its time window closes
+                self.flush_thread = threading.Thread(target=self._flush_batches, daemon=True)
+                self.flush_thread.start()
+
         except Exception as e:
             print(f"[C][ERROR] Could not connect to server {self.SERVER}:{self.PORT}: {e}")
             self.connected = False # Connection failed
 
+    def _negotiate_framing(self, requested_framing: str, timeout: float):
+        """
+        Ask the server for another framing and wait for its answer (before the receive thread starts).
+
+        Stays on the legacy framing if the server refuses or doesn't answer in time.
+        """
+        self.client.sendall(framing.frame(framing.negotiation_request(requested_framing).encode(self.FORMAT)))
+        self.client.settimeout(timeout)
+        try:
+            for payload in self._reader:
+                message = str(payload, self.FORMAT)
+
+                accepted = framing.parse_negotiation(message)
+                if accepted is None:
+                    print(f"{message}") # A broadcast that arrived before the answer
+                    continue
+                self.framing = self._reader.framing = accepted if accepted in framing.FRAMINGS else framing.LEGACY
+                print(f"[C][FRAMING] Using '{self.framing}' framing")
+                return
+            raise ConnectionResetError("Server closed the connection during framing negotiation")
+        except socket.timeout:
+            print(f"[C][FRAMING] No answer from the server, staying on '{self.framing}' framing")
+        finally:
+            self.client.settimeout(None)
+
     def _receive_messages(self):
         """Internal method for the client to continuously receive messages from the server."""
-        while self.connected:
-            try:
-                # Receive the message length header
-                message_length_header = self.client.recv(self.HEADER)
-                
-                # If recv returns 0 bytes, the server has closed its side of the connection gracefully
-                if not message_length_header:
-                    print("[C][SERVER DISCONNECTED] Server closed connection or sent no data.")
-                    self.connected = False # Mark as disconnected
-                    break # Exit the loop
-
-                # Decode and parse the message length
-                message_length = int(message_length_header.decode(self.FORMAT).strip())
-                
-                # Receive the actual message data
-                received_message = self.client.recv(message_length).decode(self.FORMAT)
+        try:
+            # Receive whole messages; the reader may get several out of a single recv
+            for payload in self._reader:
+                if not self.connected: # disconnect() was called meanwhile
+                    break
+
+                received_message = str(payload, self.FORMAT)
+                if received_message == self.PING_MESSAGE:
+                    self._send_text(self.PONG_MESSAGE, self.PONG_MESSAGE) # Tell the server we're still here
+                    continue
+                if received_message == self.PONG_MESSAGE:
+                    continue
                 
                 # Print the received message to the client's console
                 print(f"{received_message}")
@@ -65,22 +136,20 @@ class Client:
                 # import sys
                 # sys.stdout.write(f"\n[RECEIVED] {received_message}\n{self.name}: ")
                 # sys.stdout.flush()
+            else:
+                # The reader stops when the server has closed its side of the connection gracefully
+                print("[C][SERVER DISCONNECTED] Server closed connection or sent no data.")
 
-            except ConnectionResetError:
-                # This error occurs if the server forcefully closes the connection
-                print("[C][DISCONNECTED] Server forcefully closed connection.")
-                self.connected = False
-                break # Exit the loop
-            except ValueError as ve:
-                # Error if the received header is not a valid integer
-                print(f"[C][RECEIVE ERROR] Invalid message length header: {ve}")
-                self.connected = False
-                break
-            except Exception as e:
-                # Catch any other unexpected errors during reception
-                print(f"[C][RECEIVE ERROR] An unexpected error occurred during reception: {e}")
-                self.connected = False
-                break
+        except ConnectionResetError:
+            # This error occurs if the server forcefully closes the connection
+            print("[C][DISCONNECTED] Server forcefully closed connection.")
+        except ValueError as ve:
+            # Error if the received header is not a valid integer
+            print(f"[C][RECEIVE ERROR] Invalid message length header: {ve}")
+        except Exception as e:
+            # Catch any other unexpected errors during reception
+            print(f"[C][RECEIVE ERROR] An unexpected error occurred during reception: {e}")
+        self.connected = False # Mark as disconnected
         
         # Cleanup when the receive loop exits (due to disconnect or error)
         try:
@@ -109,22 +178,59 @@ class Client:
         # Prepend the client's name to the message for identification on the server/other clients
         message_with_name = f"[{self.name}] {message}" 
 
-        # Encode the message and calculate its length
-        encoded_message = message_with_name.encode(self.FORMAT)
-        message_length = len(encoded_message)
-        
-        # Prepare the header: pad the length with spaces to match HEADER size
-        send_length = str(message_length).encode(self.FORMAT)
-        send_length += b' ' * (self.HEADER - len(send_length)) # Pad with spaces
+        if self._send_text(message_with_name, message):
+            print(f"{self.name}: {message}") # Print original string as typed by user/application
+            return True # Indicate successful send
+        return False
+
+    def ping(self) -> bool:
+        """Ask the server for a "!PONG" (e.g. to keep a connection that only listens alive through a NAT)."""
+        if not self.connected:
+            return False
+        return self._send_text(self.PING_MESSAGE, self.PING_MESSAGE)
+
+    def subscribe(self, room: str) -> bool:
+        """Join a room: receive the messages published to it and sent by its members."""
+        return self._send_room_command(self.SUBSCRIBE_COMMAND, room)
+
+    def unsubscribe(self, room: str) -> bool:
+        """Leave a room (every client starts out in the server's default room, 'lobby')."""
+        return self._send_room_command(self.UNSUBSCRIBE_COMMAND, room)
+
+    def publish(self, room: str, message: str) -> bool:
+        """Send a message to one room only (no need to be subscribed to it)."""
+        if not message or not message.strip():
+            return False
+        if self._send_room_command(self.PUBLISH_COMMAND, room, f"[{self.name}] {message}"):
+            print(f"{self.name} #{room}: {message}")
+            return True
+        return False
+
+    def _send_room_command(self, command: str, room: str, argument: str = None) -> bool:
+        if not self.connected:
+            print("[C][SEND ERROR] Not connected to server. Cannot send message.")
+            return False
+        if not room or " " in room:
+            print(f"[C][SEND ERROR] Invalid room name '{room}'.")
+            return False
+        text = f"{command} {room} {argument}" if argument else f"{command} {room}"
+        return self._send_text(text, text)
+
+    def _send_text(self, text: str, description: str) -> bool:
+        """Frame a protocol message and send it (or queue it, when batching)."""
+        # Encode the message and prefix it with its length header (in the negotiated framing)
+        frame = framing.frame(text.encode(self.FORMAT), self.framing)
 
         try:
-            # Use sendall for reliability to ensure all bytes are sent
-            self.client.sendall(send_length)      # First, send the length header
-            self.client.sendall(encoded_message)  # Then, send the actual message
-            print(f"{self.name}: {message}") # Print original string as typed by user/application
+            if self.batch_interval_us:
+                self._queue_frame(frame) # Sent with the rest of its batch
+            else:
+                # Use sendall for reliability to ensure all bytes are sent
+                with self._send_lock:
+                    self.client.sendall(frame) # Header and message in one call
             return True # Indicate successful send
         except Exception as e:
-            print(f"[C][SEND ERROR] Failed to send message '{message}': {e}")
+            print(f"[C][SEND ERROR] Failed to send message '{description}': {e}")
             self.connected = False # Mark client as disconnected on send failure
             try:
                 self.client.close() # Close socket to clean up connection
@@ -132,6 +238,54 @@ class Client:
                 pass # Already closed
             return False
 
+    def _queue_frame(self, frame: bytes):
+        """Add a frame to the pending batch, flushing it right away if it's full."""
+        with self._batch_condition:
+            self._pending.append(frame)
+            self._pending_bytes += len(frame)
+            if len(self._pending) == 1:
+                # First message of a new batch: its time window starts now
+                self._batch_deadline = time.monotonic() + self.batch_interval_us / 1_000_000
+                self._batch_condition.notify_all()
+            batch_full = self._pending_bytes >= self.batch_max_bytes
+
+        if batch_full:
+            self.flush() # In the sending thread, which also slows down a sender that outpaces the socket
+
+    def flush(self):
+        """Send every queued message now, with one sendmsg() (see framing.send_buffers)."""
+        with self._send_lock:
+            # Take the batch while holding the send lock, so batches go out in the order they were queued
+            with self._batch_condition:
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+                self._batch_condition.notify_all()
+            if batch:
+                framing.send_buffers(self.client, batch)
+
+    def _flush_batches(self):
+        """Internal method (own thread) that flushes each batch when its time window closes."""
+        while self.connected:
+            with self._batch_condition:
+                self._batch_condition.wait_for(lambda: self._pending or not self.connected)
+                # Wait out the window; send() may flush a full batch early, or start a new one meanwhile
+                while self._pending and self.connected:
+                    remaining = self._batch_deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._batch_condition.wait(remaining)
+            if not self.connected:
+                break
+
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[C][SEND ERROR] Failed to send batched messages: {e}")
+                self.connected = False # Mark client as disconnected on send failure
+                try:
+                    self.client.close() # Close socket to clean up connection
+                except OSError:
+                    pass # Already closed
+
     def disconnect(self):
         """Send a disconnect message to the server and close the client socket."""
         if not self.connected:
@@ -142,6 +296,7 @@ class Client:
             # Attempt to send the disconnect message
             # The 'send' method will internally set self.connected=False and close the socket if it fails.
             if self.send(self.DISCONNECT_MESSAGE):
+                self.flush() # Anything still batched, the disconnect message included
                 print("[C][CLIENT DISCONNECTED] Disconnect message sent.")
             else:
                 print("[C][CLIENT DISCONNECTED] Could not send disconnect message (already disconnected?).")
@@ -150,6 +305,8 @@ class Client:
         finally:
             # Ensure connected flag is false and socket is closed, regardless of send success
             self.connected = False
+            with self._batch_condition:
+                self._batch_condition.notify_all() # Let the flush thread exit
             try:
                 if self.client: # Ensure self.client exists before attempting to close
                     self.client.shutdown(socket.SHUT_RDWR) # Attempt graceful shutdown
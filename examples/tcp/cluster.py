@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import socket
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import multiprocessing
+
+# Imported as part of the examples.tcp package or run directly from this folder.
+try:
+    from . import framing
+    from .server import Server, ClientOutbox
+except ImportError:
+    import framing
+    from server import Server, ClientOutbox
+
+
+class PeerBus:
+    """
+    Links the worker processes of a cluster, so a room message posted on one worker
+    also reaches that room's subscribers connected to the other workers.
+
+    The workers form a full mesh over Unix domain stream sockets: each one listens on
+    its own socket path, and connects to every other worker's to send. A bus message
+    is a JSON object {"rooms": [...], "message": "..."} in a binary-framed frame.
+    """
+
+    def __init__(self, index: int, socket_paths: list[str], on_message):
+        """
+        :param index: This worker's position in socket_paths.
+        :param socket_paths: Every worker's socket path.
+        :param on_message: Called with (rooms, message) for every message from another worker.
+        """
+        self.index = index
+        self.socket_paths = socket_paths
+        self.on_message = on_message
+
+        # One outgoing connection per other worker, each with a lock so frames don't interleave.
+        self._peers: list[tuple[socket.socket, threading.Lock]] = []
+
+        if os.path.exists(socket_paths[index]):
+            os.unlink(socket_paths[index])
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(socket_paths[index])
+        self.listener.listen()
+        threading.Thread(target=self._accept_peers, daemon=True).start()
+
+    def connect(self, timeout: float = 10.0):
+        """Connect to every other worker, waiting for the ones that haven't started yet."""
+        deadline = time.monotonic() + timeout
+        for index, path in enumerate(self.socket_paths):
+            if index == self.index:
+                continue
+            while True:
+                peer = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    peer.connect(path)
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    peer.close()
+                    if time.monotonic() > deadline:
+                        raise TimeoutError(f"Worker {index} did not come up ({path})")
+                    time.sleep(0.05)
+            self._peers.append((peer, threading.Lock()))
+
+    def publish(self, rooms: list[str], message: str):
+        """Send a room message to every other worker."""
+        if not self._peers or not rooms:
+            return
+        payload = json.dumps({"rooms": rooms, "message": message}).encode(framing.FORMAT)
+        frame = framing.frame(payload, framing.BINARY)
+        for peer, lock in self._peers:
+            try:
+                with lock:
+                    peer.sendall(frame)
+            except OSError as e:
+                print(f"[BUS][SEND ERROR] Worker {self.index} failed to reach a peer: {e}")
+
+    def _accept_peers(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                break # Listener closed
+            threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+
+    def _receive(self, connection: socket.socket):
+        """Hand every message from one other worker to on_message."""
+        try:
+            for payload in framing.FrameReader(connection, framing.BINARY):
+                data = json.loads(str(payload, framing.FORMAT))
+                self.on_message(data["rooms"], data["message"])
+        except (OSError, ValueError) as e:
+            print(f"[BUS][RECEIVE ERROR] Worker {self.index}: {e}")
+        finally:
+            connection.close()
+
+    def close(self):
+        self.listener.close()
+        for peer, _ in self._peers:
+            peer.close()
+
+
+def run_worker(index: int, host: str, port: int, socket_paths: list[str], slow_client_policy: str):
+    """One worker process: a Server sharing the port with the others, linked to them by a PeerBus."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL) # Not the launcher's handler: terminate() just stops it
+    server = Server(host=host, port=port, slow_client_policy=slow_client_policy, reuse_port=True)
+    bus = PeerBus(index, socket_paths, server.deliver_from_bus)
+    bus.connect()
+    server.bus = bus
+    print(f"[CLUSTER] Worker {index} (pid {os.getpid()}) ready")
+    server.start()
+
+
+def _stop(signum, frame):
+    """SIGTERM handler: leave the way Ctrl-C does, through main()'s cleanup."""
+    raise SystemExit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the chat Server as several worker processes sharing one port")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="Worker processes. Defaults to the number of CPUs.")
+    parser.add_argument("--host", default=Server.SERVER, help=f"Address to listen on. Defaults to {Server.SERVER}.")
+    parser.add_argument("-p", "--port", type=int, default=Server.PORT, help=f"Port to listen on. Defaults to {Server.PORT}.")
+    parser.add_argument("--slow-client-policy", choices=ClientOutbox.POLICIES, default="drop_oldest",
+                        help="What to do when a client's outbox is full. Defaults to drop_oldest.")
+    args = parser.parse_args()
+
+    if not hasattr(socket, "SO_REUSEPORT"):
+        print("[!] SO_REUSEPORT is not available on this platform.")
+        return
+
+    # The bus sockets live in a private temporary directory.
+    bus_directory = tempfile.mkdtemp(prefix="chat-cluster-")
+    socket_paths = [os.path.join(bus_directory, f"worker-{index}.sock") for index in range(args.workers)]
+
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(index, args.host, args.port, socket_paths, args.slow_client_policy), daemon=True)
+        for index in range(args.workers)
+    ]
+    # Stopped with SIGTERM (kill, a service manager, a benchmark), the workers must be
+    # stopped and the bus directory removed too, not only on Ctrl-C.
+    signal.signal(signal.SIGTERM, _stop)
+    for worker in workers:
+        worker.start()
+    print(f"[CLUSTER] {args.workers} workers listening on {args.host}:{args.port}")
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        print("[CLUSTER] Stopping workers")
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+        shutil.rmtree(bus_directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
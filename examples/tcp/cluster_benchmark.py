@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import multiprocessing
+
+import framing
+from benchmark import stop_server, exchange
+from framing_benchmark import connect
+
+FORMAT = 'utf-8'
+
+
+def room_traffic(room: int, room_size: int, messages: int) -> list[bytes]:
+    """Every member's pipelined messages (binary framed), as one buffer per member."""
+    return [
+        b"".join(framing.frame(f"[r{room}m{member}] message {i}".encode(FORMAT), framing.BINARY) for i in range(messages))
+        for member in range(room_size)
+    ]
+
+
+def drive(port: int, rooms: list[int], room_size: int, messages: int, barrier, results):
+    """
+    Driver process: connect the members of some rooms, then have every member send its
+    messages while reading its room-mates'. Reports (deliveries, start, finish).
+    """
+    expected: dict[socket.socket, int] = {}
+    outgoing: dict[socket.socket, memoryview] = {}
+
+    for room in rooms:
+        traffic = room_traffic(room, room_size, messages)
+        room_bytes = sum(len(buffer) for buffer in traffic)
+        for member in range(room_size):
+            sock = connect(port, framing.BINARY)
+            # Leave the lobby, so this member only hears its own room.
+            sock.sendall(framing.frame(b"!UNSUBSCRIBE lobby", framing.BINARY) +
+                         framing.frame(f"!SUBSCRIBE room{room}".encode(FORMAT), framing.BINARY))
+            expected[sock] = room_bytes - len(traffic[member]) # Everything but its own messages
+            outgoing[sock] = memoryview(traffic[member])
+
+    barrier.wait() # Everyone is connected
+    barrier.wait() # The subscriptions have settled: go
+
+    started = time.monotonic()
+    stalled = exchange(outgoing, expected)
+    finished = time.monotonic()
+
+    deliveries = len(expected) * messages * (room_size - 1)
+    results.put((deliveries if not stalled else 0, started, finished, stalled))
+    for sock in expected:
+        sock.close()
+
+
+def run(workers: int, port: int, clients: int, room_size: int, messages: int, drivers: int) -> dict:
+    """Start a cluster, drive the chat traffic through it and measure the throughput."""
+    process = subprocess.Popen(
+        [sys.executable, "cluster.py", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+         "--slow-client-policy", "block"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        time.sleep(1 + 0.1 * workers) # Let the workers bind and link up their bus
+
+        rooms = list(range(clients // room_size))
+        barrier = multiprocessing.Barrier(drivers + 1)
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=drive, args=(port, rooms[index::drivers], room_size, messages, barrier, results))
+            for index in range(drivers)
+        ]
+        for driver in processes:
+            driver.start()
+        barrier.wait()
+        time.sleep(1)
+        barrier.wait()
+
+        outcomes = [results.get(timeout=300) for _ in processes]
+        for driver in processes:
+            driver.join()
+
+        elapsed = max(finished for _, _, finished, _ in outcomes) - min(started for _, started, _, _ in outcomes)
+        stalled = sum(stalled for *_, stalled in outcomes)
+        return {
+            "elapsed": elapsed,
+            "sent": len(rooms) * room_size * messages,
+            "deliveries": sum(deliveries for deliveries, *_ in outcomes),
+            "stalled": stalled,
+        }
+    finally:
+        stop_server(process, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure chat throughput of the SO_REUSEPORT cluster for several worker counts")
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to try. Defaults to 1 2 4 8.")
+    parser.add_argument("-c", "--clients", type=int, default=64, help="Connected clients. Defaults to 64.")
+    parser.add_argument("-s", "--room-size", type=int, default=4, help="Clients per room. Defaults to 4.")
+    parser.add_argument("-m", "--messages", type=int, default=200, help="Messages each client sends. Defaults to 200.")
+    parser.add_argument("-d", "--drivers", type=int, default=os.cpu_count(), help="Load generating processes. Defaults to the number of CPUs.")
+    parser.add_argument("-p", "--port", type=int, default=9970, help="Base port; each run gets its own. Defaults to 9970.")
+    args = parser.parse_args()
+
+    if args.clients % args.room_size:
+        parser.error("--clients must be a multiple of --room-size")
+
+    print(f"[*] {os.cpu_count()} CPUs, {args.clients} clients in rooms of {args.room_size}, "
+          f"{args.messages} messages per client, {args.drivers} driver processes\n")
+    print(f"{'workers':>7} {'time (s)':>9} {'msgs/s':>10} {'deliveries/s':>13}")
+    for index, workers in enumerate(args.workers):
+        result = run(workers, args.port + index, args.clients, args.room_size, args.messages, args.drivers)
+        if result["stalled"]:
+            print(f"{workers:>7} stalled: {result['stalled']} clients did not receive everything")
+            continue
+        print(f"{workers:>7} {result['elapsed']:>9.2f} {result['sent'] / result['elapsed']:>10.0f} "
+              f"{result['deliveries'] / result['elapsed']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
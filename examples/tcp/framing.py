@@ -0,0 +1,179 @@
+import os
+import socket
+import struct
+
+# Framings understood by the chat Server, AsyncServer and Client.
+#  - "legacy": a 64-byte, space-padded ASCII length header (the original protocol, and the default).
+#  - "binary": a 4-byte big-endian unsigned length header.
+LEGACY = "legacy"
+BINARY = "binary"
+FRAMINGS = (LEGACY, BINARY)
+
+LEGACY_HEADER = 64
+BINARY_HEADER = struct.Struct("!I")
+
+FORMAT = 'utf-8'
+
+# The largest payload a reader accepts. A header announcing more is a protocol error:
+# otherwise a single bogus header (e.g. 0xFFFFFFFF) would make the reader allocate gigabytes.
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+
+# Negotiation: right after connecting, a client may send "!FRAMING <name>" as a legacy frame.
+# The server answers "!FRAMING <name>" (legacy framed too) with the framing it accepted, or
+# "!FRAMING legacy" if it doesn't know the one requested. The server reads the client's
+# frames in the requested framing from then on; the client switches (both ways) once it
+# has the answer, and the server switches its outgoing frames right after sending it.
+NEGOTIATE_MESSAGE = "!FRAMING"
+
+
+def header_size(framing: str) -> int:
+    return BINARY_HEADER.size if framing == BINARY else LEGACY_HEADER
+
+
+def frame(payload: bytes, framing: str = LEGACY) -> bytes:
+    """Prefix an encoded message with its length header, as one buffer."""
+    if framing == BINARY:
+        return BINARY_HEADER.pack(len(payload)) + payload
+    send_length = str(len(payload)).encode(FORMAT)
+    return send_length + b' ' * (LEGACY_HEADER - len(send_length)) + payload
+
+
+def parse_header(header: bytes, framing: str = LEGACY, max_length: int = MAX_FRAME_SIZE) -> int:
+    """
+    :return: The message length announced by a header.
+    :raises ValueError: If a legacy header is not a number, or the length is negative or over max_length.
+    """
+    if framing == BINARY:
+        message_length = BINARY_HEADER.unpack(header)[0]
+    else:
+        message_length = int(bytes(header).decode(FORMAT).strip())
+    if message_length < 0:
+        raise ValueError(f"negative message length {message_length}")
+    if message_length > max_length:
+        raise ValueError(f"message length {message_length} exceeds the {max_length}-byte limit")
+    return message_length
+
+
+def negotiation_request(framing: str) -> str:
+    return f"{NEGOTIATE_MESSAGE} {framing}"
+
+
+def parse_negotiation(message: str) -> str | None:
+    """:return: The framing named by a negotiation message, or None if it isn't one."""
+    command, _, framing = message.partition(" ")
+    return framing if command == NEGOTIATE_MESSAGE else None
+
+
+# The most buffers one sendmsg() call accepts.
+try:
+    IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+
+def send_buffers(sock: socket.socket, buffers: list[bytes]):
+    """
+    Send several buffers (e.g. a batch of frames) with as few syscalls as possible.
+
+    Uses sendmsg() (scatter/gather, like writev) where available, so the frames are
+    never copied into one big buffer; elsewhere (Windows) falls back to one sendall().
+    """
+    if not hasattr(sock, "sendmsg"):
+        sock.sendall(b"".join(buffers))
+        return
+
+    pending = [memoryview(buffer) for buffer in buffers]
+    first = 0 # The first buffer not fully sent yet
+    while first < len(pending):
+        sent = sock.sendmsg(pending[first:first + IOV_MAX])
+        # Skip what was sent; a partially sent buffer keeps its unsent tail.
+        while first < len(pending) and sent >= len(pending[first]):
+            sent -= len(pending[first])
+            first += 1
+        if sent:
+            pending[first] = pending[first][sent:]
+
+
+class FrameReader:
+    """
+    Reassembles frames from a stream socket, however TCP splits or merges them.
+
+    Data is received with recv_into() straight into one preallocated buffer, and every
+    complete frame in it is handed out before the next syscall, so a client that
+    pipelines messages costs one recv per batch rather than two per message.
+    Payloads are memoryviews into the buffer: decode or copy them before asking for
+    the next frame. The framing may be changed between frames (after a negotiation).
+    Frames larger than max_frame_size are rejected before any room is made for them.
+    """
+
+    def __init__(self, sock: socket.socket, framing: str = LEGACY, buffer_size: int = 16384,
+                 max_frame_size: int = MAX_FRAME_SIZE):
+        self.sock = sock
+        self.framing = framing
+        self.max_frame_size = max_frame_size
+
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        # Unparsed data lives in _buffer[_start:_end].
+        self._start = 0
+        self._end = 0
+
+    def __iter__(self):
+        """
+        Yield each frame's payload until the peer closes the connection.
+
+        :raises ConnectionResetError: If the connection closes in the middle of a frame.
+        :raises ValueError: If a header is malformed, negative or over max_frame_size.
+        """
+        while True:
+            payload = self._next_buffered()
+            if payload is not None:
+                yield payload
+            elif not self._fill():
+                if self._start != self._end:
+                    raise ConnectionResetError("Connection closed in the middle of a frame")
+                return
+
+    def _next_buffered(self) -> memoryview | None:
+        """:return: The next complete frame's payload from the buffer, or None if it needs more data."""
+        header_end = self._start + header_size(self.framing)
+        if header_end > self._end:
+            return None
+        message_length = parse_header(self._view[self._start:header_end], self.framing, self.max_frame_size)
+
+        frame_end = header_end + message_length
+        if frame_end > self._end:
+            # Make sure the whole frame will fit once it has arrived.
+            self._reserve(frame_end - self._start)
+            return None
+        self._start = frame_end
+        return self._view[header_end:frame_end]
+
+    def _reserve(self, frame_size: int):
+        """Grow the buffer (for good) if a frame is larger than it."""
+        if frame_size > len(self._buffer):
+            buffer = bytearray(max(frame_size, 2 * len(self._buffer)))
+            buffer[:self._end - self._start] = self._view[self._start:self._end]
+            self._buffer, self._view = buffer, memoryview(buffer)
+            self._end -= self._start
+            self._start = 0
+
+    def _fill(self) -> bool:
+        """
+        Receive more data into the free end of the buffer.
+
+        :return: False if the peer closed the connection.
+        """
+        if self._start == self._end:
+            self._start = self._end = 0
+        elif self._end == len(self._buffer):
+            # Move the partial frame to the front to make room (it's only ever a single frame's tail).
+            remaining = self._end - self._start
+            self._view[:remaining] = self._view[self._start:self._end]
+            self._start, self._end = 0, remaining
+
+        received = self.sock.recv_into(self._view[self._end:])
+        if not received:
+            return False
+        self._end += received
+        return True
@@ -0,0 +1,153 @@
+import sys
+import time
+import random
+import socket
+import timeit
+import argparse
+import threading
+import subprocess
+
+import framing
+from benchmark import wait_for_server
+
+FORMAT = 'utf-8'
+
+
+def serve(kind: str, port: int):
+    """Run one of the servers in this (child) process."""
+    if kind == "async":
+        from async_server import AsyncServer
+        AsyncServer(host="127.0.0.1", port=port).start()
+    else:
+        from server import Server
+        # "block" so a burst can't overflow the receiver's outbox and lose messages.
+        Server(host="127.0.0.1", port=port, slow_client_policy="block").start()
+
+
+def chat_messages(count: int) -> list[bytes]:
+    """Typical chat traffic: 20-100 byte messages."""
+    rng = random.Random(42)
+    return [(f"[bench] {i} " + "x" * rng.randint(10, 90)).encode(FORMAT) for i in range(count)]
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """
+    Receive exactly 'size' bytes, however TCP splits them.
+
+    :return: The bytes, or b'' if the peer closed the connection before the first byte.
+    :raises ConnectionResetError: If the peer closed the connection part way through.
+    """
+    data = sock.recv(size)
+    if not data:
+        return b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionResetError("Connection closed in the middle of a frame")
+        data += chunk
+    return data
+
+
+def connect(port: int, framing_name: str) -> socket.socket:
+    """Connect a raw client and negotiate its framing, like Client does."""
+    sock = socket.create_connection(("127.0.0.1", port))
+    if framing_name != framing.LEGACY:
+        sock.sendall(framing.frame(framing.negotiation_request(framing_name).encode(FORMAT)))
+        header = recv_exactly(sock, framing.LEGACY_HEADER)
+        answer = recv_exactly(sock, framing.parse_header(header)).decode(FORMAT)
+        if framing.parse_negotiation(answer) != framing_name:
+            raise RuntimeError(f"Server refused the '{framing_name}' framing: {answer}")
+    return sock
+
+
+def codec_cost(messages: list[bytes], framing_name: str) -> float:
+    """Microseconds per message to frame it and parse its header back, in-process."""
+    size = framing.header_size(framing_name)
+
+    def round_trip():
+        for payload in messages:
+            framing.parse_header(framing.frame(payload, framing_name)[:size], framing_name)
+
+    seconds = min(timeit.repeat(round_trip, number=1, repeat=3))
+    return seconds / len(messages) * 1e6
+
+
+def run(kind: str, port: int, framing_name: str, messages: list[bytes], batch: int) -> dict:
+    """Relay every message through a server from one client to another and time it."""
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", kind, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for_server(port)
+        receiver = connect(port, framing_name)
+        sender = connect(port, framing_name)
+        time.sleep(0.2)
+
+        frames = [framing.frame(payload, framing_name) for payload in messages]
+        expected = sum(len(frame) for frame in frames)
+        received = 0
+
+        def receive():
+            nonlocal received
+            while received < expected:
+                data = receiver.recv(65536)
+                if not data:
+                    break
+                received += len(data)
+
+        receive_thread = threading.Thread(target=receive, daemon=True)
+        receive_thread.start()
+
+        # Pipeline the messages, several frames per sendall, like a busy client would.
+        started = time.perf_counter()
+        for i in range(0, len(frames), batch):
+            sender.sendall(b"".join(frames[i:i + batch]))
+        receive_thread.join(timeout=120)
+        elapsed = time.perf_counter() - started
+        if received < expected:
+            raise RuntimeError(f"Only {received} of {expected} bytes arrived")
+
+        sender.close()
+        receiver.close()
+        return {"elapsed": elapsed, "wire_bytes": expected}
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy and binary framings with small chat messages")
+    parser.add_argument("-n", "--messages", type=int, default=50000, help="Messages to relay per run. Defaults to 50000.")
+    parser.add_argument("-b", "--batch", type=int, default=64, help="Frames per sendall on the sending side. Defaults to 64.")
+    parser.add_argument("-p", "--port", type=int, default=9980, help="Base port; each run gets its own. Defaults to 9980.")
+    parser.add_argument("--servers", nargs="+", choices=["threaded", "async"], default=["threaded", "async"])
+    # Internal: run a server in this process (used for the child processes).
+    parser.add_argument("--serve", choices=["threaded", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    messages = chat_messages(args.messages)
+    payload_bytes = sum(len(payload) for payload in messages)
+    print(f"[*] {args.messages} messages, {payload_bytes / args.messages:.0f} bytes of text each on average\n")
+
+    print(f"{'framing':<8} {'bytes/msg':>10} {'frame+parse (us)':>17}")
+    for framing_name in framing.FRAMINGS:
+        wire = sum(len(framing.frame(payload, framing_name)) for payload in messages)
+        print(f"{framing_name:<8} {wire / args.messages:>10.1f} {codec_cost(messages, framing_name):>17.2f}")
+
+    print(f"\n{'server':<10} {'framing':<8} {'time (s)':>9} {'msgs/s':>10} {'MiB on wire':>12}")
+    port = args.port
+    for kind in args.servers:
+        for framing_name in framing.FRAMINGS:
+            result = run(kind, port, framing_name, messages, args.batch)
+            port += 1
+            print(f"{kind:<10} {framing_name:<8} {result['elapsed']:>9.2f} "
+                  f"{args.messages / result['elapsed']:>10.0f} {result['wire_bytes'] / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
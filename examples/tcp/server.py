@@ -1,5 +1,241 @@
+import time
 import socket
 import threading
+from typing import NamedTuple
+from collections import deque
+
+# Imported as part of the examples.tcp package (main.py) or run directly from this folder.
+try:
+    from . import framing
+except ImportError:
+    import framing
+
+
+class FramedMessage:
+    """
+    An encoded chat message that is framed lazily, at most once per framing.
+
+    One broadcast shares a single FramedMessage between all recipients, so the
+    message is encoded once and framed once for every framing in use.
+    """
+
+    def __init__(self, payload: bytes, switch_framing: str = None):
+        """
+        :param payload: The UTF-8 encoded message.
+        :param switch_framing: If set, the recipient's outgoing framing changes to this
+                               right after the message is sent (used to answer a negotiation).
+        """
+        self.payload = payload
+        self.switch_framing = switch_framing
+        # Filled by the recipients' writer threads; a rare race only means framing twice.
+        self._frames: dict[str, bytes] = {}
+
+    def frame(self, framing_name: str) -> bytes:
+        frame = self._frames.get(framing_name)
+        if frame is None:
+            frame = self._frames[framing_name] = framing.frame(self.payload, framing_name)
+        return frame
+
+
+class ClientOutbox:
+    """
+    A bounded queue of outgoing messages for one client, drained by its own writer thread.
+
+    Broadcasting only has to append the message to each recipient's outbox, so a client that reads
+    slowly (or not at all) no longer blocks the sender or the other recipients.
+    When the outbox is full, the slow-client policy decides what happens:
+      - "drop_oldest": discard the oldest queued message to make room (the default).
+      - "disconnect":  refuse the message; the server then disconnects the client.
+      - "block":       wait until the writer has made room (the old, blocking behaviour).
+    """
+    POLICIES = ("drop_oldest", "disconnect", "block")
+
+    def __init__(self, send, max_size: int = 256, policy: str = "drop_oldest", name: str = "outbox"):
+        """
+        :param send: Callable that delivers one queued item and returns False if the client is gone.
+        :param max_size: The most messages that may wait in the queue.
+        :param policy: What to do when the queue is full (one of POLICIES).
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown slow-client policy '{policy}'. Choose from: {', '.join(self.POLICIES)}")
+        self.send = send
+        self.max_size = max_size
+        self.policy = policy
+
+        self._queue: deque = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Messages discarded by the "drop_oldest" policy.
+        self.dropped = 0
+
+        self._writer = threading.Thread(target=self._drain, name=f"{name}-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def depth(self) -> int:
+        """How many messages are currently waiting to be sent."""
+        return len(self._queue)
+
+    def put(self, item, block: bool = True) -> bool:
+        """
+        Queue an item for sending.
+
+        :param block: Under the "block" policy, wait for room when the outbox is full. If False,
+                      the item is refused instead.
+        :return: False if the item was refused (outbox closed, full under the "disconnect" policy,
+                 or full under the "block" policy without blocking).
+        """
+        with self._condition:
+            if self._closed:
+                return False
+            if len(self._queue) >= self.max_size:
+                if self.policy == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == "disconnect":
+                    return False
+                else: # "block"
+                    if not block:
+                        return False
+                    self._condition.wait_for(lambda: len(self._queue) < self.max_size or self._closed)
+                    if self._closed:
+                        return False
+            self._queue.append(item)
+            self._condition.notify_all()
+            return True
+
+    def close(self):
+        """Stop the writer thread. Anything still queued is discarded."""
+        with self._condition:
+            self._closed = True
+            self._queue.clear()
+            self._condition.notify_all()
+
+    def _drain(self):
+        """Writer thread: send queued items one by one until closed or the client is gone."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if self._closed:
+                    return
+                item = self._queue.popleft()
+                # Wake up senders blocked on a full queue.
+                self._condition.notify_all()
+
+            # Send outside the lock, so new messages can be queued meanwhile.
+            if not self.send(item):
+                self.close()
+                return
+
+
+class ClientConnection:
+    """Everything the server keeps about one connected client."""
+    __slots__ = ("socket", "address", "outbox", "framing", "rooms", "last_seen", "last_ping")
+
+    def __init__(self, client_socket: socket.socket, address):
+        self.socket = client_socket
+        self.address = address
+        self.outbox: ClientOutbox | None = None # Set right after, so its writer can refer back to this client
+        # Outgoing framing: switched by the writer thread once it has sent a negotiation answer.
+        self.framing = framing.LEGACY
+        # The rooms it's subscribed to. Replaced, never modified, by the ConnectionRegistry.
+        self.rooms: frozenset[str] = frozenset()
+        # Heartbeats: when we last heard from the client, and last pinged it (time.monotonic()).
+        self.last_seen = time.monotonic()
+        self.last_ping = 0.0
+
+
+class RegistrySnapshot(NamedTuple):
+    """One immutable state of the ConnectionRegistry. Never modified once published."""
+    clients: dict[socket.socket, ClientConnection]
+    rooms: dict[str, frozenset[ClientConnection]]
+
+
+class ConnectionRegistry:
+    """
+    The connected clients and the room index, copy-on-write.
+
+    Readers (every broadcast) use 'snapshot': an immutable state they can iterate without
+    taking a lock or making a copy, whatever changes meanwhile. Writers (connects,
+    disconnects and subscriptions, which are rare next to messages) take turns on a lock,
+    build the next state from the current one and publish it with a single assignment.
+    """
+
+    def __init__(self):
+        self.snapshot = RegistrySnapshot({}, {})
+        self._write_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.snapshot.clients)
+
+    def get(self, client_socket: socket.socket) -> ClientConnection | None:
+        return self.snapshot.clients.get(client_socket)
+
+    def add(self, client: ClientConnection, rooms=()):
+        """Register a new client, subscribed to the given rooms."""
+        with self._write_lock:
+            current = self.snapshot
+            clients = dict(current.clients)
+            clients[client.socket] = client
+            room_index = dict(current.rooms)
+            for room in rooms:
+                room_index[room] = room_index.get(room, frozenset()) | {client}
+            client.rooms = frozenset(rooms)
+            self.snapshot = RegistrySnapshot(clients, room_index)
+
+    def remove(self, client_socket: socket.socket) -> ClientConnection | None:
+        """
+        Forget a client and its subscriptions.
+
+        :return: The client, or None if it was already removed.
+        """
+        with self._write_lock:
+            current = self.snapshot
+            client = current.clients.get(client_socket)
+            if client is None:
+                return None
+            clients = dict(current.clients)
+            del clients[client_socket]
+            self.snapshot = RegistrySnapshot(clients, self._without(current.rooms, client, client.rooms))
+            return client
+
+    def subscribe(self, client_socket: socket.socket, room: str) -> bool:
+        """:return: False if the client is gone or already in the room."""
+        with self._write_lock:
+            current = self.snapshot
+            client = current.clients.get(client_socket)
+            if client is None or room in client.rooms:
+                return False
+            room_index = dict(current.rooms)
+            room_index[room] = room_index.get(room, frozenset()) | {client}
+            client.rooms = client.rooms | {room}
+            self.snapshot = RegistrySnapshot(current.clients, room_index)
+            return True
+
+    def unsubscribe(self, client_socket: socket.socket, room: str) -> bool:
+        """:return: False if the client is gone or wasn't in the room."""
+        with self._write_lock:
+            current = self.snapshot
+            client = current.clients.get(client_socket)
+            if client is None or room not in client.rooms:
+                return False
+            client.rooms = client.rooms - {room}
+            self.snapshot = RegistrySnapshot(current.clients, self._without(current.rooms, client, (room,)))
+            return True
+
+    @staticmethod
+    def _without(room_index: dict[str, frozenset[ClientConnection]], client: ClientConnection, rooms) -> dict:
+        """A copy of the room index without the client in these rooms, dropping rooms left empty."""
+        room_index = dict(room_index)
+        for room in rooms:
+            members = room_index.get(room, frozenset()) - {client}
+            if members:
+                room_index[room] = members
+            else:
+                room_index.pop(room, None)
+        return room_index
+
 
 class Server:
     HEADER = 64
@@ -9,13 +245,67 @@ class Server:
     FORMAT = 'utf-8'
     DISCONNECT_MESSAGE = "!DISCONNECT"
 
-    # Keep track of active connections
-    _active_connections: set[socket.socket] = set()
-    _connection_addresses: dict[socket.socket, tuple] = {}
-    _lock = threading.Lock() # To protect access to _active_connections
+    # Rooms (pub-sub). Commands are sent as plain messages, without the client's name prefix:
+    #   "!SUBSCRIBE <room>", "!UNSUBSCRIBE <room>" and "!PUBLISH <room> <message>".
+    # A plain message goes to the rooms its sender is subscribed to; "!PUBLISH" targets one room
+    # and is delivered as "#<room> <message>". Every client starts out in DEFAULT_ROOM, so clients
+    # that know nothing about rooms still chat with everyone, like before.
+    SUBSCRIBE_COMMAND = "!SUBSCRIBE"
+    UNSUBSCRIBE_COMMAND = "!UNSUBSCRIBE"
+    PUBLISH_COMMAND = "!PUBLISH"
+    DEFAULT_ROOM = "lobby"
+    MAX_ROOM_NAME = 64
+
+    # Heartbeats: a client that has been quiet for heartbeat_interval seconds gets a "!PING",
+    # which clients answer with "!PONG" (clients may ping the server the same way).
+    # Neither is printed or broadcast.
+    PING_MESSAGE = "!PING"
+    PONG_MESSAGE = "!PONG"
+
+    def __init__(self, host: str = None, port: int = None, send_queue_size: int = 256,
+                 slow_client_policy: str = "drop_oldest", framings: tuple[str, ...] = framing.FRAMINGS,
+                 reuse_port: bool = False, heartbeat_interval: float = None, idle_timeout: float = None,
+                 keepalive_idle: int = None, keepalive_interval: int = 10, keepalive_count: int = 5):
+        # Use the class defaults unless a host/port is given (e.g. to run several servers side by side)
+        self.SERVER = host if host else Server.SERVER
+        self.PORT = port if port else Server.PORT
+        self.ADDR = (self.SERVER, self.PORT)
+
+        # Every client gets a bounded outbox drained by its own writer thread (see ClientOutbox).
+        if slow_client_policy not in ClientOutbox.POLICIES:
+            raise ValueError(f"Unknown slow-client policy '{slow_client_policy}'. Choose from: {', '.join(ClientOutbox.POLICIES)}")
+        self.send_queue_size = send_queue_size
+        self.slow_client_policy = slow_client_policy
+
+        # Framings clients may negotiate (see framing.py). Clients that don't negotiate keep the legacy 64-byte header.
+        self.framings = framings
+
+        # Keep track of active connections and their rooms (per server, copy-on-write; see ConnectionRegistry)
+        self.registry = ConnectionRegistry()
+
+        # Dead clients (crashed, or dropped by a NAT) never say goodbye. Pinging quiet clients and
+        # reaping those silent for idle_timeout seconds frees their threads; both are off by default.
+        # Clients that predate heartbeats don't answer pings, so only enable idle_timeout for clients that do.
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self._ping = FramedMessage(self.PING_MESSAGE.encode(self.FORMAT)) # Shared by every ping
+        self._pong = FramedMessage(self.PONG_MESSAGE.encode(self.FORMAT))
+
+        # TCP keepalive: after keepalive_idle seconds without traffic the kernel probes the peer every
+        # keepalive_interval seconds and drops the connection after keepalive_count unanswered probes.
+        # Catches dead peers even with heartbeats off; None keeps the OS default (usually off).
+        self.keepalive_idle = keepalive_idle
+        self.keepalive_interval = keepalive_interval
+        self.keepalive_count = keepalive_count
+
+        # Set when this server is one worker of a cluster (see cluster.py): forwards room
+        # messages to the other workers, whose clients may be subscribed to the same rooms.
+        self.bus = None
 
-    def __init__(self):
         self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if reuse_port:
+            # Lets several worker processes bind the same port; the kernel spreads new connections between them.
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.server.bind(self.ADDR)
         
         print(f"[S][SERVER INITIALIZED] Server bound to {self.ADDR}")
@@ -24,109 +314,251 @@ class Server:
         self.server.listen()
         print(f"[S][SERVER LISTENING] Listening on {self.SERVER}:{self.PORT}")
 
+        if self.heartbeat_interval or self.idle_timeout:
+            threading.Thread(target=self._watch_idle_connections, name="idle-reaper", daemon=True).start()
+
         while True:
             try:
                 connection, address = self.server.accept()
-                with self._lock:
-                    self._active_connections.add(connection) # Store ONLY the socket
-                    self._connection_addresses[connection] = address # Store address mapping
+                self._configure_keepalive(connection)
+                client = ClientConnection(connection, address)
+                client.outbox = ClientOutbox( # Its outgoing message queue
+                    lambda message, client=client: self._deliver(client, message),
+                    self.send_queue_size, self.slow_client_policy, name=f"{address[0]}:{address[1]}"
+                )
+                self.registry.add(client, rooms=(self.DEFAULT_ROOM,))
                 print(f"[S][NEW CONNECTION] {address} connected")
 
                 thread = threading.Thread(target=self.handle_client, args=(connection, address))
                 thread.daemon = True
                 thread.start()
 
-                print(f"[S][ACTIVE CONNECTIONS] {len(self._active_connections)}")
+                print(f"[S][ACTIVE CONNECTIONS] {len(self.registry)}")
 
             except Exception as e:
                 print(f"[S][SERVER ACCEPT ERROR] {e}")
                 break
 
     def handle_client(self, connection, address):
-        connected = True
+        # Reassembles whole frames however TCP splits them, several per recv when the client pipelines.
+        reader = framing.FrameReader(connection)
+        first_message = True
+        client = self.registry.get(connection)
 
-        while connected:
-            try:
-                message_length_header = connection.recv(self.HEADER)
-                if not message_length_header: # Client disconnected gracefully
-                    break
+        try:
+            for payload in reader: # Ends when the client disconnects gracefully
+                received_message = str(payload, self.FORMAT)
+                if client is not None:
+                    client.last_seen = time.monotonic()
 
-                message_length = int(message_length_header.decode(self.FORMAT).strip())
-                received_message = connection.recv(message_length).decode(self.FORMAT)
+                # A framing negotiation is only valid as the very first message.
+                requested_framing = framing.parse_negotiation(received_message) if first_message else None
+                first_message = False
+                if requested_framing is not None:
+                    reader.framing = self.negotiate_framing(connection, address, requested_framing)
+                    continue
+
+                if received_message == self.PONG_MESSAGE:
+                    continue # Only refreshes last_seen
+                if received_message == self.PING_MESSAGE:
+                    if client is not None:
+                        client.outbox.put(self._pong)
+                    continue
 
-                if received_message == self.DISCONNECT_MESSAGE:
-                    connected = False
-                
                 print(f"[S][{address}] {received_message}")
 
-                # BROADCAST THE MESSAGE
-                if received_message != self.DISCONNECT_MESSAGE: # Don't broadcast disconnect messages
-                    self.broadcast_message(connection, received_message)
+                if received_message == self.DISCONNECT_MESSAGE:
+                    break
 
-            except ConnectionResetError:
-                print(f"[S][FORCED DISCONNECT] {address} forcefully disconnected.")
-                connected = False
-            except ValueError as ve: # Catch errors if message_length is not a valid int
-                print(f"[S][PROTOCOL ERROR {address}] Invalid message length header: {ve}")
-                connected = False
-            except Exception as e:
-                print(f"[S][ERROR HANDLING {address}] {e}")
-                connected = False
+                if received_message.startswith((self.SUBSCRIBE_COMMAND, self.UNSUBSCRIBE_COMMAND, self.PUBLISH_COMMAND)):
+                    self.handle_room_command(connection, address, received_message)
+                    continue
+
+                # BROADCAST THE MESSAGE to the sender's rooms (disconnect messages are never broadcast)
+                self.broadcast_message(connection, received_message)
+
+        except ConnectionResetError:
+            print(f"[S][FORCED DISCONNECT] {address} forcefully disconnected.")
+        except ValueError as ve: # Catch errors if message_length is not a valid int
+            print(f"[S][PROTOCOL ERROR {address}] Invalid message length header: {ve}")
+        except Exception as e:
+            print(f"[S][ERROR HANDLING {address}] {e}")
 
         # Client disconnected, clean up
         print(f"[S][DISCONNECTED] {address} disconnected")
-        
-        with self._lock:
-            if connection in self._active_connections:
-                self._active_connections.remove(connection)
-            if connection in self._connection_addresses:
-                del self._connection_addresses[connection]
-        try:
-            connection.shutdown(socket.SHUT_RDWR) # Attempt graceful shutdown before close
-            connection.close()
-        except OSError as e:
-            print(f"[S][CLOSE ERROR] Error closing socket for {address}: {e}")
-        
-        print(f"[S][ACTIVE CONNECTIONS] {len(self._active_connections)}")
+        self._remove_connection(connection)
+        print(f"[S][ACTIVE CONNECTIONS] {len(self.registry)}")
 
-    def _send_to_single_client(self, client_socket: socket.socket, message: str) -> bool:
-        """Helper to send a message following the protocol to a single client."""
+    def negotiate_framing(self, connection: socket.socket, address, requested_framing: str) -> str:
+        """
+        Answer a client's framing request.
+
+        :return: The framing the client's messages use from now on.
+        """
+        accepted = requested_framing if requested_framing in self.framings else framing.LEGACY
+        print(f"[S][FRAMING] {address} requested '{requested_framing}', using '{accepted}'")
+
+        # The answer goes through the outbox (still legacy framed), so it stays in order with
+        # broadcasts; the outgoing framing switches as soon as the writer has sent it.
+        client = self.registry.get(connection)
+        if client is not None:
+            answer = framing.negotiation_request(accepted).encode(self.FORMAT)
+            client.outbox.put(FramedMessage(answer, switch_framing=accepted))
+        return accepted
+
+    def _configure_keepalive(self, connection: socket.socket):
+        """Turn on TCP keepalive for a new connection, with our timings where the platform allows it."""
+        if self.keepalive_idle is None:
+            return
+        connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # TCP_KEEPIDLE is Linux (macOS calls it TCP_KEEPALIVE); skip whatever the platform lacks.
+        idle_option = getattr(socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None))
+        for option, value in ((idle_option, self.keepalive_idle),
+                              (getattr(socket, "TCP_KEEPINTVL", None), self.keepalive_interval),
+                              (getattr(socket, "TCP_KEEPCNT", None), self.keepalive_count)):
+            if option is not None:
+                connection.setsockopt(socket.IPPROTO_TCP, option, value)
+
+    def _watch_idle_connections(self):
+        """Reaper thread: ping quiet clients and disconnect the ones that stay silent too long."""
+        periods = [period for period in (self.heartbeat_interval, self.idle_timeout and self.idle_timeout / 2) if period]
+        check_every = max(min(periods), 0.05)
+
+        while True:
+            time.sleep(check_every)
+            now = time.monotonic()
+            for client in self.registry.snapshot.clients.values():
+                idle = now - client.last_seen
+                if self.idle_timeout and idle > self.idle_timeout:
+                    print(f"[S][IDLE TIMEOUT] {client.address} silent for {idle:.0f}s, disconnecting.")
+                    # Shutting the socket down also wakes its handler thread, which then exits.
+                    self._remove_connection(client.socket)
+                elif (self.heartbeat_interval and idle >= self.heartbeat_interval
+                      and now - client.last_ping >= self.heartbeat_interval):
+                    client.last_ping = now
+                    # Never wait for room: one stalled client with a full outbox would hang this
+                    # thread and stop reaping for everyone. Its ping is skipped instead.
+                    client.outbox.put(self._ping, block=False)
+
+    def handle_room_command(self, connection: socket.socket, address, command_message: str):
+        """Handle a "!SUBSCRIBE", "!UNSUBSCRIBE" or "!PUBLISH" message."""
+        command, _, rest = command_message.partition(" ")
+        room, _, message = rest.partition(" ")
+
+        if not room or len(room) > self.MAX_ROOM_NAME:
+            print(f"[S][ROOM ERROR {address}] Invalid room name in '{command}'")
+        elif command == self.SUBSCRIBE_COMMAND:
+            self.registry.subscribe(connection, room)
+            print(f"[S][ROOMS] {address} joined '{room}'")
+        elif command == self.UNSUBSCRIBE_COMMAND:
+            self.registry.unsubscribe(connection, room)
+            print(f"[S][ROOMS] {address} left '{room}'")
+        elif command == self.PUBLISH_COMMAND:
+            self.publish(connection, room, f"#{room} {message}")
+        else:
+            print(f"[S][ROOM ERROR {address}] Unknown command '{command}'")
+
+    def _remove_connection(self, client_socket: socket.socket):
+        """Forget a client, stop its writer thread and close its socket. Safe to call more than once."""
+        client = self.registry.remove(client_socket)
+        if client is None:
+            return # Already removed
+
+        client.outbox.close()
         try:
-            encoded_message = message.encode(self.FORMAT)
-            message_length = len(encoded_message)
-            send_length = str(message_length).encode(self.FORMAT)
-            send_length += b' ' * (self.HEADER - len(send_length))
+            client_socket.shutdown(socket.SHUT_RDWR) # Attempt graceful shutdown before close
+            client_socket.close() # Ensure the socket is closed
+        except OSError as close_err:
+            print(f"[S][CLOSE ERROR] Error closing socket for {client.address}: {close_err}")
+
+    def room_sizes(self) -> dict[str, int]:
+        """Metric: how many clients are subscribed to each room."""
+        return {room: len(subscribers) for room, subscribers in self.registry.snapshot.rooms.items()}
 
-            client_socket.sendall(send_length) # Use sendall for reliability
-            client_socket.sendall(encoded_message)  # Use sendall for reliability
+    def queue_depths(self) -> dict[tuple, int]:
+        """
+        Metric: how many messages are waiting in each client's outbox.
+
+        A depth that stays near send_queue_size means the client is not keeping up.
+        """
+        return {client.address: client.outbox.depth for client in self.registry.snapshot.clients.values()}
+
+    def _deliver(self, client: ClientConnection, message: FramedMessage) -> bool:
+        """Writer thread: send a queued message in the client's current framing."""
+        if not self._send_to_single_client(client.socket, message.frame(client.framing)):
+            return False
+        if message.switch_framing:
+            client.framing = message.switch_framing
+        return True
+
+    def _send_to_single_client(self, client_socket: socket.socket, frame: bytes) -> bool:
+        """Helper to send an already framed message (see FramedMessage.frame) to a single client."""
+        try:
+            client_socket.sendall(frame) # Header and message in one call; sendall for reliability
         except Exception as e:
+            client = self.registry.get(client_socket)
+            if client is None:
+                return False # Already removed (and closed) while its writer was still sending
             # This client is likely disconnected, handle it
-            address_for_log = self._connection_addresses.get(client_socket, "UNKNOWN_ADDR")
+            address_for_log = client.address
             print(f"[S][BROADCAST ERROR] Failed to send to client {address_for_log}: {e}")
             
             # Remove the problematic socket from the active connections
-            with self._lock:
-                if client_socket in self._active_connections:
-                    self._active_connections.remove(client_socket)
-                if client_socket in self._connection_addresses:
-                    del self._connection_addresses[client_socket]
-            try:
-                client_socket.shutdown(socket.SHUT_RDWR) # Attempt graceful shutdown before close
-                client_socket.close() # Ensure the socket is closed
-            except OSError as close_err:
-                print(f"[S][CLOSE ERROR] Error closing socket for {address_for_log}: {close_err}")
+            self._remove_connection(client_socket)
             return False # Indicate failure to send
         return True # Indicate success
 
     def broadcast_message(self, sender_socket: socket.socket, message: str):
-        """Broadcasts a message to all clients except the sender."""
-        with self._lock:
-            # Create a copy of the set to iterate over
-            connections_to_broadcast = list(self._active_connections)
+        """Broadcasts a message to everyone in the sender's rooms, except the sender."""
+        snapshot = self.registry.snapshot # Lock-free: this state never changes
+        sender = snapshot.clients.get(sender_socket)
+        if sender is None:
+            return
+        rooms = sender.rooms
+        self._fan_out(self._subscribers_of(snapshot, rooms), message, sender)
+        if self.bus is not None:
+            self.bus.publish(list(rooms), message)
+
+    def publish(self, sender_socket: socket.socket, room: str, message: str):
+        """Sends a message to one room's subscribers, except the sender (who needn't be subscribed)."""
+        snapshot = self.registry.snapshot
+        self._fan_out(snapshot.rooms.get(room, ()), message, snapshot.clients.get(sender_socket))
+        if self.bus is not None:
+            self.bus.publish([room], message)
+
+    def deliver_from_bus(self, rooms: list[str], message: str):
+        """Sends a message that a client of another worker posted to these rooms to our subscribers."""
+        self._fan_out(self._subscribers_of(self.registry.snapshot, rooms), message)
+
+    @staticmethod
+    def _subscribers_of(snapshot: RegistrySnapshot, rooms):
+        """Everyone subscribed to any of the rooms, once each."""
+        if len(rooms) == 1:
+            # The usual case: the room's own (immutable) member set, no copy needed
+            return snapshot.rooms.get(next(iter(rooms)), frozenset())
+        recipients = set()
+        for room in rooms:
+            recipients.update(snapshot.rooms.get(room, ()))
+        return recipients
+
+    def _fan_out(self, recipients, message: str, sender: ClientConnection = None):
+        """
+        Queue a message for each recipient but the sender.
+
+        The message is only queued in each recipient's outbox; their writer threads do the
+        actual sending, so one slow client can't hold up the sender or anyone else.
+        """
+        # Encode once: every recipient's outbox shares the same message, which is framed
+        # at most once per framing in use.
+        framed_message = FramedMessage(message.encode(self.FORMAT))
 
-        for client_socket in connections_to_broadcast:
-            if client_socket != sender_socket: # Don't send back to the sender
-                # _send_to_single_client will handle removal if sending fails
-                self._send_to_single_client(client_socket, message)
+        for client in recipients:
+            if client is sender: # Don't send back to the sender
+                continue
+            if not client.outbox.put(framed_message) and self.registry.get(client.socket) is client:
+                # Outbox full under the "disconnect" policy (clients removed since the snapshot are skipped quietly)
+                print(f"[S][SLOW CLIENT] {client.address} can't keep up, disconnecting.")
+                self._remove_connection(client.socket)
 
-Server().start()  # Example instantiation, can be removed if not needed or you want to use this class in another script.
+if __name__ == "__main__":
+    Server().start()  # Example instantiation, only when this file is run directly so the class can be imported.
@@ -0,0 +1,119 @@
+import struct
+import socket
+import threading
+
+import probes
+from scanner import Scanner
+
+# What each stand-in must be identified as.
+IDENTIFIED = {
+    "dns": "DNS server (rcode=0, answers=0)",
+    "ntp": "NTP v3 server (stratum 2)",
+    "snmp": "SNMPv1 agent (community 'public')",
+}
+
+
+class StandInService():
+    """
+    A tiny local UDP service that answers probes the way a real DNS, NTP or SNMP
+    server would. Used to try out the scanner's protocol-aware probes without
+    needing root (for ports below 1024) or a real server on the network.
+    """
+
+    def __init__(self, service: str, host: str = "127.0.0.1"):
+        self.service = service
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, 0))  # Let the OS pick a free port
+        self.port = self.socket.getsockname()[1]
+
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        """Answer every datagram with a protocol-correct reply."""
+        while True:
+            try:
+                request, address = self.socket.recvfrom(1024)
+            except OSError:
+                break  # Socket closed
+            reply = getattr(self, f"reply_{self.service}")(request)
+            if reply:
+                self.socket.sendto(reply, address)
+
+    def reply_dns(self, request: bytes) -> bytes:
+        """Echo the query back with the QR (response) bit set and no answers."""
+        if len(request) < 12:
+            return b""
+        query_id, flags = struct.unpack("!HH", request[:4])
+        return struct.pack("!HH", query_id, flags | 0x8000) + request[4:]
+
+    def reply_ntp(self, request: bytes) -> bytes:
+        """A version 3, mode 4 (server) packet at stratum 2."""
+        return bytes([0x1C, 2]) + b"\x00" * 46
+
+    def reply_snmp(self, request: bytes) -> bytes:
+        """Reflect the request with its PDU tag changed to GetResponse (0xA2)."""
+        if len(request) < 7 or request[0] != 0x30:
+            return b""
+        pdu_offset = 7 + request[6]  # After the version and community fields
+        return request[:pdu_offset] + b"\xA2" + request[pdu_offset + 1:]
+
+    def close(self):
+        self.socket.close()
+
+
+def check_parsers():
+    """The response parsers on hand-made packets, including the cases the stand-ins don't produce."""
+    assert probes.parse_dns_response(struct.pack("!HHHHHH", probes.DNS_QUERY_ID, 0x8183, 1, 0, 0, 0)) == "DNS server (rcode=3, answers=0)"
+    assert probes.parse_dns_response(struct.pack("!HHHHHH", probes.DNS_QUERY_ID + 1, 0x8180, 1, 1, 0, 0)) is None  # Not our query
+    assert probes.parse_dns_response(probes.build_dns_query()) is None  # A query, not a response
+    assert probes.parse_ntp_response(bytes([0x24, 1]) + b"\x00" * 46) == "NTP v4 server (stratum 1)"
+    assert probes.parse_ntp_response(b"\x24\x01") is None  # Truncated
+
+    # BER headers: short form, long form with one and two length octets, and invalid ones.
+    assert probes._read_ber_header(b"\x04\x06public", 0) == (0x04, 6, 2)
+    assert probes._read_ber_header(b"\x04\x81\xc8", 0) == (0x04, 200, 3)
+    assert probes._read_ber_header(b"\x30\x82\x01\x33", 0) == (0x30, 307, 4)
+    assert probes._read_ber_header(b"\x30\x80", 0) is None  # Indefinite length
+    assert probes._read_ber_header(b"\x30\x82\x01", 0) is None  # Truncated length
+
+    # SNMP: our own request, and a v2c response whose community (300 bytes) needs long-form lengths.
+    assert probes.parse_snmp_response(probes.build_snmp_get()) == "SNMPv1 agent (community 'public')"
+    community = b"c" * 300
+    long_form = b"\x30\x82\x01\x33" + b"\x02\x01\x01" + b"\x04\x82\x01\x2c" + community
+    assert probes.parse_snmp_response(long_form) == f"SNMPv2 agent (community '{community.decode()}')"
+    assert probes.parse_snmp_response(long_form[:-1]) is None  # Truncated community
+    print("[*] Probe parsers OK")
+
+
+def main():
+    check_parsers()
+
+    # Start one stand-in per protocol on free local ports.
+    stand_ins = [StandInService(service) for service in ("dns", "ntp", "snmp")]
+
+    # Tell the scanner which probe belongs to which (non-standard) port.
+    services = {stand_in.port: stand_in.service for stand_in in stand_ins}
+    ports = list(services) + [9]  # Port 9 (discard) should come back closed
+
+    print(f"[*] Stand-in services: {services}\n")
+    scanner = Scanner("127.0.0.1", target_ports=ports, concurrent=True, services=services)
+
+    print()
+    for item in scanner.sockets:
+        print(f"Port {item['port']}: {item['status']} - Response: {item['response'] if item['response'] else 'N/A'}")
+
+    # Every stand-in must have been identified as its service, and port 9 reported closed.
+    results = {item["port"]: item for item in scanner.sockets}
+    for port, service in services.items():
+        assert results[port]["status"] == "Open/Responding", f"Port {port} ({service}): {results[port]['status']}"
+        assert results[port]["response"] == IDENTIFIED[service], f"Port {port} ({service}): {results[port]['response']}"
+    assert results[9]["status"] == "Closed (ICMP Port Unreachable)", f"Port 9: {results[9]['status']}"
+    print("\n[*] Every port came back as expected")
+
+    for stand_in in stand_ins:
+        stand_in.close()
+
+
+if __name__ == "__main__":
+    main()
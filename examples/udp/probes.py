@@ -0,0 +1,176 @@
+import struct
+from functools import lru_cache
+
+
+class Probe():
+    """
+    A protocol-aware UDP probe: the payload that makes a service answer,
+    and a parser that recognises the answer.
+    """
+
+    def __init__(self, name: str, build, parse):
+        """
+        :param name: Short service name (e.g. "dns").
+        :param build: Callable returning the probe payload as bytes.
+        :param parse: Callable taking the response bytes and returning a short
+                      description if the response is from this service, else None.
+        """
+        self.name = name
+        self.build = build
+        self.parse = parse
+
+
+# --- DNS ---------------------------------------------------------------------
+
+DNS_QUERY_ID = 0x5343  # Arbitrary, but fixed so responses can be checked against it.
+
+
+def build_dns_query() -> bytes:
+    """A standard query for the root zone's NS records. Every DNS server can answer it."""
+    # Header: id, flags (recursion desired), 1 question, 0 answer/authority/additional records.
+    header = struct.pack("!HHHHHH", DNS_QUERY_ID, 0x0100, 1, 0, 0, 0)
+    # Question: the root name (a single zero-length label), QTYPE=NS (2), QCLASS=IN (1).
+    question = b"\x00" + struct.pack("!HH", 2, 1)
+    return header + question
+
+
+def parse_dns_response(response: bytes) -> str | None:
+    """Recognise a DNS response to build_dns_query()."""
+    if len(response) < 12:
+        return None
+    query_id, flags, _, answers, _, _ = struct.unpack("!HHHHHH", response[:12])
+    # The ID must match ours and the QR bit (top bit of the flags) marks a response.
+    if query_id != DNS_QUERY_ID or not flags & 0x8000:
+        return None
+    return f"DNS server (rcode={flags & 0x000F}, answers={answers})"
+
+
+# --- NTP ---------------------------------------------------------------------
+
+def build_ntp_request() -> bytes:
+    """An NTP client request: LI=0, version 3, mode 3 (client), the rest zeroed."""
+    return b"\x1b" + b"\x00" * 47
+
+
+def parse_ntp_response(response: bytes) -> str | None:
+    """Recognise an NTP server reply (mode 4)."""
+    if len(response) < 48:
+        return None
+    version = (response[0] >> 3) & 0x07
+    mode = response[0] & 0x07
+    if mode != 4:
+        return None
+    return f"NTP v{version} server (stratum {response[1]})"
+
+
+# --- SNMP --------------------------------------------------------------------
+
+SNMP_COMMUNITY = b"public"
+SNMP_SYSDESCR_OID = b"\x2b\x06\x01\x02\x01\x01\x01\x00"  # 1.3.6.1.2.1.1.1.0 (sysDescr.0), BER encoded
+
+
+def _ber(tag: int, content: bytes) -> bytes:
+    """Encode one BER element (short-form lengths are enough for these small packets)."""
+    return bytes([tag, len(content)]) + content
+
+
+def build_snmp_get() -> bytes:
+    """An SNMPv1 GetRequest for sysDescr.0 with the 'public' community."""
+    varbind = _ber(0x30, _ber(0x06, SNMP_SYSDESCR_OID) + b"\x05\x00")  # OID + NULL value
+    pdu = _ber(0xA0, (
+        _ber(0x02, b"\x01")           # request-id
+        + _ber(0x02, b"\x00")         # error-status
+        + _ber(0x02, b"\x00")         # error-index
+        + _ber(0x30, varbind)         # variable bindings
+    ))
+    return _ber(0x30, _ber(0x02, b"\x00") + _ber(0x04, SNMP_COMMUNITY) + pdu)
+
+
+def _read_ber_header(data: bytes, offset: int) -> tuple[int, int, int] | None:
+    """
+    Decode the tag and length of the BER element at 'offset'.
+
+    Lengths up to 127 take one octet (short form); longer ones are 0x80 | n followed by
+    n big-endian octets (long form, e.g. 0x81 xx or 0x82 xx xx), as agents use for large responses.
+
+    :return: (tag, content length, content offset), or None if the header is truncated or invalid.
+    """
+    if offset + 2 > len(data):
+        return None
+    tag, length = data[offset], data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        octets = length & 0x7F
+        if octets == 0 or octets > 4 or offset + octets > len(data):
+            return None  # Indefinite lengths aren't allowed in SNMP
+        length = int.from_bytes(data[offset:offset + octets], "big")
+        offset += octets
+    return tag, length, offset
+
+
+def parse_snmp_response(response: bytes) -> str | None:
+    """Recognise an SNMP message: a SEQUENCE holding a version INTEGER and a community OCTET STRING."""
+    # 0x30 = SEQUENCE, then 0x02 <len> <version>, then 0x04 <len> <community>, lengths in short or long form.
+    message = _read_ber_header(response, 0)
+    if message is None or message[0] != 0x30:
+        return None
+    version_header = _read_ber_header(response, message[2])
+    if version_header is None or version_header[0] != 0x02 or not 1 <= version_header[1] <= 4:
+        return None
+    _, version_length, version_offset = version_header
+    community_header = _read_ber_header(response, version_offset + version_length)
+    if community_header is None or community_header[0] != 0x04:
+        return None
+    _, community_length, community_offset = community_header
+    if community_offset + community_length > len(response):
+        return None
+
+    version = int.from_bytes(response[version_offset:version_offset + version_length], "big") + 1  # 0 means SNMPv1, 1 means SNMPv2c
+    community = response[community_offset:community_offset + community_length].decode(errors="replace")
+    return f"SNMPv{version} agent (community '{community}')"
+
+
+# --- Registry ----------------------------------------------------------------
+
+# The default probe for ports without a known service.
+DEFAULT_PAYLOAD = b"scan_probe"
+
+# Every known probe, by service name.
+PROBES: dict[str, Probe] = {
+    "dns": Probe("dns", build_dns_query, parse_dns_response),
+    "ntp": Probe("ntp", build_ntp_request, parse_ntp_response),
+    "snmp": Probe("snmp", build_snmp_get, parse_snmp_response),
+}
+
+# Well-known ports and the service probe to send to them.
+PORT_SERVICES: dict[int, str] = {
+    53: "dns",
+    5353: "dns",
+    123: "ntp",
+    161: "snmp",
+}
+
+
+@lru_cache(maxsize=None)
+def payload_for(service: str | None) -> bytes:
+    """
+    Return the probe payload for a service, building it only the first time it's asked for.
+
+    :param service: A key of PROBES, or None for the generic probe.
+    """
+    if service is None:
+        return DEFAULT_PAYLOAD
+    return PROBES[service].build()
+
+
+def identify(service: str | None, response: bytes) -> str | None:
+    """
+    Check whether a response came from the expected service.
+
+    :param service: The service the probe was built for (a key of PROBES), or None.
+    :param response: The bytes received.
+    :return: A short description of the service, or None if it isn't recognised.
+    """
+    if service is None:
+        return None
+    return PROBES[service].parse(response)
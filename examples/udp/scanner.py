@@ -1,4 +1,9 @@
+import time
+import errno
 import socket
+import selectors
+
+from probes import PORT_SERVICES, payload_for, identify
 
 
 class Scanner():
@@ -7,37 +12,72 @@ class Scanner():
     target_host: str = "localhost"  # Target host to scan
     target_ports: list = [42, 53, 67, 123, 161, 162, 3389]  # List of ports to scan
 
-    # List to store the results of the scan
-    sockets: list[dict] = []
-
-    def __init__(self, target_host: str = None, target_ports: list = None):
-        """Initialize the UDP scanner with a target host and ports to scan."""
+    timeout: float = 1.0  # Seconds to wait for a response (per port, or per batch when concurrent)
+    max_sockets: int = 256  # Concurrent mode: how many probes are in flight at once
+
+    # Error codes that mean "ICMP Port Unreachable" came back for a probe:
+    # 10054 (WSAECONNRESET) on Windows, ECONNREFUSED on Linux and macOS.
+    PORT_UNREACHABLE_ERRORS = (10054, errno.ECONNREFUSED)
+
+    def __init__(self, target_host: str = None, target_ports: list = None, concurrent: bool = False,
+                 timeout: float = None, max_sockets: int = None, services: dict[int, str] = None):
+        """
+        Initialize the UDP scanner with a target host and ports to scan.
+
+        Ports with a known service (DNS on 53, NTP on 123, SNMP on 161, ...) are sent a
+        protocol-aware probe from probes.py, so the real service answers and can be
+        identified in one round trip. All other ports get the generic "scan_probe".
+
+        :param concurrent: If True, probe all ports at once and wait for one shared deadline
+                           instead of probing one port after another.
+        :param timeout: Seconds to wait for responses. Defaults to Scanner.timeout.
+        :param max_sockets: Concurrent mode only: the most probes in flight at the same time.
+        :param services: Extra {port: service} entries (service being a key of probes.PROBES),
+                         e.g. {5300: "dns"} for a DNS server on a non-standard port.
+        """
         self.target_host = target_host or self.target_host
-        self.target_ports = target_ports or self.target_ports
+        # Copy the ports so that changing them never touches the class-level default list.
+        self.target_ports = list(target_ports or self.target_ports)
+        self.concurrent = concurrent
+        self.timeout = timeout or self.timeout
+        self.max_sockets = max_sockets or self.max_sockets
+
+        # Which probe to send to which port: the well-known ports plus any given overrides.
+        self.services = {**PORT_SERVICES, **(services or {})}
+
+        # List to store the results of the scan. This is per instance, so results
+        # from different scanners (or repeated scans) never end up mixed together.
+        self.sockets: list[dict] = []
 
         self.scan()
 
     def scan(self) -> list[dict]:
         """Scan the target host for open UDP ports and return the results."""
+        if self.concurrent:
+            return self.scan_concurrent()
+        return self.scan_sequential()
+
+    def scan_sequential(self) -> list[dict]:
+        """Probe the ports one after another, waiting up to 'timeout' seconds for each."""
 
         for port in self.target_ports:
             current_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            current_socket.settimeout(1.0)  # Set a timeout for receiving a response
+            current_socket.settimeout(self.timeout)  # Set a timeout for receiving a response
 
             status = "Unknown" # Default status
             response_data = None # Default response data
+            service = self.services.get(port) # The service the probe is built for, if any
 
             try:
                 # Send a probe message to the target host on the specified port
-                message = "scan_probe"
-                current_socket.sendto(message.encode(), (self.target_host, port))
+                current_socket.sendto(payload_for(service), (self.target_host, port))
 
                 # Wait for a response from the server
                 response, addr = current_socket.recvfrom(1024)
 
                 # If a response is received, mark the port as open
                 status = "Open/Responding"
-                response_data = response.decode()
+                response_data = self._describe_response(service, response)
                 print(f"[+] Port {port} is {status} on {self.target_host}. Response: {response_data} from {addr}")
 
             except socket.timeout:
@@ -47,13 +87,7 @@ class Scanner():
 
             except socket.error as e:
                 # Handle socket errors, such as connection issues
-                if e.errno == 10054: # Specific error code for "Connection forcibly closed"
-                    status = "Closed (ICMP Port Unreachable)"
-                    print(f"[-] Port {port} is {status} on {self.target_host}.")
-                else:
-                    status = f"Error: {e.errno}" # Catch other socket errors
-                    response_data = str(e)
-                    print(f"[!] Error with port {port}: {e}")
+                status, response_data = self._error_status(port, e)
 
             except Exception as e:
                 # Catch any other unexpected errors
@@ -64,18 +98,128 @@ class Scanner():
                 current_socket.close()
 
             # Store the result for the current port
-            self.sockets.append({
-                "port": port,
-                "is_open": True if "Open" in status else False,
-                "response": response_data,
-                "status": status
-            })
+            self._record(port, status, response_data)
+
+        return self.sockets
+
+    def scan_concurrent(self) -> list[dict]:
+        """
+        Probe all ports at once and collect the answers with a selector.
+
+        Every probe is sent from its own *connected* UDP socket. Connecting a UDP socket
+        doesn't send anything, but it makes the kernel deliver an ICMP Port Unreachable
+        for that destination to that socket (as ECONNREFUSED on the next recv), which an
+        unconnected socket would never see. One selector watches all of them, so answers
+        and ICMP errors are matched to their port by socket, and the whole batch shares a
+        single deadline. Scanning N ports therefore takes about one timeout instead of N.
+        At most 'max_sockets' probes are in flight; larger port lists run in batches.
+        """
+        # Resolve the host once instead of once per probe.
+        try:
+            target_ip = socket.gethostbyname(self.target_host)
+        except socket.gaierror as e:
+            print(f"[!] Could not resolve {self.target_host}: {e}")
+            return self.sockets
+
+        # port -> (status, response_data), filled in as answers arrive.
+        results: dict[int, tuple[str, str]] = {}
+
+        for batch_start in range(0, len(self.target_ports), self.max_sockets):
+            batch = self.target_ports[batch_start:batch_start + self.max_sockets]
+            self._probe_batch(target_ip, batch, results)
+
+        # Store the results in the same order as the ports were given.
+        for port in self.target_ports:
+            status, response_data = results[port]
+            self._record(port, status, response_data)
 
         return self.sockets
 
+    def _probe_batch(self, target_ip: str, ports: list, results: dict):
+        """Send one probe per port, then wait for answers until the shared deadline passes."""
+        selector = selectors.DefaultSelector()
+
+        try:
+            # Send every probe first...
+            for port in ports:
+                probe_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                probe_socket.setblocking(False)
+                try:
+                    probe_socket.connect((target_ip, port))
+                    probe_socket.send(payload_for(self.services.get(port)))
+                except OSError as e:
+                    results[port] = self._error_status(port, e)
+                    probe_socket.close()
+                    continue
+                # Remember which port this socket belongs to.
+                selector.register(probe_socket, selectors.EVENT_READ, data=port)
+
+            # ...then collect answers until every probe is settled or time runs out.
+            deadline = time.monotonic() + self.timeout
+            while selector.get_map():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+
+                for key, _ in selector.select(timeout=remaining):
+                    port = key.data
+                    probe_socket = key.fileobj
+                    try:
+                        response = probe_socket.recv(1024)
+                        status = "Open/Responding"
+                        response_data = self._describe_response(self.services.get(port), response)
+                        print(f"[+] Port {port} is {status} on {self.target_host}. Response: {response_data}")
+                        results[port] = (status, response_data)
+                    except BlockingIOError:
+                        # Spurious wakeup; keep waiting for this port.
+                        continue
+                    except OSError as e:
+                        # An ICMP error for this port (or another socket error).
+                        results[port] = self._error_status(port, e)
+
+                    selector.unregister(probe_socket)
+                    probe_socket.close()
+        finally:
+            # Whatever hasn't answered by the deadline is filtered (or the probe was lost).
+            for key in list(selector.get_map().values()):
+                port = key.data
+                status = "Filtered/No Response"
+                print(f"[-] Port {port} is {status} on {self.target_host}.")
+                results[port] = (status, None)
+                selector.unregister(key.fileobj)
+                key.fileobj.close()
+            selector.close()
+
+    def _describe_response(self, service: str | None, response: bytes) -> str:
+        """Describe a response: the identified service if the probe's parser recognises it, else the raw text."""
+        description = identify(service, response)
+        if description:
+            return description
+        return response.decode(errors="replace")
+
+    def _error_status(self, port: int, error: OSError) -> tuple[str, str]:
+        """Turn a socket error for a probe into a (status, response_data) pair and report it."""
+        if error.errno in self.PORT_UNREACHABLE_ERRORS:
+            status = "Closed (ICMP Port Unreachable)"
+            print(f"[-] Port {port} is {status} on {self.target_host}.")
+            return status, None
+
+        status = f"Error: {error.errno}" # Catch other socket errors
+        print(f"[!] Error with port {port}: {error}")
+        return status, str(error)
+
+    def _record(self, port: int, status: str, response_data: str):
+        """Store the result for a port."""
+        self.sockets.append({
+            "port": port,
+            "is_open": True if "Open" in status else False,
+            "response": response_data,
+            "status": status
+        })
+
 
 if __name__ == "__main__":
-    scanner_localhost = Scanner("localhost")
+    scanner_localhost = Scanner("localhost", concurrent=True)
 
     for item in scanner_localhost.sockets:
         print(f"Port {item['port']}: {item['status']} - Response: {item['response'] if item['response'] else 'N/A'}")